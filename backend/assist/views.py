@@ -15,7 +15,7 @@ import calendar
 import re
 from .models import Application, BatchItem
 from django.core.paginator import Paginator
-from django.db.models import Exists, OuterRef, Subquery, DateTimeField
+from django.db.models import BooleanField, Count, ExpressionWrapper, OuterRef, Q, Subquery, DateTimeField
 # --- NEW DETAIL VIEWS FOR METRICS ---
 
 def _age_years(dob):
@@ -24,30 +24,50 @@ def _age_years(dob):
     today = timezone.now().date()
     return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
 
+def _window_filters(start_dt):
+    """(screened, red) Q filters on Student for the period, via the LatestScreening snapshot."""
+    if start_dt:
+        return (Q(latest_screening__screened_at__gte=start_dt),
+                Q(latest_screening__last_red_at__gte=start_dt))
+    return Q(latest_screening__isnull=False), Q(latest_screening__last_red_at__isnull=False)
+
+def _student_screening_summary(org, start_dt) -> dict:
+    """
+    Student totals for the dashboard tiles in one conditional-aggregation query.
+    One snapshot row per student, so plain COUNTs replace COUNT(DISTINCT student_id)
+    scans over Screening, and the numbers match the drill-down lists below.
+    """
+    screened, red = _window_filters(start_dt)
+    boys, girls = Q(gender="M"), Q(gender="F")
+    return Student.objects.filter(organization=org).aggregate(
+        total_students=Count("id"),
+        total_screened=Count("id", filter=screened),
+        total_redflag=Count("id", filter=red),
+        boys_screened=Count("id", filter=boys & screened),
+        boys_redflag=Count("id", filter=boys & red),
+        girls_screened=Count("id", filter=girls & screened),
+        girls_redflag=Count("id", filter=girls & red),
+    )
+
 def _students_metric_qs(org, metric: str, start_dt, end_dt):
     # Base queryset with useful relations for table rendering
     students = (
         Student.objects
         .filter(organization=org)
-        .select_related("classroom", "primary_guardian")
+        .select_related("classroom", "primary_guardian", "latest_screening")
     )
 
-    # “In-window” screenings subqueries (to mirror the dashboard period filter)
-    window_screenings = Screening.objects.filter(organization=org, student=OuterRef("pk"))
-    window_red = window_screenings.filter(risk_level=Screening.RiskLevel.RED)
-    if start_dt:  # when period != 'all'
-        window_screenings = window_screenings.filter(screened_at__range=(start_dt, end_dt))
-        window_red = window_red.filter(screened_at__range=(start_dt, end_dt))
-
-    # For “Total students” (all-time indicators)
-    ever_screened = Screening.objects.filter(organization=org, student=OuterRef("pk"))
-    ever_red = ever_screened.filter(risk_level=Screening.RiskLevel.RED)
+    # Screened / red flags come from the LatestScreening snapshot (plain LEFT JOIN).
+    # The period always ends "now", so "any screening in [start, now]" is
+    # "latest screening >= start", and likewise for the latest RED screening.
+    ever_screened, ever_red = _window_filters(None)
+    screened_in_window, red_in_window = _window_filters(start_dt)
 
     students = students.annotate(
-        screened_in_window=Exists(window_screenings),
-        red_in_window=Exists(window_red),
-        ever_screened=Exists(ever_screened),
-        ever_red=Exists(ever_red),
+        screened_in_window=ExpressionWrapper(screened_in_window, output_field=BooleanField()),
+        red_in_window=ExpressionWrapper(red_in_window, output_field=BooleanField()),
+        ever_screened=ExpressionWrapper(ever_screened, output_field=BooleanField()),
+        ever_red=ExpressionWrapper(ever_red, output_field=BooleanField()),
     )
 
     m = (metric or "").lower()
@@ -320,44 +340,8 @@ def school_app_dashboard(request):
     period = request.GET.get("period", "3m")
     start_dt, end_dt = _period_bounds(period)
 
-    # Base screening queryset (optionally windowed)
-    screenings = Screening.objects.filter(organization=org)
-    if start_dt:
-        screenings = screenings.filter(screened_at__range=(start_dt, end_dt))
-
-    # Distinct-student screening counts
-    screened_distinct = screenings.values_list("student_id", flat=True).distinct()
-    total_screened = screened_distinct.count()
-    total_redflag = (
-        screenings.filter(risk_level=Screening.RiskLevel.RED)
-        .values_list("student_id", flat=True)
-        .distinct()
-        .count()
-    )
-    boys_screened = (
-        screenings.filter(student__gender="M")
-        .values_list("student_id", flat=True)
-        .distinct()
-        .count()
-    )
-    boys_redflag = (
-        screenings.filter(student__gender="M", risk_level=Screening.RiskLevel.RED)
-        .values_list("student_id", flat=True)
-        .distinct()
-        .count()
-    )
-    girls_screened = (
-        screenings.filter(student__gender="F")
-        .values_list("student_id", flat=True)
-        .distinct()
-        .count()
-    )
-    girls_redflag = (
-        screenings.filter(student__gender="F", risk_level=Screening.RiskLevel.RED)
-        .values_list("student_id", flat=True)
-        .distinct()
-        .count()
-    )
+    # Distinct-student screening counts (+ total students), one query
+    student_counts = _student_screening_summary(org, start_dt)
 
     # Applications metrics in the window
     apps = Application.objects.filter(organization=org)
@@ -376,15 +360,9 @@ def school_app_dashboard(request):
         applications_approved = apps.filter(status=Application.Status.APPROVED).count()
 
     summary = {
-        "total_students": Student.objects.filter(organization=org).count(),  # not windowed
-        "total_screened": total_screened,
-        "total_redflag": total_redflag,
+        **student_counts,   # total_students is not windowed
         "applications_pending": applications_pending,
         "applications_approved": applications_approved,
-        "boys_screened": boys_screened,
-        "boys_redflag": boys_redflag,
-        "girls_screened": girls_screened,
-        "girls_redflag": girls_redflag,
     }
 
     return render(request, "assist/school_admin_list.html", {
@@ -0,0 +1,82 @@
+"""
+asyncio fan-out for WhatsApp template sends.
+
+Provider calls are almost all network wait, so one worker process can keep
+hundreds of them in flight on a single event loop instead of blocking on one
+requests.post at a time. send_concurrently() bounds the fan-out with a
+semaphore (WA_ASYNC_CONCURRENCY), reserves the batch from the global
+per-minute budget up front, checks the per-phone daily cap before each send
+and never has two sends to the same phone in flight at once.
+
+run_sends() is the sync entry point used by messaging.dispatch when
+WA_DISPATCH_SENDER=asyncio: it runs one event loop with a fresh async
+provider (providers.registry.build_async_provider) for the batch.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from .providers.base import AsyncWhatsAppProvider
+from .providers.registry import build_async_provider
+from .ratelimit import RateLimitExceeded, check_per_phone_daily, take_global_per_min
+
+# (to_phone_e164, template_name, language_code, components)
+SendJob = Tuple[str, str, str, dict]
+# (provider_msg_id, provider_status) on success, or the exception raised
+SendResult = Tuple[Optional[Tuple[str, str]], Optional[BaseException]]
+
+
+async def send_concurrently(
+    provider: AsyncWhatsAppProvider,
+    jobs: Sequence[SendJob],
+    *,
+    concurrency: Optional[int] = None,
+    reserve_global: Optional[Callable[[int], int]] = take_global_per_min,
+    check_phone: Optional[Callable[[str, str], None]] = check_per_phone_daily,
+) -> List[SendResult]:
+    """
+    Send every job, at most `concurrency` at a time; results come back in job order.
+    Jobs over the global budget or a phone's daily cap get a RateLimitExceeded
+    result and are not sent. Pass reserve_global / check_phone as None when the
+    caller has already applied that limit.
+    """
+    concurrency = max(1, concurrency or settings.WA_ASYNC_CONCURRENCY)
+    results: List[SendResult] = [(None, None)] * len(jobs)
+    granted = len(jobs)
+    if reserve_global is not None and jobs:
+        granted = await asyncio.to_thread(reserve_global, len(jobs))
+    for i in range(granted, len(jobs)):
+        results[i] = (None, RateLimitExceeded("Global per-minute WhatsApp limit reached"))
+
+    in_flight = asyncio.Semaphore(concurrency)
+    per_phone = defaultdict(asyncio.Lock)   # FIFO, so one phone's jobs go out in order
+
+    async def run(i: int, job: SendJob) -> None:
+        to, template_name, language_code, components = job
+        async with per_phone[to]:
+            try:
+                if check_phone is not None:
+                    await asyncio.to_thread(check_phone, to, template_name)
+                async with in_flight:
+                    results[i] = (await provider.send_template(to, template_name, language_code, components), None)
+            except Exception as exc:   # recorded per job; one bad send must not sink the rest
+                results[i] = (None, exc)
+
+    await asyncio.gather(*(run(i, job) for i, job in enumerate(jobs[:granted])))
+    return results
+
+
+def run_sends(jobs: Sequence[SendJob], *, provider_name: Optional[str] = None, **kwargs) -> List[SendResult]:
+    """Blocking wrapper: send `jobs` on a new event loop through a fresh async provider."""
+    if not jobs:
+        return []
+
+    async def main():
+        async with build_async_provider(provider_name) as provider:
+            return await send_concurrently(provider, jobs, **kwargs)
+
+    return asyncio.run(main())
@@ -0,0 +1,315 @@
+"""
+Batched WhatsApp template dispatch.
+
+Services create a QUEUED MessageLog with scheduled_at set and hand it to
+enqueue() together with the recipient phone and template components. Those
+never reach the database (MessageLog.save blanks them): they are kept as a
+short-lived envelope keyed by the row's idempotency_key in Redis
+(WA_OUTBOX_REDIS_URL), or in the Django cache when that is empty, which must
+then be shared by web and worker processes (CACHE_REDIS_URL). An unreachable
+store raises OutboxUnavailable; nothing falls back to a per-process cache.
+Click-to-chat rows have no scheduled_at and are never picked up.
+
+dispatch_batch() claims up to WA_DISPATCH_BATCH due rows in a short
+SELECT ... FOR UPDATE SKIP LOCKED transaction that moves them to SENDING,
+counts the attempt and leases them until scheduled_at = now + WA_DISPATCH_LEASE.
+The sends then run outside any transaction, concurrently and within the global
+per-minute limit (pooled provider on a thread pool, or an event loop with
+WA_DISPATCH_SENDER=asyncio, see messaging.async_sender), and the outcomes are
+written back with one bulk_update. Parallel dispatchers never claim the same
+row; a worker that dies mid-batch leaves its rows SENDING until the lease runs
+out, after which they are claimed again, or failed once the attempts are spent.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .async_sender import SendJob, SendResult, run_sends
+from .i18n import to_provider_lang
+from .models import MessageLog
+from .ratelimit import take_global_per_min
+from .services import TEMPLATE_NAME, _provider
+
+logger = logging.getLogger(__name__)
+
+_ENVELOPE_PREFIX = "messaging:outbox:"
+_SCHEDULED_KEY = "messaging:dispatch-scheduled"
+_RETRY_STEP_SECONDS = 30      # attempt n waits n * 30 s ...
+_RETRY_MAX_SECONDS = 300      # ... up to 5 minutes, as send_message_task did
+_RELEASE_DELAY_SECONDS = 30   # claims handed back because the envelope store was down
+
+_UPDATE_FIELDS = ["status", "provider_msg_id", "sent_at", "scheduled_at",
+                  "error_code", "error_title", "updated_at"]
+
+_client = None
+
+
+class OutboxUnavailable(Exception):
+    """The envelope store could not be read or written; nothing was lost or failed."""
+
+
+def _redis():
+    """Shared client, or None when envelopes live in the Django cache."""
+    global _client
+    if not settings.WA_OUTBOX_REDIS_URL:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(settings.WA_OUTBOX_REDIS_URL, socket_timeout=2, socket_connect_timeout=1)
+    return _client
+
+
+def _key(idempotency_key) -> str:
+    return f"{_ENVELOPE_PREFIX}{idempotency_key}"
+
+
+def put_envelopes(envelopes: Dict[str, dict]) -> None:
+    """Store {idempotency_key: {"to": phone, "components": {...}}} for WA_OUTBOX_TTL seconds."""
+    if not envelopes:
+        return
+    ttl = settings.WA_OUTBOX_TTL
+    r = _redis()
+    if r is None:
+        cache.set_many({_key(idem): env for idem, env in envelopes.items()}, timeout=ttl)
+        return
+    try:
+        p = r.pipeline(transaction=False)
+        for idem, env in envelopes.items():
+            p.set(_key(idem), json.dumps(env), ex=ttl)
+        p.execute()
+    except redis.RedisError as exc:
+        raise OutboxUnavailable(f"WhatsApp outbox: could not store envelopes ({exc})") from exc
+
+
+def get_envelopes(idempotency_keys: Iterable[str]) -> Dict[str, dict]:
+    """Envelopes found for the keys; a key missing from the result is definitively gone."""
+    keys = [str(k) for k in idempotency_keys]
+    if not keys:
+        return {}
+    r = _redis()
+    if r is None:
+        cached = cache.get_many([_key(k) for k in keys])
+        return {k: cached[_key(k)] for k in keys if _key(k) in cached}
+    try:
+        raw = r.mget([_key(k) for k in keys])
+    except redis.RedisError as exc:
+        raise OutboxUnavailable(f"WhatsApp outbox: could not read envelopes ({exc})") from exc
+    return {idem: json.loads(value) for idem, value in zip(keys, raw) if value}
+
+
+def drop_envelopes(idempotency_keys: Iterable[str]) -> None:
+    """Best effort: anything left behind expires after WA_OUTBOX_TTL."""
+    keys = [_key(k) for k in idempotency_keys]
+    if not keys:
+        return
+    r = _redis()
+    if r is None:
+        cache.delete_many(keys)
+        return
+    try:
+        r.delete(*keys)
+    except redis.RedisError as exc:
+        logger.warning("WhatsApp outbox: could not drop %s envelopes (%s); they will expire", len(keys), exc)
+
+
+def enqueue(log: MessageLog, phone: str, components: dict) -> MessageLog:
+    """Hand a freshly created QUEUED MessageLog to the dispatcher; it is sent after commit."""
+    put_envelopes({str(log.idempotency_key): {"to": phone, "components": components or {}}})
+    if log.scheduled_at is None:
+        log.scheduled_at = timezone.now()
+        MessageLog.objects.filter(pk=log.pk).update(scheduled_at=log.scheduled_at)
+    transaction.on_commit(_schedule_dispatch)
+    return log
+
+
+def _schedule_dispatch() -> None:
+    """At most one queued dispatch per WA_DISPATCH_DELAY; the beat dispatch covers lost ones."""
+    from .tasks import dispatch_outbox
+
+    delay = settings.WA_DISPATCH_DELAY
+    if not cache.add(_SCHEDULED_KEY, 1, timeout=delay):
+        return
+    try:
+        dispatch_outbox.apply_async(countdown=delay)
+    except Exception:
+        cache.delete(_SCHEDULED_KEY)
+        logger.exception("WhatsApp outbox: could not schedule a dispatch; the periodic one will pick it up")
+
+
+def _job(msg: MessageLog, envelope: dict) -> SendJob:
+    return (
+        envelope["to"],
+        TEMPLATE_NAME.get(msg.template_code, msg.template_code),
+        to_provider_lang(msg.language),
+        envelope.get("components") or {},
+    )
+
+
+def _send_one(prov, job: SendJob) -> SendResult:
+    try:
+        return prov.send_template(*job), None
+    except Exception as exc:   # recorded on the row; one bad send must not sink the batch
+        return None, exc
+
+
+def send_all(prov, jobs: List[SendJob], concurrency: int) -> List[SendResult]:
+    """Send every job, at most `concurrency` in flight; results in job order."""
+    if not jobs:
+        return []
+    workers = max(1, min(concurrency, len(jobs)))
+    if workers == 1:
+        return [_send_one(prov, job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wa-dispatch") as pool:
+        return list(pool.map(lambda job: _send_one(prov, job), jobs))
+
+
+def _send(jobs: List[SendJob]) -> List[SendResult]:
+    if settings.WA_DISPATCH_SENDER == "asyncio":
+        # limits are already applied: global reserved by the caller, per-phone when queued
+        return run_sends(jobs, concurrency=settings.WA_ASYNC_CONCURRENCY, reserve_global=None, check_phone=None)
+    return send_all(_provider(), jobs, settings.WA_DISPATCH_CONCURRENCY)
+
+
+def _error_code(exc: BaseException) -> str:
+    # requests.HTTPError carries .response.status_code, aiohttp.ClientResponseError .status
+    status = getattr(getattr(exc, "response", None), "status_code", None) or getattr(exc, "status", None)
+    return str(status) if status else type(exc).__name__
+
+
+def _record(msg: MessageLog, result: SendResult, now) -> str:
+    """Apply one send outcome to a claimed `msg`; returns the counter it falls under."""
+    sent, exc = result
+    msg.updated_at = now
+    if exc is None:
+        provider_msg_id, provider_status = sent
+        msg.provider_msg_id = provider_msg_id or ""
+        msg.sent_at = now
+        msg.error_code = msg.error_title = ""
+        if str(provider_status).lower() == "sent":
+            msg.status = MessageLog.Status.SENT
+        else:
+            msg.status = MessageLog.Status.QUEUED
+            msg.scheduled_at = None   # accepted by the provider; the webhook moves it on
+        return "sent"
+    msg.error_code = _error_code(exc)[:64]
+    msg.error_title = str(exc)[:255]
+    if msg.send_attempts >= settings.WA_DISPATCH_MAX_ATTEMPTS:
+        msg.status = MessageLog.Status.FAILED
+        return "failed"
+    msg.status = MessageLog.Status.QUEUED
+    msg.scheduled_at = now + timedelta(seconds=min(_RETRY_MAX_SECONDS, msg.send_attempts * _RETRY_STEP_SECONDS))
+    return "retry"
+
+
+def claim_batch(limit: int, ids: Optional[Iterable[int]] = None) -> List[MessageLog]:
+    """
+    Lease up to `limit` due QUEUED rows, plus SENDING rows whose lease ran out,
+    to this worker: status SENDING, send_attempts + 1, scheduled_at = lease end.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        qs = MessageLog.objects.select_for_update(skip_locked=True).filter(
+            status__in=[MessageLog.Status.QUEUED, MessageLog.Status.SENDING], scheduled_at__lte=now
+        )
+        if ids is not None:
+            qs = qs.filter(id__in=list(ids))
+        batch = list(qs.order_by("scheduled_at", "id")[:limit])
+        if not batch:
+            return []
+        lease_until = now + timedelta(seconds=settings.WA_DISPATCH_LEASE)
+        MessageLog.objects.filter(id__in=[m.id for m in batch]).update(
+            status=MessageLog.Status.SENDING, scheduled_at=lease_until,
+            send_attempts=F("send_attempts") + 1, updated_at=now,
+        )
+    for msg in batch:
+        msg.status, msg.scheduled_at, msg.updated_at = MessageLog.Status.SENDING, lease_until, now
+        msg.send_attempts += 1
+    return batch
+
+
+def release(batch: List[MessageLog], *, delay: int = 0) -> None:
+    """Hand claimed rows back unsent: QUEUED again, the claim's attempt not counted."""
+    if batch:
+        MessageLog.objects.filter(id__in=[m.id for m in batch], status=MessageLog.Status.SENDING).update(
+            status=MessageLog.Status.QUEUED, scheduled_at=timezone.now() + timedelta(seconds=delay),
+            send_attempts=F("send_attempts") - 1, updated_at=timezone.now(),
+        )
+
+
+def dispatch_batch(limit: Optional[int] = None, *, ids: Optional[Iterable[int]] = None) -> Counter:
+    """
+    Claim and send one batch of due messages.
+    Returns counts of sent / retry / failed / deferred (over the rate limit or
+    envelope store down) rows.
+    """
+    counts: Counter = Counter()
+    batch = claim_batch(limit or settings.WA_DISPATCH_BATCH, ids)
+    if not batch:
+        return counts
+
+    now = timezone.now()
+    changed: List[MessageLog] = []
+    jobs: List[Tuple[MessageLog, dict]] = []
+    try:
+        envelopes = get_envelopes(m.idempotency_key for m in batch)
+        for msg in batch:
+            env = envelopes.get(str(msg.idempotency_key))
+            if msg.send_attempts > settings.WA_DISPATCH_MAX_ATTEMPTS:
+                # only reachable through expired leases: the last claim died mid-send
+                msg.error_code, msg.error_title = "LEASE_EXPIRED", "Dispatcher stopped before recording the send"
+            elif not (env and env.get("to")):
+                msg.error_code, msg.error_title = "NO_RECIPIENT", "Recipient envelope missing or expired"
+            else:
+                jobs.append((msg, env))
+                continue
+            msg.status = MessageLog.Status.FAILED
+            msg.updated_at = now
+            changed.append(msg)
+            counts["failed"] += 1
+
+        granted = take_global_per_min(len(jobs))
+    except Exception as exc:
+        release(batch, delay=_RELEASE_DELAY_SECONDS)
+        if isinstance(exc, OutboxUnavailable):
+            logger.warning("%s; %s messages left queued", exc, len(batch))
+            counts["deferred"] = len(batch)
+            return counts
+        raise
+    counts["deferred"] = len(jobs) - granted
+    release([msg for msg, _ in jobs[granted:]])
+    jobs = jobs[:granted]
+
+    results = _send([_job(msg, env) for msg, env in jobs])
+    for (msg, _), result in zip(jobs, results):
+        outcome = _record(msg, result, now)
+        counts[outcome] += 1
+        changed.append(msg)
+
+    MessageLog.objects.bulk_update(changed, _UPDATE_FIELDS, batch_size=500)
+    drop_envelopes(str(m.idempotency_key) for m in changed if m.status != MessageLog.Status.QUEUED
+                   or m.scheduled_at is None)
+    if counts["failed"] or counts["retry"]:
+        logger.warning("WhatsApp dispatch: %s", dict(counts))
+    return counts
+
+
+def dispatch_due(max_batches: int = 50) -> Counter:
+    """Dispatch batches until nothing is due or the rate limit stops progress."""
+    total: Counter = Counter()
+    for _ in range(max_batches):
+        counts = dispatch_batch()
+        total.update(counts)
+        if sum(counts.values()) == 0 or counts["deferred"]:
+            break
+    return total
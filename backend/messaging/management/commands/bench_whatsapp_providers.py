@@ -0,0 +1,77 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+from django.core.management.base import BaseCommand
+
+from messaging.async_sender import send_concurrently
+from messaging.providers.aisensy import AiSensyProvider, AsyncAiSensyProvider
+from messaging.providers.meta_cloud import AsyncMetaCloudProvider, MetaCloudProvider
+from messaging.stub_server import StubProviderServer
+
+PROVIDERS = {"meta": MetaCloudProvider, "aisensy": AiSensyProvider}
+ASYNC_PROVIDERS = {"meta": AsyncMetaCloudProvider, "aisensy": AsyncAiSensyProvider}
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput of WhatsApp provider sends against a local stub server: a new HTTP "
+        "connection per message (before), one pooled keep-alive session per provider (after) "
+        "and the asyncio sender (async)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--provider", choices=sorted(PROVIDERS), default="meta")
+        parser.add_argument("--messages", type=int, default=500)
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent senders (like worker concurrency)")
+        parser.add_argument("--latency-ms", type=float, default=5.0, help="Stub server think time per request")
+        parser.add_argument("--async-concurrency", type=int, default=200, help="In-flight sends for the asyncio sender")
+
+    def handle(self, *args, **opts):
+        cls = PROVIDERS[opts["provider"]]
+        n, threads = max(1, opts["messages"]), max(1, opts["threads"])
+        with StubProviderServer(latency=opts["latency_ms"] / 1000.0) as server:
+            env = {
+                "WA_GRAPH_BASE_URL": server.url, "WA_PHONE_NUMBER_ID": "bench", "WA_ACCESS_TOKEN": "bench",
+                "AISENSY_BASE_URL": server.url, "AISENSY_API_KEY": "bench",
+            }
+            with mock.patch.dict(os.environ, env):
+                def before(i):
+                    # what every send used to do: requests.post() on a throwaway session
+                    with requests.Session() as s:
+                        cls(session=s).send_template(f"+9190000{i:05d}", "bench", "en", {"body": ["bench"]})
+
+                shared = cls()
+
+                def after(i):
+                    shared.send_template(f"+9190000{i:05d}", "bench", "en", {"body": ["bench"]})
+
+                def threaded(fn):
+                    with ThreadPoolExecutor(max_workers=threads) as pool:
+                        list(pool.map(fn, range(n)))
+
+                async def fan_out():
+                    jobs = [(f"+9190000{i:05d}", "bench", "en", {"body": ["bench"]}) for i in range(n)]
+                    async with ASYNC_PROVIDERS[opts["provider"]]() as prov:
+                        await send_concurrently(prov, jobs, concurrency=opts["async_concurrency"],
+                                                reserve_global=None, check_phone=None)
+
+                runs = (
+                    ("before", lambda: threaded(before)),
+                    ("after", lambda: threaded(after)),
+                    ("async", lambda: asyncio.run(fan_out())),
+                )
+                for label, run in runs:
+                    server.connections = server.requests = server.max_in_flight = 0
+                    started = time.monotonic()
+                    run()
+                    elapsed = max(time.monotonic() - started, 1e-6)
+                    self.stdout.write(
+                        f"{label:>6}: {n} msgs in {elapsed:.2f}s = {n / elapsed:.1f} msgs/s "
+                        f"({server.connections} TCP connections, {server.requests} requests, "
+                        f"{server.max_in_flight} in flight at peak)"
+                    )
+                shared.close()
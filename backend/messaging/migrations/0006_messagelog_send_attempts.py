@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-16 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0005_messagelog_pid_alter_messagelog_payload_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagelog',
+            name='send_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -13,6 +13,7 @@ class MessageLog(models.Model):
 
     class Status(models.TextChoices):
         QUEUED = "QUEUED", "Queued"
+        SENDING = "SENDING", "Sending"     # claimed by messaging.dispatch until scheduled_at
         SENT = "SENT", "Sent"
         DELIVERED = "DELIVERED", "Delivered"
         READ = "READ", "Read"
@@ -36,6 +37,7 @@ class MessageLog(models.Model):
     sent_at = models.DateTimeField(null=True, blank=True)
     error_code = models.CharField(max_length=64, blank=True)
     error_title = models.CharField(max_length=255, blank=True)
+    send_attempts = models.PositiveSmallIntegerField(default=0)   # provider attempts made by messaging.dispatch
 
     # linkage to operational event
     related_screening = models.ForeignKey("screening.Screening", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
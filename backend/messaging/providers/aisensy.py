@@ -1,14 +1,12 @@
 # messaging/providers/aisensy.py
-import os, requests
-from .base import WhatsAppProvider
+import os
+from .base import AsyncWhatsAppProvider, WhatsAppProvider
+from .http import apost, build_async_session, build_session, http_timeout
 
-class AiSensyProvider(WhatsAppProvider):
-    """
-    Thin wrapper over AiSensy Campaign API v2.
-    Uses API Campaigns you've set live (one per language), e.g.
-    nutrilift_redflag_edu_v1_en / _hi
-    """
-    def __init__(self):
+class _AiSensyCampaign:
+    """Configuration and wire format shared by the sync and async clients."""
+
+    def _configure(self):
         self.api_key = os.getenv("AISENSY_API_KEY")
         self.base_url = os.getenv("AISENSY_BASE_URL", "https://backend.aisensy.com/campaign/t1/api/v2")
         self.source = os.getenv("AISENSY_SOURCE", "backend")
@@ -16,7 +14,7 @@ class AiSensyProvider(WhatsAppProvider):
         if not self.api_key:
             raise RuntimeError("Missing AISENSY_API_KEY")
 
-    def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
+    def _payload(self, to_phone_e164: str, template_name: str, language_code: str, components: dict) -> dict:
         """
         components contract (from your existing service layer):
           - components["body"]    : list of strings -> ordered {{1}}, {{2}}, ... for the Body
@@ -48,17 +46,49 @@ class AiSensyProvider(WhatsAppProvider):
         attrs = components.get("attributes") or {}
         if attrs:
             payload["attributes"] = {str(k): str(v) for k, v in attrs.items()}
+        return payload
 
-        r = requests.post(self.base_url, json=payload, timeout=20)
-        # If AiSensy returns non-2xx, raise; Celery will retry if used
-        r.raise_for_status()
-
+    @staticmethod
+    def _result(data: dict):
         # Response may be {"status":"success","message":"queued"} or similar; an ID isn't guaranteed
+        provider_status = str(data.get("status", "sent")).lower()  # treat success as "sent"
+        # We don't get a WhatsApp message-id here; persist an empty id.
+        return ("", "sent" if provider_status in ("success", "sent") else provider_status)
+
+class AiSensyProvider(_AiSensyCampaign, WhatsAppProvider):
+    """
+    Thin wrapper over AiSensy Campaign API v2.
+    Uses API Campaigns you've set live (one per language), e.g.
+    nutrilift_redflag_edu_v1_en / _hi
+    """
+    def __init__(self, session=None):
+        self._configure()
+        self.session = session or build_session()
+        self.timeout = http_timeout()
+
+    def close(self):
+        self.session.close()
+
+    def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
+        payload = self._payload(to_phone_e164, template_name, language_code, components)
+        r = self.session.post(self.base_url, json=payload, timeout=self.timeout)
+        # If AiSensy returns non-2xx, raise; the dispatcher records it and retries
+        r.raise_for_status()
         try:
             data = r.json()
         except ValueError:
             data = {}
+        return self._result(data)
 
-        provider_status = str(data.get("status", "sent")).lower()  # treat success as "sent"
-        # We don't get a WhatsApp message-id here; persist an empty id.
-        return ("", "sent" if provider_status in ("success", "sent") else provider_status)
+class AsyncAiSensyProvider(_AiSensyCampaign, AsyncWhatsAppProvider):
+    """AiSensyProvider over one aiohttp session (see messaging.async_sender)."""
+    def __init__(self, session=None):
+        self._configure()
+        self.session = session or build_async_session()
+
+    async def aclose(self):
+        await self.session.close()
+
+    async def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
+        payload = self._payload(to_phone_e164, template_name, language_code, components)
+        return self._result(await apost(self.session, self.base_url, payload))
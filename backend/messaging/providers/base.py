@@ -9,3 +9,19 @@ class WhatsAppProvider(ABC):
         components is provider-specific; for Meta Cloud we pass {"body": [...], "buttons": [...]}
         """
         raise NotImplementedError
+
+class AsyncWhatsAppProvider(ABC):
+    """Same contract as WhatsAppProvider, awaited. Instances belong to one event loop."""
+
+    @abstractmethod
+    async def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: Dict) -> Tuple[str, str]:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,105 @@
+# messaging/providers/http.py
+"""
+Shared HTTP plumbing for the WhatsApp providers: one keep-alive
+requests.Session per provider with a sized connection pool, retry with
+exponential backoff on refused connections and 429/503 (honouring
+Retry-After) and (connect, read) timeouts. Tunable through environment
+variables, like the providers.
+"""
+import os
+from typing import Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Only statuses that say the send was not accepted: after a 500/502/504 the
+# template may already have gone out, and a retried POST would send it twice.
+RETRY_STATUSES = (429, 503)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def http_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout in seconds."""
+    return (_env_float("WA_HTTP_CONNECT_TIMEOUT", 3.05), _env_float("WA_HTTP_READ_TIMEOUT", 20))
+
+
+def build_session(pool_size: int = None, retries: int = None, backoff: float = None) -> requests.Session:
+    pool_size = pool_size or int(_env_float("WA_HTTP_POOL_SIZE", 10))
+    retries = int(_env_float("WA_HTTP_RETRIES", 3)) if retries is None else retries
+    backoff = _env_float("WA_HTTP_BACKOFF", 0.5) if backoff is None else backoff
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,                          # a POST that timed out reading may have been delivered
+        status=retries,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"POST"}),
+        backoff_factor=backoff,
+        respect_retry_after_header=True,
+        raise_on_status=False,           # hand the last response to raise_for_status()
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+
+# --- asyncio (aiohttp) counterparts, for messaging.async_sender ---
+
+def build_async_session(pool_size: int = None, headers: dict = None):
+    """aiohttp.ClientSession with one keep-alive pool; create it inside the event loop that uses it."""
+    import aiohttp
+
+    pool_size = pool_size or int(_env_float("WA_ASYNC_POOL_SIZE", 100))
+    connect, read = http_timeout()
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size),
+        timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
+        headers=headers,
+    )
+
+
+def _retry_after(response, default: float) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return default
+
+
+async def apost(session, url: str, json: dict, retries: int = None, backoff: float = None) -> dict:
+    """
+    POST and return the decoded JSON body ({} if there is none), with the same
+    policy as build_session(): retry refused connections and 429/503 with
+    exponential backoff (Retry-After wins), never a timed-out request.
+    Raises aiohttp.ClientResponseError for the final non-2xx response.
+    """
+    import asyncio
+    import aiohttp
+
+    retries = int(_env_float("WA_HTTP_RETRIES", 3)) if retries is None else retries
+    backoff = _env_float("WA_HTTP_BACKOFF", 0.5) if backoff is None else backoff
+    for attempt in range(retries + 1):
+        delay = backoff * (2 ** attempt)
+        try:
+            async with session.post(url, json=json) as r:
+                if r.status < 400:
+                    try:
+                        return await r.json(content_type=None) or {}
+                    except ValueError:
+                        return {}
+                if r.status not in RETRY_STATUSES or attempt >= retries:
+                    r.raise_for_status()
+                delay = _retry_after(r, delay)
+        except aiohttp.ClientConnectorError:
+            if attempt >= retries:
+                raise
+        await asyncio.sleep(delay)
@@ -1,21 +1,20 @@
-import os, requests
-from .base import WhatsAppProvider
+import os
+from .base import AsyncWhatsAppProvider, WhatsAppProvider
+from .http import apost, build_async_session, build_session, http_timeout
 
-class MetaCloudProvider(WhatsAppProvider):
-    """
-    Minimal wrapper for WhatsApp Cloud API (template sends).
-    Requires:
-      WA_PHONE_NUMBER_ID, WA_ACCESS_TOKEN
-    """
-    def __init__(self):
+class _MetaCloudTemplate:
+    """Configuration and wire format shared by the sync and async clients."""
+
+    def _configure(self):
         self.phone_number_id = os.getenv("WA_PHONE_NUMBER_ID")
         self.token = os.getenv("WA_ACCESS_TOKEN")
+        self.base_url = os.getenv("WA_GRAPH_BASE_URL", "https://graph.facebook.com/v20.0").rstrip("/")
         if not self.phone_number_id or not self.token:
             raise RuntimeError("Meta Cloud Provider missing WA_PHONE_NUMBER_ID/WA_ACCESS_TOKEN")
+        self.url = f"{self.base_url}/{self.phone_number_id}/messages"
+        self.headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
 
-    def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
-        url = f"https://graph.facebook.com/v20.0/{self.phone_number_id}/messages"
-        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
+    def _payload(self, to_phone_e164: str, template_name: str, language_code: str, components: dict) -> dict:
         payload = {
             "messaging_product": "whatsapp",
             "to": to_phone_e164,
@@ -40,9 +39,45 @@ class MetaCloudProvider(WhatsAppProvider):
                 "type": "button", "sub_type": "url", "index": idx,
                 "parameters": [{"type":"text","text": url_text}]
             })
-        r = requests.post(url, json=payload, headers=headers, timeout=20)
-        r.raise_for_status()
-        data = r.json()
+        return payload
+
+    @staticmethod
+    def _result(data: dict):
         # Return first message id if present
         msg_id = (data.get("messages") or [{}])[0].get("id","")
         return (msg_id or "", "sent")
+
+class MetaCloudProvider(_MetaCloudTemplate, WhatsAppProvider):
+    """
+    Minimal wrapper for WhatsApp Cloud API (template sends).
+    Requires:
+      WA_PHONE_NUMBER_ID, WA_ACCESS_TOKEN
+    Sends go through one pooled keep-alive session (see providers.http).
+    """
+    def __init__(self, session=None):
+        self._configure()
+        self.session = session or build_session()
+        self.session.headers.update(self.headers)
+        self.timeout = http_timeout()
+
+    def close(self):
+        self.session.close()
+
+    def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
+        payload = self._payload(to_phone_e164, template_name, language_code, components)
+        r = self.session.post(self.url, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        return self._result(r.json())
+
+class AsyncMetaCloudProvider(_MetaCloudTemplate, AsyncWhatsAppProvider):
+    """MetaCloudProvider over one aiohttp session (see messaging.async_sender)."""
+    def __init__(self, session=None):
+        self._configure()
+        self.session = session or build_async_session(headers=self.headers)
+
+    async def aclose(self):
+        await self.session.close()
+
+    async def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
+        payload = self._payload(to_phone_e164, template_name, language_code, components)
+        return self._result(await apost(self.session, self.url, payload))
@@ -1,7 +1,16 @@
+import asyncio
 import uuid
-from .base import WhatsAppProvider
+from .base import AsyncWhatsAppProvider, WhatsAppProvider
 
 class MockProvider(WhatsAppProvider):
     def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
         # pretend it's sent and immediately 'SENT'
         return (f"mock-{uuid.uuid4()}", "sent")
+
+class AsyncMockProvider(AsyncWhatsAppProvider):
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency   # simulated network time per send
+
+    async def send_template(self, to_phone_e164: str, template_name: str, language_code: str, components: dict):
+        await asyncio.sleep(self.latency)
+        return (f"mock-{uuid.uuid4()}", "sent")
@@ -0,0 +1,69 @@
+# messaging/providers/registry.py
+"""
+Process-wide WhatsApp provider registry.
+
+get_provider() builds each provider (and its pooled Session) once per process
+and hands the same object to every send. Instances are keyed by pid as well,
+so a Celery prefork child never reuses sockets opened by its parent.
+Async providers are tied to one event loop, so build_async_provider() makes a
+fresh one per loop instead of caching it.
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from .base import AsyncWhatsAppProvider, WhatsAppProvider
+
+_lock = threading.Lock()
+_providers: Dict[Tuple[int, str], WhatsAppProvider] = {}
+
+
+def provider_name() -> str:
+    return (os.getenv("WHATSAPP_PROVIDER") or "mock").lower()
+
+
+def _build(name: str) -> WhatsAppProvider:
+    if name == "meta":
+        from .meta_cloud import MetaCloudProvider
+        return MetaCloudProvider()
+    elif name == "aisensy":
+        from .aisensy import AiSensyProvider
+        return AiSensyProvider()
+    else:
+        from .mock import MockProvider
+        return MockProvider()
+
+
+def build_async_provider(name: Optional[str] = None) -> AsyncWhatsAppProvider:
+    """New async provider; build it inside the event loop that uses it, as `async with`."""
+    name = name or provider_name()
+    if name == "meta":
+        from .meta_cloud import AsyncMetaCloudProvider
+        return AsyncMetaCloudProvider()
+    elif name == "aisensy":
+        from .aisensy import AsyncAiSensyProvider
+        return AsyncAiSensyProvider()
+    else:
+        from .mock import AsyncMockProvider
+        return AsyncMockProvider()
+
+
+def get_provider(name: Optional[str] = None) -> WhatsAppProvider:
+    key = (os.getpid(), name or provider_name())
+    prov = _providers.get(key)
+    if prov is None:
+        with _lock:
+            prov = _providers.get(key)
+            if prov is None:
+                prov = _providers[key] = _build(key[1])
+    return prov
+
+
+def reset_providers() -> None:
+    """Drop cached providers (after credential/env changes, and in tests)."""
+    with _lock:
+        for prov in _providers.values():
+            close = getattr(prov, "close", None)
+            if close:
+                close()
+        _providers.clear()
@@ -28,3 +28,18 @@ def check_per_phone_daily(phone: str, template: str):
     cap = int(os.getenv("WA_RATE_PER_PHONE_PER_DAY", "2"))
     key = f"rl:wa:{template}:{phone}:1d"
     _bucket(key, 24*3600, cap)
+
+def take_global_per_min(n: int) -> int:
+    """Reserve up to n sends from the global per-minute budget; returns how many were granted."""
+    if n <= 0:
+        return 0
+    cap = int(os.getenv("WA_RATE_GLOBAL_PER_MIN", "90"))
+    key = "rl:wa:global:1m"
+    p = _r.pipeline()
+    p.incrby(key, n)
+    p.expire(key, 60)
+    count, _ = p.execute()
+    over = min(n, max(0, int(count) - cap))
+    if over:
+        _r.decrby(key, over)   # hand back what we could not use
+    return n - over
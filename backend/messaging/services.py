@@ -11,18 +11,10 @@ import hashlib
 from django.db import transaction
 from .ratelimit import check_global_per_min, check_per_phone_daily, RateLimitExceeded
 import uuid
-# provider picker
+# provider picker (one shared instance per process, see providers.registry)
 def _provider():
-    prov = (os.getenv("WHATSAPP_PROVIDER") or "mock").lower()
-    if prov == "meta":
-        from .providers.meta_cloud import MetaCloudProvider
-        return MetaCloudProvider()
-    elif prov == "aisensy":
-        from .providers.aisensy import AiSensyProvider
-        return AiSensyProvider()
-    else:
-        from .providers.mock import MockProvider
-        return MockProvider()
+    from .providers.registry import get_provider
+    return get_provider()
 
 # Map our internal codes to WABA template names
 TEMPLATE_NAME = {
@@ -179,24 +171,22 @@ def send_redflag_education(screening: Screening, *, to_phone_e164: Optional[str]
     if existing:
         return existing
 
-    check_global_per_min()
     check_per_phone_daily(phone, "RED_EDU_V1")
 
     log = MessageLog.objects.create(
         organization=org,
-        to_phone_e164=phone,
         template_code="RED_EDU_V1",
         language=lang,
-        payload={"screening_id": screening.id, "flags": screening.red_flags, "video": video, "_components": components},
         related_screening=screening,
         idempotency_key=idem,
         status=MessageLog.Status.QUEUED,
+        scheduled_at=timezone.now(),
     )
-    from .tasks import send_message_task
-    send_message_task.delay(log.id)
-    return log
+    from .dispatch import enqueue
+    return enqueue(log, phone, components)
 
 
+@transaction.atomic
 def send_redflag_assistance(screening: Screening, *, to_phone_e164: Optional[str] = None) -> MessageLog:
     org: Organization = screening.organization
     guardian, phone = _guardian_and_phone(screening, to_phone_e164=to_phone_e164)
@@ -220,30 +210,24 @@ def send_redflag_assistance(screening: Screening, *, to_phone_e164: Optional[str
 
     log = MessageLog.objects.create(
         organization=org,
-        to_phone_e164=phone,
         template_code="RED_ASSIST_V1",
         language=lang,
-        payload={"screening_id": screening.id, "flags": screening.red_flags, "video": video, "apply_url": apply_url},
         related_screening=screening,
         status=MessageLog.Status.QUEUED,
+        scheduled_at=timezone.now(),
     )
-
-    prov = _provider()
-    msg_id, pstatus = prov.send_template(phone, TEMPLATE_NAME["RED_ASSIST_V1"], LANG_CODE[lang], components)
-    log.provider_msg_id = msg_id
-    log.status = MessageLog.Status.SENT if str(pstatus).lower() == "sent" else MessageLog.Status.QUEUED
-    log.sent_at = timezone.now()
-    log.save(update_fields=["provider_msg_id", "status", "sent_at", "updated_at"])
-    return log
+    from .dispatch import enqueue
+    return enqueue(log, phone, components)
 
 # add to TEMPLATE_NAME mapping 
 TEMPLATE_NAME.update({
     "COMPLIANCE_REMINDER_V1": "nutrilift_compliance_reminder_v1",  # name in your WABA
 }) 
 
+@transaction.atomic
 def send_compliance_reminder(supply) -> MessageLog:
     """
-    Sends a WhatsApp reminder to complete Day-27 compliance.
+    Queues a WhatsApp reminder to complete Day-27 compliance (sent by messaging.dispatch).
     """
     from django.urls import reverse
     from django.conf import settings
@@ -269,21 +253,14 @@ def send_compliance_reminder(supply) -> MessageLog:
 
     log = MessageLog.objects.create(
         organization=org,
-        to_phone_e164=phone,
         template_code="COMPLIANCE_REMINDER_V1",
         language=lang,
-        payload={"supply_id": supply.id, "student": student.full_name, "link": link},
         related_supply=supply,
         status=MessageLog.Status.QUEUED,
+        scheduled_at=timezone.now(),
     )
-
-    prov = _provider()
-    msg_id, pstatus = prov.send_template(phone, TEMPLATE_NAME["COMPLIANCE_REMINDER_V1"], LANG_CODE[lang], components)
-    log.provider_msg_id = msg_id
-    log.status = MessageLog.Status.SENT if pstatus.lower() == "sent" else MessageLog.Status.QUEUED
-    log.sent_at = timezone.now()
-    log.save(update_fields=["provider_msg_id","status","sent_at","updated_at"])
-    return log
+    from .dispatch import enqueue
+    return enqueue(log, phone, components)
 
 def prepare_screening_status_click_to_chat(screening: Screening, *, to_phone_e164: str):
     """
@@ -0,0 +1,90 @@
+"""
+Local stand-in for the WhatsApp provider APIs, for benchmarks and tests.
+
+Speaks HTTP/1.1 keep-alive, answers every POST with a Meta-shaped body after
+`latency` seconds, and counts TCP connections, requests and the peak number of
+requests in flight so callers can see whether sockets are being reused and how
+much concurrency a sender achieves. `script` is a list of status codes served
+(in order) before falling back to 200, e.g. [429, 503] to exercise retries.
+"""
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True   # headers and body go out as separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        srv = self.server
+        with srv.lock:
+            srv.requests += 1
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+            status = srv.script.pop(0) if srv.script else 200
+        if srv.latency:
+            threading.Event().wait(srv.latency)
+        with srv.lock:
+            srv.in_flight -= 1
+        if status == 200:
+            body = {"messages": [{"id": f"wamid.{uuid.uuid4().hex}", "message_status": "accepted"}],
+                    "status": "accepted", "messageId": uuid.uuid4().hex}
+        else:
+            body = {"error": {"code": status}}
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512   # asyncio senders open hundreds of connections at once
+
+    def __init__(self, latency: float = 0.0, script=None, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.script = list(script or [])
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubProviderServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
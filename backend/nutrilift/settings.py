@@ -186,12 +186,77 @@ CELERY_BEAT_SCHEDULE.update({
         "task": "reporting.tasks.build_daily_rollups",
         "schedule": crontab(hour=1, minute=30),  # 01:30 every day
     },
+    "reporting-drain-rollup-queue-1m": {
+        "task": "reporting.tasks.drain_rollup_queue",
+        "schedule": crontab(minute="*/1"),
+    },
+    "reporting-reconcile-rollups-6h": {
+        "task": "reporting.tasks.reconcile_recent_rollups",
+        "schedule": crontab(hour="*/6", minute=20),
+    },
     "reporting-send-due-reports-daily": {
         "task": "reporting.tasks.send_due_school_reports",
         "schedule": crontab(hour=3, minute=5),   # 03:05 every day
     },
+    "reporting-purge-expired-exports-daily": {
+        "task": "reporting.tasks.purge_expired_exports",
+        "schedule": crontab(hour=3, minute=45),
+    },
+    "messaging-dispatch-outbox-1m": {
+        "task": "messaging.tasks.dispatch_outbox",
+        "schedule": crontab(minute="*/1"),
+    },
+    "screening-only-refresh-coverage-nightly": {
+        "task": "screening_only.tasks.refresh_screening_coverage",
+        "schedule": crontab(hour=1, minute=50),
+    },
 })
 
+# --- Daily rollups (reporting.signals) ---
+# "incremental": signals apply +/- counter deltas; "rebuild": queue touched days for a full re-count.
+REPORTING_ROLLUP_MODE = os.getenv("REPORTING_ROLLUP_MODE", "incremental")
+ROLLUP_RECONCILE_DAYS = int(os.getenv("ROLLUP_RECONCILE_DAYS", "2"))   # days rebuilt by reconcile_recent_rollups
+# Dirty (org, day) set for queued rebuilds (reporting.rollup_queue); empty = database table only.
+ROLLUP_QUEUE_REDIS_URL = os.getenv("ROLLUP_QUEUE_REDIS_URL", CELERY_BROKER_URL)
+ROLLUP_DRAIN_DELAY = int(os.getenv("ROLLUP_DRAIN_DELAY", "10"))       # seconds to coalesce marks before draining
+ROLLUP_DRAIN_BATCH = int(os.getenv("ROLLUP_DRAIN_BATCH", "500"))      # pairs popped per round
+
+# --- WhatsApp dispatch (messaging.dispatch) ---
+# Recipient phone + template components of queued sends live here for WA_OUTBOX_TTL seconds,
+# never in the database; empty = the Django cache, which must then be shared (CACHE_REDIS_URL).
+WA_OUTBOX_REDIS_URL = os.getenv("WA_OUTBOX_REDIS_URL", CELERY_BROKER_URL)
+WA_OUTBOX_TTL = int(os.getenv("WA_OUTBOX_TTL", str(2 * 24 * 3600)))
+WA_DISPATCH_BATCH = int(os.getenv("WA_DISPATCH_BATCH", "100"))              # rows claimed per batch
+WA_DISPATCH_CONCURRENCY = int(os.getenv("WA_DISPATCH_CONCURRENCY", "8"))    # sends in flight; keep <= WA_HTTP_POOL_SIZE
+WA_DISPATCH_MAX_ATTEMPTS = int(os.getenv("WA_DISPATCH_MAX_ATTEMPTS", "5"))  # then FAILED
+WA_DISPATCH_DELAY = int(os.getenv("WA_DISPATCH_DELAY", "2"))                # seconds to coalesce enqueues before dispatching
+WA_DISPATCH_LEASE = int(os.getenv("WA_DISPATCH_LEASE", "600"))              # seconds a claimed batch may take before it is re-claimed
+# "threads": WA_DISPATCH_CONCURRENCY sends on a thread pool; "asyncio": WA_ASYNC_CONCURRENCY sends
+# on one event loop (messaging.async_sender) - raise WA_DISPATCH_BATCH to match.
+WA_DISPATCH_SENDER = os.getenv("WA_DISPATCH_SENDER", "threads")
+WA_ASYNC_CONCURRENCY = int(os.getenv("WA_ASYNC_CONCURRENCY", "200"))
+
+# --- Cache ---
+# Shared Redis cache in production (set CACHE_REDIS_URL); per-process locmem otherwise.
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+if CACHE_REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}}
+# Reporting dashboards/CSVs are cached per org until its rollups change (reporting.view_cache);
+# the timeout only bounds data that does not come from the rollups (e.g. flag prevalence).
+REPORTING_CACHE_TIMEOUT = int(os.getenv("REPORTING_CACHE_TIMEOUT", "3600"))
+# locmem is per process, so Celery's version bumps never reach the web workers: no view caching
+# on it unless this is set (tests, single-process dev).
+REPORTING_CACHE_ALLOW_LOCAL = os.getenv("REPORTING_CACHE_ALLOW_LOCAL", "0") == "1"
+
+# --- Background exports (reporting.exports) ---
+# Any Django storage class; FileSystemStorage subclasses are rooted at EXPORT_ROOT.
+EXPORT_STORAGE_BACKEND = os.getenv("EXPORT_STORAGE_BACKEND", "django.core.files.storage.FileSystemStorage")
+EXPORT_ROOT = os.getenv("EXPORT_ROOT", str(BASE_DIR / "exports"))
+EXPORT_LINK_MAX_AGE = int(os.getenv("EXPORT_LINK_MAX_AGE", str(24 * 3600)))   # signed download link lifetime (s)
+EXPORT_REUSE_SECONDS = int(os.getenv("EXPORT_REUSE_SECONDS", "3600"))         # serve an identical finished export for this long
+EXPORT_STALE_SECONDS = int(os.getenv("EXPORT_STALE_SECONDS", "3600"))         # queued/running jobs older than this are not reused
+EXPORT_RETENTION_DAYS = int(os.getenv("EXPORT_RETENTION_DAYS", "7"))
+
 # PHASE 11
 CELERY_BEAT_SCHEDULE.update({
     "ops-beat-heartbeat-every-1m": {
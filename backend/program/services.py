@@ -47,6 +47,27 @@ def compute_overdue_milestones(today: date | None = None) -> int:
     return n
 
 @transaction.atomic
+def complete_milestones_for_screenings(org: Organization, screenings) -> None:
+    """
+    For each new screening, complete the student's DUE/OVERDUE milestones (ACTIVE
+    enrollments) due on or before the screening day, then re-evaluate enforcement.
+    Takes many screenings so batch sync does one milestone query instead of one per row.
+    """
+    screenings = sorted(screenings, key=lambda s: s.screened_at)
+    by_student = {}
+    for m in ScreeningMilestone.objects.filter(
+        enrollment__organization=org,
+        enrollment__status=Enrollment.Status.ACTIVE,
+        enrollment__student_id__in={s.student_id for s in screenings},
+        status__in=[ScreeningMilestone.Status.DUE, ScreeningMilestone.Status.OVERDUE],
+    ).select_related("enrollment"):
+        by_student.setdefault(m.enrollment.student_id, []).append(m)
+    for s in screenings:
+        for m in by_student.get(s.student_id, []):
+            if m.due_on <= s.screened_at.date():
+                m.mark_completed(s)
+    evaluate_org_enforcement(org)
+
 def evaluate_org_enforcement(org: Organization) -> None:
     """
     Suspend org if it has any OVERDUE milestones on ACTIVE enrollments.
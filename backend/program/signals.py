@@ -3,8 +3,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from screening.models import Screening
-from .models import Enrollment, ScreeningMilestone
-from .services import evaluate_org_enforcement
+from .services import complete_milestones_for_screenings
 from .models import MonthlySupply, ComplianceSubmission
 
 @receiver(post_save, sender=MonthlySupply)
@@ -20,16 +19,7 @@ def ensure_compliance_row(sender, instance: MonthlySupply, created, **kwargs):
 def _complete_milestone_on_screening(sender, instance: Screening, created, **kwargs):
     if not created:
         return
-    student = instance.student
-    org = instance.organization
     # For the student's ACTIVE enrollments, complete any due/overdue milestones whose due_on has passed.
     # NOTE: without this, an OVERDUE milestone can never be completed and a school will remain suspended.
-    enrollments = Enrollment.objects.filter(student=student, organization=org, status=Enrollment.Status.ACTIVE)
-    for e in enrollments:
-        for m in e.milestones.filter(
-            status__in=[ScreeningMilestone.Status.DUE, ScreeningMilestone.Status.OVERDUE],
-            due_on__lte=instance.screened_at.date(),
-        ):
-            m.mark_completed(instance)
-    # Re-evaluate enforcement (may unsuspend)
-    evaluate_org_enforcement(org)
\ No newline at end of file
+    # Also re-evaluates enforcement (may unsuspend).
+    complete_milestones_for_screenings(instance.organization, [instance])
@@ -12,6 +12,7 @@ from accounts.decorators import require_roles
 from accounts.models import Role
 from django.db.models import Count, Q
 from .models import ScreeningMilestone, Enrollment
+from screening.growth import trajectories_for_pids
 
 def qr_landing(request, token: str):
     """
@@ -151,8 +152,13 @@ def milestones_dashboard(request):
         "completed": milestones.filter(status=ScreeningMilestone.Status.COMPLETED).count(),
     }
 
-    due_list = milestones.filter(status=ScreeningMilestone.Status.DUE, due_on__lte=upcoming_threshold)
-    overdue_list = milestones.filter(status=ScreeningMilestone.Status.OVERDUE)
+    due_list = list(milestones.filter(status=ScreeningMilestone.Status.DUE, due_on__lte=upcoming_threshold))
+    overdue_list = list(milestones.filter(status=ScreeningMilestone.Status.OVERDUE))
+
+    # Growth status next to each review; one batched (cached) lookup for all listed students.
+    growth = trajectories_for_pids(org.id, {m.enrollment.student.pid for m in due_list + overdue_list})
+    for m in due_list + overdue_list:
+        m.growth = growth.get(m.enrollment.student.pid)
 
     return render(request, "program/milestones_school.html", {
         "org": org,
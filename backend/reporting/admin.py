@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SchoolStatDaily, SchoolReportStatus
+from .models import ExportJob, SchoolStatDaily, SchoolStatMonthly, SchoolReportStatus
 
 @admin.register(SchoolStatDaily)
 class SchoolStatDailyAdmin(admin.ModelAdmin):
@@ -7,8 +7,21 @@ class SchoolStatDailyAdmin(admin.ModelAdmin):
     list_filter = ("organization",)
     date_hierarchy = "day"
 
+@admin.register(SchoolStatMonthly)
+class SchoolStatMonthlyAdmin(admin.ModelAdmin):
+    list_display = ("organization","month","screened","red_flags","approved","supplies_delivered","compliance_compliant","milestones_overdue")
+    list_filter = ("organization",)
+    date_hierarchy = "month"
+
 @admin.register(SchoolReportStatus)
 class SchoolReportStatusAdmin(admin.ModelAdmin):
     list_display = ("organization","next_due_on","last_sent_at","last_period_start","last_period_end")
     list_filter = ("next_due_on",)
     search_fields = ("organization__name",)
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id","organization","kind","fmt","status","progress_rows","total_rows","created_at","finished_at","expires_at")
+    list_filter = ("kind","status","fmt")
+    search_fields = ("organization__name","params_hash")
+    readonly_fields = ("params_hash","file_name","file_size","error","started_at","finished_at")
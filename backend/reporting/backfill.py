@@ -0,0 +1,66 @@
+"""
+Sharded, resumable rollup backfill (used by the backfill_rollups command).
+
+A run is split into (organization, date range) shards recorded as
+RollupBackfillShard rows; each shard is one build_rollups_for_period_bulk call.
+Shards are independent, so they can run in any order on a process pool.
+"""
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+from typing import Iterable, List, Tuple
+
+from django.utils import timezone
+
+from accounts.models import Organization
+
+from .models import RollupBackfillShard
+from .services import build_rollups_for_period_bulk
+
+Shard = Tuple[int, int, date, date]   # (shard id, organization id, start_day, end_day)
+
+
+def run_key(start: date, end: date, shard_days: int, org_id: int | None = None) -> str:
+    return f"{start}:{end}:{shard_days}:org={org_id or '*'}"
+
+
+def date_ranges(start: date, end: date, shard_days: int) -> List[Tuple[date, date]]:
+    out = []
+    d = start
+    while d <= end:
+        last = min(end, d + timedelta(days=shard_days - 1))
+        out.append((d, last))
+        d = last + timedelta(days=1)
+    return out
+
+
+def plan_shards(key: str, org_ids: Iterable[int], start: date, end: date, shard_days: int,
+                *, restart: bool = False) -> List[Shard]:
+    """Create the run's shard rows (idempotent) and return those not yet completed."""
+    if restart:
+        RollupBackfillShard.objects.filter(run_key=key).delete()
+    ranges = date_ranges(start, end, shard_days)
+    RollupBackfillShard.objects.bulk_create(
+        [RollupBackfillShard(run_key=key, organization_id=org_id, start_day=a, end_day=b)
+         for org_id in org_ids for a, b in ranges],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    return list(
+        RollupBackfillShard.objects.filter(run_key=key, completed_at__isnull=True)
+        .order_by("start_day", "organization_id")
+        .values_list("id", "organization_id", "start_day", "end_day")
+    )
+
+
+def run_shard(shard: Shard) -> int:
+    """Build one shard and mark it done; returns org-days written."""
+    shard_id, org_id, start, end = shard
+    t0 = time.monotonic()
+    org = Organization.objects.get(pk=org_id)
+    n = build_rollups_for_period_bulk(org, start, end)
+    RollupBackfillShard.objects.filter(pk=shard_id).update(
+        completed_at=timezone.now(), seconds=round(time.monotonic() - t0, 3)
+    )
+    return n
+
@@ -0,0 +1,267 @@
+"""
+Background exports: an ExportJob is built by reporting.tasks.run_export_job into
+export storage and downloaded through a signed, expiring URL.
+
+Each ExportJob.Kind maps to a *source* factory (see EXPORT_SOURCES) returning an
+ExportSource: typed columns plus an iterator of row chunks. Sources are looked up
+by dotted path so apps can provide them without import cycles.
+"""
+from __future__ import annotations
+import csv
+import gzip
+import hashlib
+import io
+import json
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from accounts.models import Organization
+from .models import ExportJob, SchoolReportStatus
+from .services import period_summary
+
+_SIGNING_SALT = "reporting.export-download"
+
+EXPORT_SOURCES = {
+    ExportJob.Kind.SCREENINGS: "screening.export.screenings_export_source",
+    ExportJob.Kind.SCREENINGS_WIDE: "screening.export.screenings_wide_source",
+    ExportJob.Kind.SCHOOL_SUMMARY: "reporting.exports.school_summary_source",
+    ExportJob.Kind.ALL_SCHOOLS_SUMMARY: "reporting.exports.all_schools_summary_source",
+}
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    type: str = "string"  # string | int | float | bool | category | timestamp
+
+
+@dataclass
+class ExportSource:
+    columns: Sequence[Column]
+    chunks: Iterable[List[Sequence]]
+    total: Optional[int] = None
+
+
+# --- storage -----------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def get_export_storage():
+    """Storage for export artifacts; EXPORT_STORAGE_BACKEND swaps in S3 etc."""
+    cls = import_string(settings.EXPORT_STORAGE_BACKEND)
+    if issubclass(cls, FileSystemStorage):
+        return cls(location=settings.EXPORT_ROOT)
+    return cls()
+
+
+# --- request / dedupe ----------------------------------------------------------
+
+def params_hash(kind: str, fmt: str, params: dict) -> str:
+    raw = json.dumps({"kind": kind, "fmt": fmt, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def find_reusable_job(org: Optional[Organization], kind: str, fmt: str, params: dict) -> Optional[ExportJob]:
+    """A queued/running job, or a finished one younger than EXPORT_REUSE_SECONDS."""
+    now = timezone.now()
+    qs = ExportJob.objects.filter(organization=org, kind=kind, params_hash=params_hash(kind, fmt, params))
+    in_flight = qs.filter(
+        status__in=[ExportJob.Status.PENDING, ExportJob.Status.RUNNING],
+        created_at__gte=now - timedelta(seconds=settings.EXPORT_STALE_SECONDS),
+    ).order_by("-created_at").first()
+    if in_flight:
+        return in_flight
+    return qs.filter(
+        status=ExportJob.Status.DONE,
+        finished_at__gte=now - timedelta(seconds=settings.EXPORT_REUSE_SECONDS),
+        expires_at__gt=now,
+    ).order_by("-finished_at").first()
+
+def request_export(*, org: Optional[Organization], kind: str, params: dict, user=None,
+                   fmt: str = ExportJob.Format.CSV_GZ):
+    """
+    Returns (job, created). A new job is queued on commit; otherwise the
+    matching recent job is returned as-is.
+    """
+    from .tasks import run_export_job
+
+    if fmt == ExportJob.Format.PARQUET and not parquet_available():
+        raise ValueError("Parquet exports need pyarrow installed")
+    job = find_reusable_job(org, kind, fmt, params)
+    if job:
+        return job, False
+    job = ExportJob.objects.create(
+        organization=org, requested_by=user if user and user.is_authenticated else None,
+        kind=kind, fmt=fmt, params=params, params_hash=params_hash(kind, fmt, params),
+    )
+    transaction.on_commit(lambda: run_export_job.delay(job.id))
+    return job, True
+
+
+# --- signed download links ---------------------------------------------------
+
+def make_download_token(job: ExportJob) -> str:
+    return signing.dumps({"job": job.id}, salt=_SIGNING_SALT)
+
+def read_download_token(token: str) -> int:
+    """Raises signing.BadSignature (incl. SignatureExpired) for bad/old tokens."""
+    data = signing.loads(token, salt=_SIGNING_SALT, max_age=settings.EXPORT_LINK_MAX_AGE)
+    return int(data["job"])
+
+def download_url(job: ExportJob) -> str:
+    return reverse("reporting:export_download", args=[make_download_token(job)])
+
+
+# --- writing -------------------------------------------------------------------
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def csv_cell(v):
+    """Booleans as true/false and datetimes as ISO 8601, so typed readers parse them as-is."""
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return v
+
+def _write_csv_gz(fh, source: ExportSource, on_chunk) -> None:
+    with gzip.GzipFile(fileobj=fh, mode="wb") as gz:
+        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        w = csv.writer(text)
+        w.writerow([c.name for c in source.columns])
+        for chunk in source.chunks:
+            w.writerows([[csv_cell(v) for v in row] for row in chunk])
+            on_chunk(len(chunk))
+        text.flush()
+        text.detach()
+
+def _arrow_column(values, col: Column):
+    import pyarrow as pa
+    if col.type == "int":
+        return pa.array(values, pa.int64())
+    if col.type == "float":
+        return pa.array([float(v) if v is not None else None for v in values], pa.float64())
+    if col.type == "bool":
+        return pa.array(values, pa.bool_())
+    if col.type == "timestamp":
+        return pa.array(values, pa.timestamp("us", tz="UTC"))
+    if col.type == "category":
+        return pa.array([str(v) if v is not None else None for v in values], pa.string()).dictionary_encode()
+    return pa.array([str(v) if v is not None else None for v in values], pa.string())
+
+def _write_parquet(fh, source: ExportSource, on_chunk) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(),
+             "category": pa.dictionary(pa.int32(), pa.string()), "timestamp": pa.timestamp("us", tz="UTC")}
+    schema = pa.schema([(c.name, types.get(c.type, pa.string())) for c in source.columns])
+    with pq.ParquetWriter(fh, schema, compression="snappy") as writer:
+        for chunk in source.chunks:
+            cols = list(zip(*chunk)) if chunk else [()] * len(source.columns)
+            arrays = [_arrow_column(list(vals), c) for vals, c in zip(cols, source.columns)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            on_chunk(len(chunk))
+
+def build_export(job: ExportJob) -> None:
+    """Writes the artifact for `job` and marks it DONE. Errors propagate to the caller."""
+    source = import_string(EXPORT_SOURCES[job.kind])(job)
+    ExportJob.objects.filter(pk=job.pk).update(total_rows=source.total, updated_at=timezone.now())
+
+    done = 0
+    def on_chunk(n):
+        nonlocal done
+        done += n
+        ExportJob.objects.filter(pk=job.pk).update(progress_rows=done, updated_at=timezone.now())
+
+    writer = _write_parquet if job.fmt == ExportJob.Format.PARQUET else _write_csv_gz
+    org_part = job.organization_id or "all"
+    with tempfile.TemporaryFile() as fh:
+        writer(fh, source, on_chunk)
+        size = fh.tell()
+        fh.seek(0)
+        name = get_export_storage().save(
+            f"{org_part}/{job.kind.lower()}-{job.id}-{job.params_hash[:12]}.{job.fmt}", File(fh)
+        )
+
+    now = timezone.now()
+    job.progress_rows = done
+    job.total_rows = source.total if source.total is not None else done
+    job.file_name = name
+    job.file_size = size
+    job.status = ExportJob.Status.DONE
+    job.finished_at = now
+    job.expires_at = now + timedelta(days=settings.EXPORT_RETENTION_DAYS)
+    job.save(update_fields=["progress_rows", "total_rows", "file_name", "file_size", "status",
+                            "finished_at", "expires_at", "updated_at"])
+
+
+# --- sources -------------------------------------------------------------------
+
+def _summary_period(params: dict):
+    return date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+
+def school_summary_source(job: ExportJob) -> ExportSource:
+    start, end = _summary_period(job.params)
+    agg = period_summary(job.organization, start, end)
+    rows = [[k, v] for k, v in agg.items()]
+    return ExportSource(columns=[Column("metric", "category"), Column("value", "float")],
+                        chunks=[rows], total=len(rows))
+
+_SUMMARY_METRICS = ("screened", "red_flags", "applied", "forwarded", "approved", "rejected",
+                    "enrollments_created", "supplies_delivered",
+                    "compliance_submitted", "compliance_compliant", "compliance_unable",
+                    "milestones_due", "milestones_overdue", "milestones_completed")
+
+def all_schools_summary_source(job: ExportJob) -> ExportSource:
+    start, end = _summary_period(job.params)
+    orgs = Organization.objects.filter(
+        org_type__in=[Organization.OrgType.SCHOOL, Organization.OrgType.NGO]
+    ).order_by("name")
+    due = dict(SchoolReportStatus.objects.values_list("organization_id", "next_due_on"))
+
+    def chunks() -> Iterator[List[Sequence]]:
+        batch = []
+        for org in orgs.iterator():
+            agg = period_summary(org, start, end)
+            batch.append([org.id, org.name, *[agg.get(k, 0) for k in _SUMMARY_METRICS],
+                          agg.get("red_rate", 0), agg.get("compliance_rate", 0),
+                          due[org.id].isoformat() if due.get(org.id) else None])
+            if len(batch) >= 100:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    columns = ([Column("org_id", "int"), Column("school")]
+               + [Column(k, "int") for k in _SUMMARY_METRICS]
+               + [Column("red_rate", "float"), Column("compliance_rate", "float"), Column("next_report_due")])
+    return ExportSource(columns=columns, chunks=chunks(), total=orgs.count())
+
+
+def purge_expired_exports(now=None) -> int:
+    """Deletes expired jobs and their artifacts; requests and downloads stay in AuditLog."""
+    now = now or timezone.now()
+    storage = get_export_storage()
+    n = 0
+    for job in ExportJob.objects.filter(status=ExportJob.Status.DONE, expires_at__lte=now):
+        if job.file_name and storage.exists(job.file_name):
+            storage.delete(job.file_name)
+        job.delete()
+        n += 1
+    return n
@@ -0,0 +1,141 @@
+"""
+Program funnel: screened -> red-flagged -> applied -> forwarded -> approved
+-> enrolled -> delivered -> compliant, per organization.
+
+The cohort is every student (PID) of the org screened in the window. One
+query streams the cohort with the first timestamp of each stage as correlated
+subqueries on Student, counting only records made on or after the student's
+first screening in the window; counts, conversion rates and median stage
+latencies are folded in Python. A student reaches a stage only if they reached
+every earlier one, so the counts never increase down the funnel. Results are cached per
+(org, window) with reporting.view_cache.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import statistics
+from datetime import date, datetime, time
+from typing import List, Optional
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from accounts.models import Organization
+from assist.models import Application
+from program.models import ComplianceSubmission, Enrollment, MonthlySupply
+from roster.models import Student
+from screening.models import Screening
+
+from .services import _bounds_for_period
+from .view_cache import cached_for_org
+
+STAGES = (
+    ("screened", "Screened"),
+    ("red_flagged", "Red-flagged"),
+    ("applied", "Applied"),
+    ("forwarded", "Forwarded to SAPA"),
+    ("approved", "Approved"),
+    ("enrolled", "Enrolled"),
+    ("delivered", "Supply delivered"),
+    ("compliant", "Compliant"),
+)
+
+
+def _first(qs, field: str):
+    return Subquery(qs.exclude(**{f"{field}__isnull": True}).order_by(field).values(field)[:1])
+
+
+def _stage_timestamps(org: Organization, start_day: date, end_day: date):
+    """(student_id, ts per stage...) for the window's cohort, streamed."""
+    start_dt, end_dt = _bounds_for_period(start_day, end_day)
+    student = OuterRef("pk")
+    cohort_at = OuterRef("screened")
+    screenings = Screening.objects.filter(organization=org, student=student, screened_at__range=(start_dt, end_dt))
+    # Downstream stages only count this cycle's records: an application or
+    # enrollment from before the cohort screening belongs to an earlier cycle.
+    apps = Application.objects.filter(organization=org, student=student, applied_at__gte=cohort_at)
+    enrollments = dict(enrollment__organization=org, enrollment__student=student, enrollment__created_at__gte=cohort_at)
+    return (
+        Student.objects.filter(organization=org)
+        .annotate(screened=_first(screenings, "screened_at"))
+        .filter(screened__isnull=False)
+        .annotate(
+            red_flagged=_first(screenings.filter(risk_level=Screening.RiskLevel.RED), "screened_at"),
+            applied=_first(apps, "applied_at"),
+            forwarded=_first(apps, "forwarded_at"),
+            approved=_first(apps.filter(status=Application.Status.APPROVED), "sapa_reviewed_at"),
+            enrolled=_first(Enrollment.objects.filter(organization=org, student=student, created_at__gte=cohort_at),
+                            "created_at"),
+            delivered=_first(MonthlySupply.objects.filter(**enrollments), "delivered_on"),
+            compliant=_first(ComplianceSubmission.objects.filter(
+                status=ComplianceSubmission.Status.COMPLIANT,
+                **{f"monthly_supply__{k}": v for k, v in enrollments.items()},
+            ), "submitted_at"),
+        )
+        .values_list("id", *[key for key, _ in STAGES])
+        .order_by()
+        .iterator(chunk_size=2000)
+    )
+
+
+def _as_datetime(v) -> Optional[datetime]:
+    if v is None or isinstance(v, datetime):
+        return v
+    # delivered_on is a date: count it from local midnight
+    return timezone.make_aware(datetime.combine(v, time.min), timezone.get_current_timezone())
+
+
+def _rate(n: int, d: int) -> float:
+    return round(n * 100.0 / d, 1) if d else 0.0
+
+
+def compute_funnel(org: Organization, start_day: date, end_day: date) -> dict:
+    counts = [0] * len(STAGES)
+    latencies: List[List[float]] = [[] for _ in STAGES]
+    for row in _stage_timestamps(org, start_day, end_day):
+        prev = None
+        for i, value in enumerate(row[1:]):
+            ts = _as_datetime(value)
+            if ts is None:
+                break
+            counts[i] += 1
+            if prev is not None:
+                # delivered_on is a date (local midnight), so it can precede the same day's enrollment
+                latencies[i].append(max((ts - prev).total_seconds(), 0) / 86400)
+            prev = ts
+
+    cohort = counts[0]
+    stages = []
+    for i, (key, label) in enumerate(STAGES):
+        stages.append({
+            "key": key,
+            "label": label,
+            "count": counts[i],
+            "rate_from_previous": _rate(counts[i], counts[i - 1] if i else cohort),
+            "rate_from_screened": _rate(counts[i], cohort),
+            "median_days_from_previous": round(statistics.median(latencies[i]), 1) if latencies[i] else None,
+        })
+    return {"start": start_day, "end": end_day, "cohort": cohort, "stages": stages}
+
+
+def funnel_for_org(org: Organization, start_day: date, end_day: date) -> dict:
+    """compute_funnel, cached until the org's rollups change (every funnel source feeds them)."""
+    return cached_for_org(org.id, "funnel", (start_day, end_day), lambda: compute_funnel(org, start_day, end_day))
+
+
+def funnel_csv(org: Organization, start_day: date, end_day: date) -> bytes:
+    def build():
+        funnel = funnel_for_org(org, start_day, end_day)
+        buff = io.StringIO()
+        w = csv.writer(buff)
+        w.writerow(["School", org.name])
+        w.writerow(["Cohort", f"Students screened {start_day} to {end_day}"])
+        w.writerow([])
+        w.writerow(["Stage", "Students", "% of previous", "% of screened", "Median days from previous"])
+        for s in funnel["stages"]:
+            median = s["median_days_from_previous"]
+            w.writerow([s["label"], s["count"], s["rate_from_previous"], s["rate_from_screened"],
+                        "" if median is None else median])
+        return buff.getvalue().encode("utf-8")
+    return cached_for_org(org.id, "funnel-csv", (start_day, end_day), build)
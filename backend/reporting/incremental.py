@@ -0,0 +1,183 @@
+"""
+Incremental SchoolStatDaily maintenance.
+
+Each source row *contributes* to a few (organization, day, counter) cells,
+mirroring the COUNT queries in services.build_daily_rollup. On save/delete the
+signals diff the row's old and new contributions and apply the +/- deltas with
+single F()-expression UPDATEs (to the day row and its SchoolStatMonthly row),
+instead of re-running every count for the day.
+
+A day with no SchoolStatDaily row yet is built in full once (it may already
+have other activity); after that only deltas are applied. Writes that bypass
+signals (queryset.update, bulk_*) are corrected by the reconciliation task
+(reporting.tasks.reconcile_recent_rollups), which rebuilds recent days.
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, Tuple
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+from accounts.models import Organization
+from assist.models import Application
+from program.models import ComplianceSubmission, Enrollment, MonthlySupply, ScreeningMilestone
+from screening.models import Screening
+
+from .models import SchoolStatDaily, SchoolStatMonthly
+from .services import build_daily_rollup, refresh_monthly_rollups
+from .view_cache import bump_org_versions
+
+Cell = Tuple[int, date, str]   # (organization_id, day, SchoolStatDaily field)
+
+
+def _local_day(dt) -> date | None:
+    if not dt:
+        return None
+    try:
+        return timezone.localtime(dt).date()
+    except Exception:
+        return dt.date()
+
+
+def _cells(org_id, pairs) -> Counter:
+    out = Counter()
+    if not org_id:
+        return out
+    for day, field in pairs:
+        if day:
+            out[(org_id, day, field)] += 1
+    return out
+
+
+def _screening(s: Screening) -> Counter:
+    day = _local_day(s.screened_at)
+    pairs = [(day, "screened")]
+    if s.risk_level == "RED":
+        pairs.append((day, "red_flags"))
+    return _cells(s.organization_id, pairs)
+
+
+def _application(a: Application) -> Counter:
+    reviewed = _local_day(a.sapa_reviewed_at)
+    pairs = [(_local_day(a.applied_at), "applied"), (_local_day(a.forwarded_at), "forwarded")]
+    if a.status == "APPROVED":
+        pairs.append((reviewed, "approved"))
+    elif a.status == "REJECTED":
+        pairs.append((reviewed, "rejected"))
+    return _cells(a.organization_id, pairs)
+
+
+def _enrollment(e: Enrollment) -> Counter:
+    return _cells(e.organization_id, [(_local_day(e.created_at), "enrollments_created")])
+
+
+def _monthly_supply(m: MonthlySupply) -> Counter:
+    org_id = m.enrollment.organization_id if m.enrollment_id else None
+    return _cells(org_id, [(m.delivered_on, "supplies_delivered")])
+
+
+def _compliance(c: ComplianceSubmission) -> Counter:
+    org_id = c.monthly_supply.enrollment.organization_id if c.monthly_supply_id else None
+    day = _local_day(c.submitted_at)
+    pairs = [(day, "compliance_submitted")]
+    if c.status == "COMPLIANT":
+        pairs.append((day, "compliance_compliant"))
+    elif c.status == "UNABLE":
+        pairs.append((day, "compliance_unable"))
+    return _cells(org_id, pairs)
+
+
+def _milestone(m: ScreeningMilestone) -> Counter:
+    org_id = m.enrollment.organization_id if m.enrollment_id else None
+    pairs = [(m.due_on, "milestones_due")]
+    if m.status == "OVERDUE":
+        pairs.append((_local_day(m.updated_at), "milestones_overdue"))
+    elif m.status == "COMPLETED":
+        pairs.append((_local_day(m.completed_at), "milestones_completed"))
+    return _cells(org_id, pairs)
+
+
+CONTRIBUTIONS = {
+    Screening: _screening,
+    Application: _application,
+    Enrollment: _enrollment,
+    MonthlySupply: _monthly_supply,
+    ComplianceSubmission: _compliance,
+    ScreeningMilestone: _milestone,
+}
+
+# Related rows the contribution functions read, so the pre_save lookup is one query.
+_PREV_SELECT_RELATED = {
+    MonthlySupply: ("enrollment",),
+    ComplianceSubmission: ("monthly_supply__enrollment",),
+    ScreeningMilestone: ("enrollment",),
+}
+
+
+def contribution(instance) -> Counter:
+    try:
+        return CONTRIBUTIONS[type(instance)](instance)
+    except ObjectDoesNotExist:
+        # Parent already gone (cascade delete); the reconciliation job settles it.
+        return Counter()
+
+
+def stored_contribution(model, pk) -> Counter:
+    """Contribution of the row as currently stored (before a save)."""
+    prev = model.objects.select_related(*_PREV_SELECT_RELATED.get(model, ())).filter(pk=pk).first()
+    return contribution(prev) if prev else Counter()
+
+
+def diff(old: Counter, new: Counter) -> Dict[Cell, int]:
+    deltas = {cell: new.get(cell, 0) - old.get(cell, 0) for cell in set(old) | set(new)}
+    return {cell: n for cell, n in deltas.items() if n}
+
+
+def _delta_expr(field: str, n: int):
+    if n > 0:
+        return F(field) + n
+    # Counters are unsigned: never subtract below zero (MySQL would reject it).
+    return Case(When(**{f"{field}__gte": -n}, then=F(field) - (-n)), default=0)
+
+
+def apply_deltas(deltas: Dict[Cell, int]) -> None:
+    """
+    One UPDATE per (organization, day) and per (organization, month). A missing
+    day row is built in full (which also refreshes its month).
+    """
+    by_row = defaultdict(dict)
+    for (org_id, day, field), n in deltas.items():
+        by_row[(org_id, day)][field] = n
+
+    by_month = defaultdict(Counter)
+    for (org_id, day), fields in sorted(by_row.items()):
+        updated = SchoolStatDaily.objects.filter(organization_id=org_id, day=day).update(
+            **{field: _delta_expr(field, n) for field, n in fields.items()}
+        )
+        if updated:
+            by_month[(org_id, day.replace(day=1))].update(fields)
+            continue
+        org = Organization.objects.filter(pk=org_id).first()
+        if org:
+            build_daily_rollup(org, day)
+
+    for (org_id, month), fields in sorted(by_month.items()):
+        fields = {field: n for field, n in fields.items() if n}
+        if not fields:
+            continue
+        updated = SchoolStatMonthly.objects.filter(organization_id=org_id, month=month).update(
+            updated_at=timezone.now(), **{field: _delta_expr(field, n) for field, n in fields.items()}
+        )
+        if not updated:
+            refresh_monthly_rollups(month, month, org_ids=[org_id])
+    bump_org_versions(org_id for org_id, _ in by_month)
+
+
+def queue_deltas(deltas: Dict[Cell, int]) -> None:
+    if deltas:
+        transaction.on_commit(lambda: apply_deltas(deltas))
@@ -1,14 +1,27 @@
+import multiprocessing
+import django
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date, timedelta
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from reporting.services import build_rollups_for_day
+from accounts.models import Organization
+from reporting.backfill import plan_shards, run_key, run_shard
 
 class Command(BaseCommand):
-    help = "Build daily rollups for a date range (default last 180 days)."
+    help = (
+        "Build daily rollups for a date range (default last 180 days). Work is split into "
+        "(org, date-range) shards run on a process pool; an interrupted run resumes where it stopped."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("--start", type=str, help="YYYY-MM-DD")
         parser.add_argument("--end", type=str, help="YYYY-MM-DD")
+        parser.add_argument("--org", type=int, help="Organization id (default: all)")
+        parser.add_argument("--shard-days", type=int, default=31, help="Days per shard")
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+        parser.add_argument("--restart", action="store_true", help="Forget completed shards of this run")
 
     def handle(self, *args, **opts):
         def _parse(s):
@@ -17,11 +30,52 @@ class Command(BaseCommand):
 
         end = _parse(opts.get("end")) or timezone.now().date()
         start = _parse(opts.get("start")) or (end - timedelta(days=180))
+        if start > end:
+            raise CommandError("--start must be on or before --end")
+        org_id = opts.get("org")
+        orgs = Organization.objects.all()
+        if org_id:
+            orgs = orgs.filter(pk=org_id)
+            if not orgs.exists():
+                raise CommandError(f"Organization {org_id} not found")
+        shard_days = max(1, opts["shard_days"])
+        workers = max(1, opts["workers"])
 
-        d = start
-        n = 0
-        while d <= end:
-            build_rollups_for_day(d)
-            self.stdout.write(f"Rolled up {d}")
-            d += timedelta(days=1); n += 1
-        self.stdout.write(self.style.SUCCESS(f"Completed {n} days."))
+        key = run_key(start, end, shard_days, org_id)
+        shards = plan_shards(key, orgs.values_list("id", flat=True), start, end, shard_days,
+                             restart=bool(opts.get("restart")))
+        if not shards:
+            self.stdout.write(self.style.SUCCESS(f"Nothing to do: run {key} is complete (use --restart to rebuild)."))
+            return
+        total_org_days = sum((b - a).days + 1 for _, _, a, b in shards)
+        self.stdout.write(f"Run {key}: {len(shards)} shards, {total_org_days} org-days, {workers} worker(s)")
+
+        started = time.monotonic()
+        self.done_shards = 0
+        self.done_org_days = 0
+        report_every = max(1, len(shards) // 20)
+
+        def _progress(n):
+            self.done_shards += 1
+            self.done_org_days += n
+            if self.done_shards % report_every == 0 or self.done_shards == len(shards):
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f"  {self.done_shards}/{len(shards)} shards, {self.done_org_days} org-days "
+                    f"({self.done_org_days / elapsed:.1f} org-days/s)"
+                )
+
+        if workers == 1:
+            for shard in shards:
+                _progress(run_shard(shard))
+        else:
+            # spawn: each worker sets Django up and opens its own DB connection
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=django.setup) as pool:
+                for fut in as_completed([pool.submit(run_shard, shard) for shard in shards]):
+                    _progress(fut.result())
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f"Completed {self.done_org_days} org-days in {elapsed:.1f}s ({self.done_org_days / elapsed:.1f} org-days/s)."
+        ))
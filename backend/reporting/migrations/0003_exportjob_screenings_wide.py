@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-16 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0002_exportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='kind',
+            field=models.CharField(choices=[('SCREENINGS', 'Screenings'), ('SCREENINGS_WIDE', 'Screenings with all answers'), ('SCHOOL_SUMMARY', 'School performance summary'), ('ALL_SCHOOLS_SUMMARY', 'All schools performance summary')], max_length=32),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-16 21:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        ('reporting', '0004_rollupdirtyday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupBackfillShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_key', models.CharField(max_length=64)),
+                ('start_day', models.DateField()),
+                ('end_day', models.DateField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('seconds', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run_key', 'completed_at'], name='reporting_r_run_key_99e404_idx')],
+                'unique_together': {('run_key', 'organization', 'start_day')},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.14 on 2026-10-16 21:06
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+_METRICS = (
+    "screened", "red_flags", "applied", "forwarded", "approved", "rejected", "enrollments_created",
+    "supplies_delivered", "compliance_submitted", "compliance_compliant", "compliance_unable",
+    "milestones_due", "milestones_overdue", "milestones_completed",
+)
+
+
+def populate_monthly(apps, schema_editor):
+    Daily = apps.get_model("reporting", "SchoolStatDaily")
+    Monthly = apps.get_model("reporting", "SchoolStatMonthly")
+    sums = (Daily.objects.annotate(m=TruncMonth("day")).values("organization_id", "m")
+            .annotate(**{k: Sum(k) for k in _METRICS}).order_by())
+    Monthly.objects.bulk_create(
+        [Monthly(organization_id=r["organization_id"], month=r["m"], **{k: r[k] or 0 for k in _METRICS})
+         for r in sums],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        ('reporting', '0005_rollupbackfillshard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolStatMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('screened', models.PositiveIntegerField(default=0)),
+                ('red_flags', models.PositiveIntegerField(default=0)),
+                ('applied', models.PositiveIntegerField(default=0)),
+                ('forwarded', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('enrollments_created', models.PositiveIntegerField(default=0)),
+                ('supplies_delivered', models.PositiveIntegerField(default=0)),
+                ('compliance_submitted', models.PositiveIntegerField(default=0)),
+                ('compliance_compliant', models.PositiveIntegerField(default=0)),
+                ('compliance_unable', models.PositiveIntegerField(default=0)),
+                ('milestones_due', models.PositiveIntegerField(default=0)),
+                ('milestones_overdue', models.PositiveIntegerField(default=0)),
+                ('milestones_completed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='accounts.organization')),
+            ],
+            options={
+                'unique_together': {('organization', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_monthly, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.14 on 2026-10-16 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0006_schoolstatmonthly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schoolreportstatus',
+            name='last_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='schoolreportstatus',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
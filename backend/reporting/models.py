@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import asdict
 from datetime import date, timedelta
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from accounts.models import Organization
@@ -47,6 +48,72 @@ class SchoolStatDaily(models.Model):
     def __str__(self):
         return f"{self.organization.name} – {self.day}"
 
+class SchoolStatMonthly(models.Model):
+    """
+    Per (organization, calendar month) sums of SchoolStatDaily, kept in step by
+    reporting.services whenever daily rows are written. `month` is the 1st.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="monthly_stats")
+    month = models.DateField()
+
+    screened = models.PositiveIntegerField(default=0)
+    red_flags = models.PositiveIntegerField(default=0)
+    applied = models.PositiveIntegerField(default=0)
+    forwarded = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    enrollments_created = models.PositiveIntegerField(default=0)
+    supplies_delivered = models.PositiveIntegerField(default=0)
+    compliance_submitted = models.PositiveIntegerField(default=0)
+    compliance_compliant = models.PositiveIntegerField(default=0)
+    compliance_unable = models.PositiveIntegerField(default=0)
+    milestones_due = models.PositiveIntegerField(default=0)
+    milestones_overdue = models.PositiveIntegerField(default=0)
+    milestones_completed = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (("organization", "month"),)
+
+    def __str__(self):
+        return f"{self.organization.name} – {self.month:%Y-%m}"
+
+class RollupDirtyDay(models.Model):
+    """
+    An (organization, day) rollup waiting to be rebuilt by the drain task.
+    Database fallback for reporting.rollup_queue when Redis is unavailable.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = (("organization", "day"),)
+
+    def __str__(self):
+        return f"{self.organization_id} – {self.day}"
+
+class RollupBackfillShard(models.Model):
+    """
+    One (organization, date range) unit of a `backfill_rollups` run. completed_at
+    is set once the shard is built, so an interrupted run resumes with the rest.
+    """
+    run_key = models.CharField(max_length=64)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="+")
+    start_day = models.DateField()
+    end_day = models.DateField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    seconds = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = (("run_key", "organization", "start_day"),)
+        indexes = [models.Index(fields=["run_key", "completed_at"])]
+
+    def __str__(self):
+        return f"{self.run_key} org={self.organization_id} {self.start_day}..{self.end_day}"
+
 class SchoolReportStatus(models.Model):
     """
     Tracks 6-month performance report cycles per school for Inditech console.
@@ -57,6 +124,9 @@ class SchoolReportStatus(models.Model):
     last_period_start = models.DateField(null=True, blank=True)
     last_period_end = models.DateField(null=True, blank=True)
     next_due_on = models.DateField(null=True, blank=True)
+    # Outcome of the most recent send attempt; next_due_on only moves on success.
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
 
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
@@ -70,3 +140,74 @@ class SchoolReportStatus(models.Model):
             base = (self.organization.created_at.date() if hasattr(self.organization, "created_at") else timezone.now().date())
             self.next_due_on = base + timedelta(days=180)
         self.save(update_fields=["next_due_on","updated_at"])
+
+class ExportJob(models.Model):
+    """
+    A background export (gzip CSV or Parquet) written to export storage.
+
+    Identical requests (same organization, kind, format and params) share one
+    job via params_hash, so a recent artifact is reused instead of rebuilt.
+    """
+    class Kind(models.TextChoices):
+        SCREENINGS = "SCREENINGS", "Screenings"
+        SCREENINGS_WIDE = "SCREENINGS_WIDE", "Screenings with all answers"
+        SCHOOL_SUMMARY = "SCHOOL_SUMMARY", "School performance summary"
+        ALL_SCHOOLS_SUMMARY = "ALL_SCHOOLS_SUMMARY", "All schools performance summary"
+
+    class Format(models.TextChoices):
+        CSV_GZ = "csv.gz", "CSV (gzip)"
+        PARQUET = "parquet", "Parquet"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+        EXPIRED = "EXPIRED", "Expired"
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, null=True, blank=True, related_name="export_jobs"
+    )  # NULL for cross-school exports
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    fmt = models.CharField(max_length=16, choices=Format.choices, default=Format.CSV_GZ)
+    params = models.JSONField(default=dict, blank=True)
+    params_hash = models.CharField(max_length=64)
+
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING, db_index=True)
+    progress_rows = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "kind", "params_hash", "status"]),
+            models.Index(fields=["status", "expires_at"]),
+        ]
+
+    def __str__(self):
+        who = self.organization.name if self.organization_id else "All schools"
+        return f"{who} – {self.get_kind_display()} ({self.status})"
+
+    @property
+    def progress_percent(self):
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.total_rows:
+            return None
+        return min(99, int(self.progress_rows * 100 / self.total_rows))
+
+    @property
+    def download_filename(self) -> str:
+        who = self.organization.name.replace(" ", "_") if self.organization_id else "all_schools"
+        return f"{who}_{self.kind.lower()}_{self.created_at:%Y%m%d}.{self.fmt}"
@@ -0,0 +1,189 @@
+"""
+Coalescing queue of SchoolStatDaily rebuilds.
+
+Writers record (organization, day) pairs with mark_dirty() instead of calling
+build_daily_rollup inline; reporting.tasks.drain_rollup_queue rebuilds each
+distinct pair once, using build_rollups_for_period_bulk for contiguous runs.
+
+Pairs live in a Redis set (ROLLUP_QUEUE_REDIS_URL). If Redis is not configured
+or unreachable they go to the RollupDirtyDay table; the drain reads both.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Set, Tuple
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts.models import Organization
+
+from .models import RollupDirtyDay
+from .services import build_daily_rollup, build_rollups_for_period_bulk
+
+logger = logging.getLogger(__name__)
+
+_DIRTY_KEY = "reporting:rollup-dirty"
+_SCHEDULED_KEY = "reporting:rollup-drain-scheduled"
+_REDIS_RETRY_SECONDS = 30
+
+Pair = Tuple[int, date]
+
+_client = None
+_redis_down_until = 0.0
+
+
+def _redis():
+    """Shared client, or None while Redis is unconfigured / recently failed."""
+    global _client
+    if not settings.ROLLUP_QUEUE_REDIS_URL or time.monotonic() < _redis_down_until:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(settings.ROLLUP_QUEUE_REDIS_URL, socket_timeout=2, socket_connect_timeout=1)
+    return _client
+
+
+def _redis_failed(exc) -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+    logger.warning("Rollup queue: Redis unavailable (%s), using the database table", exc)
+
+
+def _member(org_id: int, day: date) -> str:
+    return f"{org_id}:{day.isoformat()}"
+
+
+def _parse(member) -> Pair:
+    if isinstance(member, bytes):
+        member = member.decode()
+    org_id, day = member.split(":", 1)
+    return int(org_id), date.fromisoformat(day)
+
+
+def mark_dirty(pairs: Iterable[Pair], *, schedule: bool = True) -> int:
+    """Record (org_id, day) pairs for rebuild and make sure a drain is coming."""
+    pairs = {(org_id, day) for org_id, day in pairs if org_id and day}
+    if not pairs:
+        return 0
+    stored = False
+    r = _redis()
+    if r is not None:
+        try:
+            r.sadd(_DIRTY_KEY, *[_member(o, d) for o, d in pairs])
+            stored = True
+        except redis.RedisError as exc:
+            _redis_failed(exc)
+    if not stored:
+        RollupDirtyDay.objects.bulk_create(
+            [RollupDirtyDay(organization_id=o, day=d) for o, d in pairs], ignore_conflicts=True
+        )
+    if schedule:
+        _schedule_drain()
+    return len(pairs)
+
+
+def mark_dirty_on_commit(pairs: Iterable[Pair]) -> None:
+    pairs = set(pairs)
+    if pairs:
+        transaction.on_commit(lambda: mark_dirty(pairs))
+
+
+def _schedule_drain() -> None:
+    """At most one queued drain per ROLLUP_DRAIN_DELAY; the beat drain covers lost ones."""
+    from .tasks import drain_rollup_queue
+
+    delay = settings.ROLLUP_DRAIN_DELAY
+    if not cache.add(_SCHEDULED_KEY, 1, timeout=delay):
+        return
+    try:
+        drain_rollup_queue.apply_async(countdown=delay)
+    except Exception:
+        cache.delete(_SCHEDULED_KEY)
+        logger.exception("Rollup queue: could not schedule a drain; the periodic drain will pick it up")
+
+
+def pop_dirty(limit: int) -> Set[Pair]:
+    """Remove and return up to `limit` pairs from each store."""
+    pairs: Set[Pair] = set()
+    r = _redis()
+    if r is not None:
+        try:
+            pairs.update(_parse(m) for m in (r.spop(_DIRTY_KEY, limit) or []))
+        except redis.RedisError as exc:
+            _redis_failed(exc)
+    with transaction.atomic():
+        rows = list(
+            RollupDirtyDay.objects.select_for_update(skip_locked=True)
+            .order_by("id").values_list("id", "organization_id", "day")[:limit]
+        )
+        if rows:
+            RollupDirtyDay.objects.filter(id__in=[row[0] for row in rows]).delete()
+    pairs.update((org_id, day) for _, org_id, day in rows)
+    return pairs
+
+
+def contiguous_runs(days: Iterable[date]) -> Iterator[Tuple[date, date]]:
+    """[(start, end), ...] covering sorted distinct days with no gaps inside a run."""
+    start = end = None
+    for d in sorted(set(days)):
+        if end is not None and d == end + timedelta(days=1):
+            end = d
+            continue
+        if start is not None:
+            yield start, end
+        start = end = d
+    if start is not None:
+        yield start, end
+
+
+def rebuild_pairs(pairs: Iterable[Pair]) -> Tuple[int, List[Pair]]:
+    """Rebuild each distinct pair once. Returns (days rebuilt, pairs that failed)."""
+    by_org = defaultdict(list)
+    for org_id, day in pairs:
+        by_org[org_id].append(day)
+    orgs = Organization.objects.in_bulk(list(by_org))
+
+    days_built = 0
+    failed: List[Pair] = []
+    for org_id, days in sorted(by_org.items()):
+        org = orgs.get(org_id)
+        if org is None:
+            continue
+        for start, end in contiguous_runs(days):
+            n = (end - start).days + 1
+            try:
+                if start == end:
+                    build_daily_rollup(org, start)
+                else:
+                    build_rollups_for_period_bulk(org, start, end)
+                days_built += n
+            except Exception:
+                logger.exception("Rollup rebuild failed for org %s %s..%s", org_id, start, end)
+                failed.extend((org_id, start + timedelta(days=i)) for i in range(n))
+    return days_built, failed
+
+
+def drain_dirty_rollups(limit: int | None = None) -> int:
+    """
+    Drain the queue until it is empty; returns the number of days rebuilt.
+    Failed pairs are re-queued at the end for the next drain.
+    """
+    limit = limit or settings.ROLLUP_DRAIN_BATCH
+    cache.delete(_SCHEDULED_KEY)   # marks arriving from now on schedule a fresh drain
+    total = 0
+    failed: List[Pair] = []
+    while True:
+        pairs = pop_dirty(limit)
+        if not pairs:
+            break
+        built, bad = rebuild_pairs(pairs)
+        total += built
+        failed.extend(bad)
+    if failed:
+        mark_dirty(failed, schedule=False)
+    return total
@@ -1,14 +1,63 @@
 from __future__ import annotations
 from datetime import datetime, timedelta, date
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone
-from django.db.models import Q, Count
-from django.db.models.functions import TruncDate
+from django.db.models import Case, Count, F, FilteredRelation, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Round, TruncDate, TruncMonth
 from accounts.models import Organization
 from screening.models import Screening
 from assist.models import Application
 from program.models import Enrollment, MonthlySupply, ComplianceSubmission, ScreeningMilestone
-from .models import SchoolStatDaily, SchoolReportStatus
+from .models import SchoolStatDaily, SchoolStatMonthly, SchoolReportStatus
+from .view_cache import bump_org_versions
+
+ROLLUP_METRICS = (
+    "screened", "red_flags",
+    "applied", "forwarded", "approved", "rejected",
+    "enrollments_created",
+    "supplies_delivered",
+    "compliance_submitted", "compliance_compliant", "compliance_unable",
+    "milestones_due", "milestones_overdue", "milestones_completed",
+)
+
+def _upsert(model, rows, unique_fields, update_fields) -> None:
+    """INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT on the model's unique key."""
+    kwargs = {"update_conflicts": True, "update_fields": list(update_fields)}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs["unique_fields"] = unique_fields   # MySQL infers the key
+    model.objects.bulk_create(rows, batch_size=500, **kwargs)
+
+def upsert_daily_rows(rows: list[SchoolStatDaily]) -> None:
+    _upsert(SchoolStatDaily, rows, ["organization", "day"], ROLLUP_METRICS)
+    bump_org_versions(r.organization_id for r in rows)
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def refresh_monthly_rollups(start_day: date, end_day: date, *, org_ids=None) -> int:
+    """Recompute SchoolStatMonthly for every month touching [start_day, end_day] from the daily rows."""
+    first = _month_start(start_day)
+    last = _month_start(end_day)
+    daily = SchoolStatDaily.objects.filter(day__gte=first, day__lt=_next_month(last))
+    monthly = SchoolStatMonthly.objects.filter(month__gte=first, month__lte=last)
+    if org_ids is not None:
+        daily = daily.filter(organization_id__in=org_ids)
+        monthly = monthly.filter(organization_id__in=org_ids)
+
+    sums = (daily.annotate(m=TruncMonth("day")).values("organization_id", "m")
+            .annotate(**{k: Sum(k) for k in ROLLUP_METRICS}).order_by())
+    rows = [SchoolStatMonthly(organization_id=r["organization_id"], month=r["m"],
+                              **{k: r[k] or 0 for k in ROLLUP_METRICS}) for r in sums]
+    _upsert(SchoolStatMonthly, rows, ["organization", "month"], (*ROLLUP_METRICS, "updated_at"))
+
+    keep = {(r.organization_id, r.month) for r in rows}
+    gone = [pk for pk, org_id, m in monthly.values_list("id", "organization_id", "month") if (org_id, m) not in keep]
+    if gone:
+        SchoolStatMonthly.objects.filter(id__in=gone).delete()
+    return len(rows)
 
 def _bounds_for_day(day: date):
     tz = timezone.get_current_timezone()
@@ -54,9 +103,8 @@ def build_daily_rollup(org: Organization, day: date) -> SchoolStatDaily:
     milestones_overdue = ScreeningMilestone.objects.filter(enrollment__organization=org, status="OVERDUE", updated_at__range=(start, end)).count()
     milestones_completed = ScreeningMilestone.objects.filter(enrollment__organization=org, status="COMPLETED", completed_at__range=(start, end)).count()
 
-    # Upsert
-    SchoolStatDaily.objects.filter(organization=org, day=day).delete()
-    row = SchoolStatDaily.objects.create(
+    # Upsert: no delete/re-insert window, and concurrent rebuilds of the day don't collide
+    upsert_daily_rows([SchoolStatDaily(
         organization=org, day=day,
         screened=screened, red_flags=red_flags,
         applied=applied, forwarded=forwarded, approved=approved, rejected=rejected,
@@ -64,7 +112,9 @@ def build_daily_rollup(org: Organization, day: date) -> SchoolStatDaily:
         supplies_delivered=supplies_delivered,
         compliance_submitted=compliance_submitted, compliance_compliant=compliance_compliant, compliance_unable=compliance_unable,
         milestones_due=milestones_due, milestones_overdue=milestones_overdue, milestones_completed=milestones_completed,
-    )
+    )])
+    row = SchoolStatDaily.objects.get(organization=org, day=day)
+    refresh_monthly_rollups(day, day, org_ids=[org.id])
     # ensure report status row exists
     rs, _ = SchoolReportStatus.objects.get_or_create(organization=org)
     rs.ensure_defaults()
@@ -237,45 +287,203 @@ def build_rollups_for_period_bulk(org: Organization, start_day: date, end_day: d
             organization=org,
             day=day,
             created_at=now,
-            updated_at=now,
             **by_day[day],
         )
         for day in days
     ]
 
-    SchoolStatDaily.objects.filter(organization=org, day__gte=start_day, day__lte=end_day).delete()
-    SchoolStatDaily.objects.bulk_create(rows, batch_size=500)
+    upsert_daily_rows(rows)
+    refresh_monthly_rollups(start_day, end_day, org_ids=[org.id])
 
     rs, _ = SchoolReportStatus.objects.get_or_create(organization=org)
     rs.ensure_defaults()
 
     return len(rows)
 
-def build_rollups_for_day(day: date) -> int:
-    n = 0
-    for org in Organization.objects.all().iterator():
-        build_daily_rollup(org, day)
-        n += 1
-    return n
+def _grouped(qs, day_expr, org_path: str, **counts):
+    """Rows of (org_id, day, {metric: n}) from one GROUP BY org, day query."""
+    rows = (qs.annotate(_day=day_expr).values(org_path, "_day").annotate(**counts).order_by())
+    for r in rows:
+        yield r[org_path], r["_day"], {k: r[k] for k in counts}
 
-def period_summary(org: Organization, start_day: date, end_day: date) -> dict:
-    qs = SchoolStatDaily.objects.filter(organization=org, day__gte=start_day, day__lte=end_day)
-    agg = {
-        "screened": 0, "red_flags": 0,
-        "applied": 0, "forwarded": 0, "approved": 0, "rejected": 0,
-        "enrollments_created": 0,
-        "supplies_delivered": 0,
-        "compliance_submitted": 0, "compliance_compliant": 0, "compliance_unable": 0,
-        "milestones_due": 0, "milestones_overdue": 0, "milestones_completed": 0,
-    }
-    for r in qs:
-        for k in agg.keys():
-            agg[k] += getattr(r, k, 0)
-    # convenience metrics
+@transaction.atomic
+def build_rollups_for_all_orgs(start_day: date, end_day: date | None = None, *, org_ids=None) -> int:
+    """Set-based rollup of every org (or `org_ids`) for a day range.
+
+    Each metric is one GROUP BY (organization_id, day) query over all orgs, and
+    the result is written with one bulk upsert. Orgs without source rows in the
+    range get no new rows; stale rows they already had are zeroed.
+
+    Returns:
+      Number of daily rows written.
+    """
+    end_day = end_day or start_day
+    if start_day > end_day:
+        return 0
+    tz = timezone.get_current_timezone()
+    start_dt, end_dt = _bounds_for_period(start_day, end_day)
+
+    def _scope(qs, org_path):
+        return qs.filter(**{f"{org_path}__in": org_ids}) if org_ids is not None else qs
+
+    def day_of(field):
+        return TruncDate(field, tzinfo=tz)
+
+    screenings = _scope(Screening.objects.filter(screened_at__range=(start_dt, end_dt)), "organization_id")
+    apps = _scope(Application.objects.all(), "organization_id")
+    comps = _scope(ComplianceSubmission.objects.filter(submitted_at__range=(start_dt, end_dt)),
+                   "monthly_supply__enrollment__organization_id")
+    milestones = _scope(ScreeningMilestone.objects.all(), "enrollment__organization_id")
+
+    sources = [
+        _grouped(screenings, day_of("screened_at"), "organization_id",
+                 screened=Count("id"), red_flags=Count("id", filter=Q(risk_level="RED"))),
+        _grouped(apps.filter(applied_at__range=(start_dt, end_dt)), day_of("applied_at"), "organization_id",
+                 applied=Count("id")),
+        _grouped(apps.filter(forwarded_at__range=(start_dt, end_dt)), day_of("forwarded_at"), "organization_id",
+                 forwarded=Count("id")),
+        _grouped(apps.filter(sapa_reviewed_at__range=(start_dt, end_dt), status__in=["APPROVED", "REJECTED"]),
+                 day_of("sapa_reviewed_at"), "organization_id",
+                 approved=Count("id", filter=Q(status="APPROVED")), rejected=Count("id", filter=Q(status="REJECTED"))),
+        _grouped(_scope(Enrollment.objects.filter(created_at__range=(start_dt, end_dt)), "organization_id"),
+                 day_of("created_at"), "organization_id", enrollments_created=Count("id")),
+        _grouped(_scope(MonthlySupply.objects.filter(delivered_on__gte=start_day, delivered_on__lte=end_day),
+                        "enrollment__organization_id"),
+                 F("delivered_on"), "enrollment__organization_id", supplies_delivered=Count("id")),
+        _grouped(comps, day_of("submitted_at"), "monthly_supply__enrollment__organization_id",
+                 compliance_submitted=Count("id"),
+                 compliance_compliant=Count("id", filter=Q(status="COMPLIANT")),
+                 compliance_unable=Count("id", filter=Q(status="UNABLE"))),
+        _grouped(milestones.filter(due_on__gte=start_day, due_on__lte=end_day), F("due_on"),
+                 "enrollment__organization_id", milestones_due=Count("id")),
+        _grouped(milestones.filter(status="OVERDUE", updated_at__range=(start_dt, end_dt)), day_of("updated_at"),
+                 "enrollment__organization_id", milestones_overdue=Count("id")),
+        _grouped(milestones.filter(status="COMPLETED", completed_at__range=(start_dt, end_dt)), day_of("completed_at"),
+                 "enrollment__organization_id", milestones_completed=Count("id")),
+    ]
+
+    by_org: dict[int, dict[date, dict]] = {}
+    for source in sources:
+        for org_id, day, counts in source:
+            by_org.setdefault(org_id, {}).setdefault(day, {}).update(counts)
+
+    # Active orgs get a row for every day in the range, like build_rollups_for_period_bulk.
+    days = [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+    now = timezone.now()
+    rows = [
+        SchoolStatDaily(organization_id=org_id, day=day, created_at=now,
+                        **{m: per_day.get(day, {}).get(m, 0) for m in ROLLUP_METRICS})
+        for org_id, per_day in by_org.items()
+        for day in days
+    ]
+    upsert_daily_rows(rows)
+
+    stale = SchoolStatDaily.objects.filter(day__gte=start_day, day__lte=end_day).exclude(organization_id__in=by_org)
+    if org_ids is not None:
+        stale = stale.filter(organization_id__in=org_ids)
+    stale_orgs = set(stale.values_list("organization_id", flat=True).distinct())
+    if stale_orgs:
+        stale.update(**{m: 0 for m in ROLLUP_METRICS})
+        bump_org_versions(stale_orgs)
+    refresh_monthly_rollups(start_day, end_day, org_ids=org_ids)
+
+    # Report-status rows (what build_daily_rollup's ensure_defaults() does, in bulk).
+    have_status = set(SchoolReportStatus.objects.filter(organization_id__in=by_org).values_list("organization_id", flat=True))
+    SchoolReportStatus.objects.bulk_create([
+        SchoolReportStatus(organization=org, next_due_on=org.created_at.date() + timedelta(days=180))
+        for org in Organization.objects.filter(id__in=set(by_org) - have_status)
+    ], ignore_conflicts=True)
+
+    return len(rows)
+
+def build_rollups_for_day(day: date) -> int:
+    return build_rollups_for_all_orgs(day, day)
+
+def _split_window(start_day: date, end_day: date):
+    """([(a, b), ...] daily edge ranges, (first_month, last_month) or None) covering the window."""
+    first_full = start_day if start_day.day == 1 else _next_month(start_day)
+    last_full_end = end_day if (end_day + timedelta(days=1)).day == 1 else _month_start(end_day) - timedelta(days=1)
+    if first_full > last_full_end:
+        return [(start_day, end_day)], None
+    edges = []
+    if start_day < first_full:
+        edges.append((start_day, first_full - timedelta(days=1)))
+    if last_full_end < end_day:
+        edges.append((last_full_end + timedelta(days=1), end_day))
+    return edges, (first_full, _month_start(last_full_end))
+
+def _with_rates(agg: dict) -> dict:
     agg["compliance_rate"] = round((agg["compliance_compliant"] / agg["compliance_submitted"]) * 100, 1) if agg["compliance_submitted"] else 0.0
     agg["red_rate"] = round((agg["red_flags"] / agg["screened"]) * 100, 1) if agg["screened"] else 0.0
     return agg
 
+def period_summaries(org_ids, start_day: date, end_day: date) -> dict[int, dict]:
+    """
+    period_summary for many orgs (org_ids=None: every org with rollups).
+    Whole months come from SchoolStatMonthly, the partial months at either end
+    from SchoolStatDaily; both are summed in the database, grouped by org.
+    """
+    totals: dict[int, dict] = {org_id: dict.fromkeys(ROLLUP_METRICS, 0) for org_id in (org_ids or [])}
+    if start_day > end_day:
+        return {org_id: _with_rates(t) for org_id, t in totals.items()}
+    edges, months = _split_window(start_day, end_day)
+    sums = {k: Sum(k) for k in ROLLUP_METRICS}
+
+    querysets = []
+    if edges:
+        in_edges = Q()
+        for a, b in edges:
+            in_edges |= Q(day__gte=a, day__lte=b)
+        querysets.append(SchoolStatDaily.objects.filter(in_edges))
+    if months:
+        querysets.append(SchoolStatMonthly.objects.filter(month__gte=months[0], month__lte=months[1]))
+    for qs in querysets:
+        if org_ids is not None:
+            qs = qs.filter(organization_id__in=org_ids)
+        for r in qs.values("organization_id").annotate(**sums).order_by():
+            t = totals.setdefault(r["organization_id"], dict.fromkeys(ROLLUP_METRICS, 0))
+            for k in ROLLUP_METRICS:
+                t[k] += r[k] or 0
+    return {org_id: _with_rates(t) for org_id, t in totals.items()}
+
+def period_summary(org: Organization, start_day: date, end_day: date) -> dict:
+    return period_summaries([org.id], start_day, end_day)[org.id]
+
+def _rate(part: str, whole: str):
+    return Case(
+        When(**{f"{whole}__gt": 0}, then=Round(F(part) * 100.0 / F(whole), 1)),
+        default=Value(0.0), output_field=FloatField(),
+    )
+
+def school_overview(start_day: date, end_day: date):
+    """
+    Schools and NGOs with their window totals (the period_summary keys shown on
+    the Inditech dashboard) and report status, as one grouped query over
+    SchoolStatDaily LEFT JOIN SchoolReportStatus. Returns a values() queryset,
+    so ordering and slicing stay in the database.
+
+    The day range sits in the join condition (FilteredRelation), so only the
+    window's rows are joined and grouped rather than every day on record.
+    """
+    sums = {k: Coalesce(Sum(f"window_stats__{k}"), 0) for k in ROLLUP_METRICS}
+    return (
+        Organization.objects
+        .filter(org_type__in=[Organization.OrgType.SCHOOL, Organization.OrgType.NGO])
+        .annotate(window_stats=FilteredRelation(
+            "daily_stats", condition=Q(daily_stats__day__gte=start_day, daily_stats__day__lte=end_day),
+        ))
+        .values("id", "name")
+        .annotate(
+            next_due_on=F("report_status__next_due_on"),
+            last_sent_at=F("report_status__last_sent_at"),
+            **sums,
+        )
+        .annotate(
+            compliance_rate=_rate("compliance_compliant", "compliance_submitted"),
+            red_rate=_rate("red_flags", "screened"),
+        )
+    )
+
 def six_month_window_ending(day: date):
     start = day - timedelta(days=180)
     return start, day
@@ -1,18 +1,39 @@
 from __future__ import annotations
-import csv, io, os
-from datetime import timedelta
-from celery import shared_task
-from django.core.mail import EmailMessage
+import csv, io, logging, os
+from datetime import date, timedelta
+from celery import chord, shared_task
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from accounts.models import Organization
-from .models import SchoolReportStatus
-from .services import build_rollups_for_day, period_summary, six_month_window_ending
+from .models import ExportJob, SchoolReportStatus
+from .services import build_rollups_for_all_orgs, build_rollups_for_day, period_summary, six_month_window_ending
+
+logger = logging.getLogger(__name__)
 
 @shared_task
 def build_daily_rollups():
     # roll up "yesterday" so the day is complete
     day = (timezone.now() - timedelta(days=1)).date()
-    build_rollups_for_day(day)
+    return build_rollups_for_day(day)
+
+@shared_task
+def drain_rollup_queue():
+    from .rollup_queue import drain_dirty_rollups
+    return drain_dirty_rollups()
+
+@shared_task
+def reconcile_recent_rollups(days: int | None = None):
+    """
+    Full rebuild of the last `days` days (today included) for every org.
+    Backstop for the incremental signal updates: fixes drift from writes that
+    bypass signals (queryset.update, bulk_create) or failed on_commit hooks.
+    """
+    days = days or settings.ROLLUP_RECONCILE_DAYS
+    today = timezone.localdate()
+    return build_rollups_for_all_orgs(today - timedelta(days=days - 1), today)
 
 def _make_school_performance_csv(org: Organization, start_day, end_day) -> bytes:
     agg = period_summary(org, start_day, end_day)
@@ -32,35 +53,146 @@ def _make_school_performance_csv(org: Organization, start_day, end_day) -> bytes
         w.writerow([k, agg.get(k, 0)])
     return buff.getvalue().encode("utf-8")
 
+def _report_recipients() -> list[str]:
+    return [e.strip() for e in (os.getenv("ESAPA_REPORT_TO","").split(",")) if e.strip()]
+
+def due_report_org_ids(today) -> list[int]:
+    """Orgs whose six-month report is due, in one query (no status row = default due date)."""
+    default_due_before = today - timedelta(days=180)
+    return list(
+        Organization.objects.filter(
+            Q(report_status__next_due_on__lte=today)
+            | Q(report_status__next_due_on__isnull=True, created_at__date__lte=default_due_before)
+        ).order_by("id").values_list("id", flat=True)
+    )
+
 @shared_task
 def send_due_school_reports():
-
-    today = timezone.now().date()
-    to_recipients = [e.strip() for e in (os.getenv("ESAPA_REPORT_TO","").split(",")) if e.strip()]
+    """
+    Fan out one build_school_report per due org and send the results from a
+    single deliver_school_reports callback (Celery chord).
+    """
+    today = timezone.localdate()
+    to_recipients = _report_recipients()
     if not to_recipients:
         return 0
+    org_ids = due_report_org_ids(today)
+    if not org_ids:
+        return 0
+    start, end = six_month_window_ending(today)
+    chord(
+        build_school_report.s(org_id, start.isoformat(), end.isoformat()) for org_id in org_ids
+    )(deliver_school_reports.s(start.isoformat(), end.isoformat(), to_recipients))
+    return len(org_ids)
+
+@shared_task
+def build_school_report(org_id: int, start: str, end: str) -> dict:
+    """CSV attachment for one org; failures are returned, not raised, so the chord still completes."""
+    try:
+        org = Organization.objects.get(pk=org_id)
+        start_day, end_day = date.fromisoformat(start), date.fromisoformat(end)
+        return {
+            "org_id": org_id,
+            "org_name": org.name,
+            "filename": f"{org.name.replace(' ','_')}_performance_{start}_{end}.csv",
+            "csv": _make_school_performance_csv(org, start_day, end_day).decode("utf-8"),
+        }
+    except Exception as exc:
+        logger.exception("Building the six-month report failed for org %s", org_id)
+        return {"org_id": org_id, "error": f"build failed: {exc}"}
+
+@shared_task
+def deliver_school_reports(reports: list[dict], start: str, end: str, to_recipients: list[str]) -> dict:
+    """
+    Send the built reports over one mail connection and record each org's
+    outcome. Only orgs whose email went out get next_due_on moved forward.
+    """
+    today = timezone.localdate()
+    start_day, end_day = date.fromisoformat(start), date.fromisoformat(end)
+    errors = {r["org_id"]: r["error"] for r in reports if "error" in r}
+    sent = []
+
+    connection = None
+    if len(errors) < len(reports):
+        try:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+        except Exception as exc:
+            logger.exception("Could not open the mail connection for six-month reports")
+            connection = None
+            errors.update({r["org_id"]: f"mail connection failed: {exc}" for r in reports if "error" not in r})
+
+    if connection is not None:
+        try:
+            for r in reports:
+                if "error" in r:
+                    continue
+                email = EmailMessage(
+                    subject=f"Nutrilift – {r['org_name']} six‑month performance report",
+                    body=(f"Attached is the performance report for {r['org_name']} covering {start} to {end}.\n"
+                          f"This export was generated automatically by the system."),
+                    to=to_recipients,
+                    connection=connection,
+                )
+                email.attach(r["filename"], r["csv"].encode("utf-8"), "text/csv")
+                try:
+                    if connection.send_messages([email]) != 1:
+                        raise RuntimeError("message was not accepted")
+                    sent.append(r["org_id"])
+                except Exception as exc:
+                    logger.exception("Sending the six-month report failed for org %s", r["org_id"])
+                    errors[r["org_id"]] = f"send failed: {exc}"
+        finally:
+            connection.close()
 
-    sent = 0
-    for org in Organization.objects.all().iterator():
-        rs, _ = SchoolReportStatus.objects.get_or_create(organization=org)
-        rs.ensure_defaults()
-        if rs.next_due_on and rs.next_due_on <= today:
-            start, end = six_month_window_ending(today)
-            csv_bytes = _make_school_performance_csv(org, start, end)
-            filename = f"{org.name.replace(' ','_')}_performance_{start}_{end}.csv"
-            email = EmailMessage(
-                subject=f"Nutrilift – {org.name} six‑month performance report",
-                body=(f"Attached is the performance report for {org.name} covering {start} to {end}.\n"
-                      f"This export was generated automatically by the system."),
-                to=to_recipients,
-            )
-            email.attach(filename, csv_bytes, "text/csv")
-            email.send(fail_silently=True)
-
-            rs.last_sent_at = timezone.now()
-            rs.last_period_start = start
-            rs.last_period_end = end
+    now = timezone.now()
+    statuses = SchoolReportStatus.objects.in_bulk([r["org_id"] for r in reports], field_name="organization_id")
+    for r in reports:
+        rs = statuses.get(r["org_id"])
+        if rs is None:
+            rs = statuses[r["org_id"]] = SchoolReportStatus(organization_id=r["org_id"])
+        rs.last_attempt_at = now
+        rs.updated_at = now
+        if r["org_id"] in errors:
+            rs.last_error = errors[r["org_id"]][:2000]
+        else:
+            rs.last_error = ""
+            rs.last_sent_at = now
+            rs.last_period_start = start_day
+            rs.last_period_end = end_day
             rs.next_due_on = today + timedelta(days=180)
-            rs.save(update_fields=["last_sent_at","last_period_start","last_period_end","next_due_on","updated_at"])
-            sent += 1
-    return sent
+    with transaction.atomic():
+        SchoolReportStatus.objects.bulk_update(
+            [rs for rs in statuses.values() if rs.pk],
+            ["last_attempt_at", "last_error", "last_sent_at", "last_period_start", "last_period_end",
+             "next_due_on", "updated_at"],
+        )
+        SchoolReportStatus.objects.bulk_create([rs for rs in statuses.values() if not rs.pk], ignore_conflicts=True)
+    return {"sent": len(sent), "failed": sorted(errors)}
+
+@shared_task
+def run_export_job(job_id: int):
+    from .exports import build_export
+
+    # Claim the job; a duplicate delivery of the same message finds it no longer PENDING.
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING, started_at=timezone.now(), updated_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    job = ExportJob.objects.select_related("organization").get(pk=job_id)
+    try:
+        build_export(job)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job_id)
+        ExportJob.objects.filter(pk=job_id).update(
+            status=ExportJob.Status.FAILED, error=str(exc)[:2000],
+            finished_at=timezone.now(), updated_at=timezone.now(),
+        )
+        return None
+    return job.file_name
+
+@shared_task
+def purge_expired_exports():
+    from .exports import purge_expired_exports as purge
+    return purge()
@@ -10,11 +10,16 @@ app_name = "reporting"
 urlpatterns = [
     path("reporting/school", school_dashboard, name="school_dashboard"),
     path("reporting/school/export.csv", export_school_csv, name="export_school_csv"),
+    path("reporting/school/funnel.csv", views.export_funnel_csv, name="export_funnel_csv"),
 
     path("reporting/inditech", inditech_dashboard, name="inditech_dashboard"),
     path("reporting/inditech/school/<int:org_id>", inditech_school, name="inditech_school"),
     path("reporting/inditech/school/<int:org_id>/export.csv", inditech_export_school_csv, name="inditech_export_school_csv"),
+    path("reporting/inditech/school/<int:org_id>/funnel.csv", views.inditech_export_funnel_csv, name="inditech_export_funnel_csv"),
     path("inditech/", views.inditech_console, name="inditech_console"),
+    path("reporting/exports", views.export_request, name="export_request"),
+    path("reporting/exports/<int:job_id>", views.export_status, name="export_status"),
+    path("reporting/exports/download/<str:token>", views.export_download, name="export_download"),
     path(
     "reporting/inditech/school/<int:org_id>/applications/<str:bucket>",
     inditech_school_applications,
@@ -0,0 +1,81 @@
+"""
+Per-organization cache for the reporting dashboards and CSV summaries.
+
+Entries are keyed by (org, view, window) plus the org's version counter.
+Every write of the org's SchoolStatDaily rows bumps the counter (see
+bump_org_versions callers in reporting.services / reporting.incremental /
+reporting.signals), so old entries are never read again and simply expire.
+
+Counters are bumped by Celery workers as well as web processes, so caching
+needs a cache they all share (CACHE_REDIS_URL). With the per-process locmem
+backend cached_for_org() builds every time, unless REPORTING_CACHE_ALLOW_LOCAL
+is set (the tests do).
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable, Iterable, TypeVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+T = TypeVar("T")
+
+_PREFIX = "reporting:view:v1"
+
+
+def _version_key(org_id: int) -> str:
+    return f"{_PREFIX}:ver:{org_id}"
+
+
+def org_version(org_id: int) -> int:
+    """Current version of the org's rollups."""
+    key = _version_key(org_id)
+    v = cache.get(key)
+    if v is None:
+        # Start from the clock, not 1: a counter lost to eviction must not
+        # come back at a value whose entries are still cached.
+        cache.add(key, time.time_ns(), timeout=None)
+        v = cache.get(key)
+    return v
+
+
+def _bump(org_ids) -> None:
+    for org_id in org_ids:
+        key = _version_key(org_id)
+        try:
+            cache.incr(key)
+        except ValueError:   # no counter yet (or evicted)
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_org_versions(org_ids: Iterable[int]) -> None:
+    """
+    Invalidate the orgs' cached views. Bumped now and again after commit, so a
+    reader that cached pre-commit data under the first bump is superseded.
+    """
+    org_ids = {org_id for org_id in org_ids if org_id}
+    if not org_ids:
+        return
+    _bump(org_ids)
+    transaction.on_commit(lambda: _bump(org_ids))
+
+
+def caching_enabled() -> bool:
+    """False on a per-process cache, where workers' version bumps would go unseen."""
+    return settings.REPORTING_CACHE_ALLOW_LOCAL or not isinstance(caches["default"], LocMemCache)
+
+
+def cached_for_org(org_id: int, view: str, window: tuple, build: Callable[[], T]) -> T:
+    """Return build() for (org, view, window), computing it only once per org version."""
+    if not caching_enabled():
+        return build()
+    parts = ":".join(str(w) for w in window)
+    key = f"{_PREFIX}:{org_id}:{view}:{parts}:{org_version(org_id)}"
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout=settings.REPORTING_CACHE_TIMEOUT)
+    return value
@@ -1,37 +1,89 @@
 from __future__ import annotations
 import csv, io
 from datetime import timedelta, date
-from django.http import HttpResponse, HttpResponseForbidden
-from django.shortcuts import render, get_object_or_404
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import redirect, render, get_object_or_404
 from django.utils import timezone
 from accounts.decorators import require_roles
 from accounts.models import Role, Organization
-from .models import SchoolStatDaily, SchoolReportStatus
-from .services import period_summary, six_month_window_ending
+from .models import ExportJob, SchoolStatDaily, SchoolReportStatus
+from .exports import download_url, get_export_storage, parquet_available, read_download_token, request_export
+from .services import period_summary, school_overview, six_month_window_ending
+from .funnel import funnel_csv, funnel_for_org
+from .view_cache import cached_for_org
 from django.contrib.auth.decorators import login_required
-from .services import period_summary, ensure_rollups_caught_up
+from .services import period_summary, ensure_rollups_caught_up, _bounds_for_period
 from assist.models import Application
+from audit.utils import audit_log
+from screening.flag_index import flag_prevalence
 
 def _six_months():
     end = timezone.now().date()
     start = end - timedelta(days=180)
     return start, end
 
+def _flag_prevalence(org, start: date, end: date):
+    return flag_prevalence(org, *_bounds_for_period(start, end))
+
+def _write_flag_rows(w, org, start: date, end: date):
+    w.writerow([])
+    w.writerow(["Flag", "Screenings", "Students"])
+    for r in _flag_prevalence(org, start, end):
+        w.writerow([r["code"], r["screenings"], r["students"]])
+
+def _summary_data(org, start: date, end: date) -> dict:
+    """Window aggregates + 30-day trend + flag prevalence, cached until the org's rollups change."""
+    def build():
+        last30 = end - timedelta(days=29)
+        return {
+            "agg": period_summary(org, start, end),
+            "trend": list(SchoolStatDaily.objects
+                          .filter(organization=org, day__gte=last30, day__lte=end)
+                          .order_by("day")),
+            "flag_prevalence": _flag_prevalence(org, start, end),
+        }
+    return cached_for_org(org.id, "summary", (start, end), build)
+
+def _summary_csv(org, start: date, end: date) -> bytes:
+    def build():
+        buff = io.StringIO()
+        w = csv.writer(buff)
+        w.writerow(["School", org.name])
+        w.writerow(["Period", f"{start} to {end}"])
+        w.writerow([])
+        w.writerow(["Metric","Value"])
+        for k,v in period_summary(org, start, end).items():
+            w.writerow([k, v])
+        _write_flag_rows(w, org, start, end)
+        return buff.getvalue().encode("utf-8")
+    return cached_for_org(org.id, "summary-csv", (start, end), build)
+
+def _funnel_csv_response(org, start: date, end: date) -> HttpResponse:
+    resp = HttpResponse(funnel_csv(org, start, end), content_type="text/csv")
+    resp["Content-Disposition"] = f'attachment; filename="{org.name.replace(" ","_")}_{start}_{end}_funnel.csv"'
+    return resp
+
+def _csv_response(org, start: date, end: date) -> HttpResponse:
+    resp = HttpResponse(_summary_csv(org, start, end), content_type="text/csv")
+    resp["Content-Disposition"] = f'attachment; filename="{org.name.replace(" ","_")}_{start}_{end}_summary.csv"'
+    return resp
+
 @require_roles(Role.ORG_ADMIN, allow_superuser=True)
 def school_dashboard(request):
     org = request.org
     if not org:
         return HttpResponseForbidden("Organization context required.")
     start, end = _six_months()
-    agg = period_summary(org, start, end)
-    # trend: last 30 days screened
-    last30 = end - timedelta(days=29)
-    trend = (SchoolStatDaily.objects
-             .filter(organization=org, day__gte=last30, day__lte=end)
-             .order_by("day"))
-
     rs, _ = SchoolReportStatus.objects.get_or_create(organization=org)
-    ctx = {"org": org, "start": start, "end": end, "agg": agg, "trend": trend, "report_status": rs}
+    ctx = {
+        "org": org, "start": start, "end": end, "report_status": rs,
+        **_summary_data(org, start, end),
+        "funnel": funnel_for_org(org, start, end),
+        "parquet_available": parquet_available(),
+    }
     return render(request, "reporting/school_dashboard.html", ctx)
 
 @require_roles(Role.ORG_ADMIN, allow_superuser=True)
@@ -46,36 +98,49 @@ def export_school_csv(request):
     start = _parse(request.GET.get("start")) or (timezone.now().date() - timedelta(days=180))
     end = _parse(request.GET.get("end")) or timezone.now().date()
 
-    agg = period_summary(org, start, end)
-    buff = io.StringIO()
-    w = csv.writer(buff)
-    w.writerow(["School", org.name])
-    w.writerow(["Period", f"{start} to {end}"])
-    w.writerow([])
-    w.writerow(["Metric","Value"])
-    for k,v in agg.items():
-        w.writerow([k, v])
-    resp = HttpResponse(buff.getvalue(), content_type="text/csv")
-    resp["Content-Disposition"] = f'attachment; filename="{org.name.replace(" ","_")}_{start}_{end}_summary.csv"'
-    return resp
+    return _csv_response(org, start, end)
+
+@require_roles(Role.ORG_ADMIN, allow_superuser=True)
+def export_funnel_csv(request):
+    org = request.org
+    if not org:
+        return HttpResponseForbidden("Organization context required.")
+    start, end = _six_months()
+    return _funnel_csv_response(org, start, end)
+
+# ?sort= keys for the Inditech overview; a leading "-" sorts descending.
+INDITECH_SORTS = {
+    "name": "name",
+    "screened": "screened",
+    "red": "red_flags",
+    "approved": "approved",
+    "compliance": "compliance_rate",
+    "due": "next_due_on",
+    "sent": "last_sent_at",
+}
+INDITECH_PAGE_SIZE = 50
 
 @require_roles(Role.INDITECH, allow_superuser=True)
 def inditech_dashboard(request):
-    # summary across all schools for the last 6 months + next_due_on
+    # summary across all schools for the last 6 months + next_due_on (read-only)
     start, end = _six_months()
-    rows = []
-    for org in Organization.objects.filter(
-        org_type__in=[Organization.OrgType.SCHOOL, Organization.OrgType.NGO]
-    ).order_by("name"):
-        agg = period_summary(org, start, end)
-        rs, _ = SchoolReportStatus.objects.get_or_create(organization=org)
-        rows.append({
-            "org": org,
-            "agg": agg,
-            "next_due_on": rs.next_due_on,
-            "last_sent_at": rs.last_sent_at,
-        })
-    return render(request, "reporting/inditech_dashboard.html", {"rows": rows, "start": start, "end": end})
+    sort = request.GET.get("sort") or "name"
+    desc = sort.startswith("-")
+    field = INDITECH_SORTS.get(sort.lstrip("-"))
+    if field is None:
+        sort, desc, field = "name", False, "name"
+    order = F(field).desc(nulls_last=True) if desc else F(field).asc(nulls_last=True)
+    qs = school_overview(start, end).order_by(order, "name", "id")
+
+    paginator = Paginator(qs, INDITECH_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    return render(request, "reporting/inditech_dashboard.html", {
+        "rows": page_obj.object_list,
+        "page_obj": page_obj,
+        "sort": sort,
+        "start": start,
+        "end": end,
+    })
 
 @require_roles(Role.INDITECH, allow_superuser=True)
 def inditech_school(request, org_id: int):
@@ -86,14 +151,11 @@ def inditech_school(request, org_id: int):
     )
 
     start, end = _six_months()
-    agg = period_summary(org, start, end)
     rs, _ = SchoolReportStatus.objects.get_or_create(organization=org)
-    # trend
-    last30 = end - timedelta(days=29)
-    trend = (SchoolStatDaily.objects
-             .filter(organization=org, day__gte=last30, day__lte=end)
-             .order_by("day"))
-    return render(request, "reporting/inditech_school.html", {"org": org, "agg": agg, "trend": trend, "start": start, "end": end, "report_status": rs})
+    return render(request, "reporting/inditech_school.html", {
+        "org": org, "start": start, "end": end, "report_status": rs, **_summary_data(org, start, end),
+        "funnel": funnel_for_org(org, start, end),
+    })
 
 @require_roles(Role.INDITECH, allow_superuser=True)
 def inditech_export_school_csv(request, org_id: int):
@@ -104,18 +166,18 @@ def inditech_export_school_csv(request, org_id: int):
     )
 
     start, end = _six_months()
-    agg = period_summary(org, start, end)
-    buff = io.StringIO()
-    w = csv.writer(buff)
-    w.writerow(["School", org.name])
-    w.writerow(["Period", f"{start} to {end}"])
-    w.writerow([])
-    w.writerow(["Metric","Value"])
-    for k,v in agg.items():
-        w.writerow([k, v])
-    resp = HttpResponse(buff.getvalue(), content_type="text/csv")
-    resp["Content-Disposition"] = f'attachment; filename="{org.name.replace(" ","_")}_{start}_{end}_summary.csv"'
-    return resp
+    return _csv_response(org, start, end)
+
+@require_roles(Role.INDITECH, allow_superuser=True)
+def inditech_export_funnel_csv(request, org_id: int):
+    org = get_object_or_404(
+        Organization,
+        pk=org_id,
+        org_type__in=[Organization.OrgType.SCHOOL, Organization.OrgType.NGO],
+    )
+
+    start, end = _six_months()
+    return _funnel_csv_response(org, start, end)
 
 @login_required
 def inditech_console(request):
@@ -168,3 +230,93 @@ def inditech_school_applications(request, org_id: int, bucket: str):
             "applications": apps,
         },
     )
+
+
+# --- Background exports --------------------------------------------------------
+
+def _can_access_export(request, job: ExportJob) -> bool:
+    if request.user.is_superuser:
+        return True
+    mem = getattr(request, "membership", None)
+    if not mem:
+        return False
+    if mem.role == Role.INDITECH:
+        return True
+    return bool(job.organization_id and request.org and request.org.id == job.organization_id)
+
+@require_roles(Role.ORG_ADMIN, Role.INDITECH, allow_superuser=True)
+def export_request(request):
+    """POST kind (+ fmt, start/end or since, org_id for Inditech) -> queued or reused ExportJob."""
+    if request.method != "POST":
+        return HttpResponse(status=405)
+    kind = request.POST.get("kind")
+    if kind not in ExportJob.Kind.values:
+        return HttpResponseForbidden("Unknown export kind")
+    fmt = request.POST.get("fmt") or ExportJob.Format.CSV_GZ
+    if fmt not in ExportJob.Format.values:
+        return HttpResponseForbidden("Unknown export format")
+    if fmt == ExportJob.Format.PARQUET and not parquet_available():
+        return HttpResponse("Parquet export is not available on this server", status=400)
+
+    mem = getattr(request, "membership", None)
+    is_inditech = request.user.is_superuser or (mem and mem.role == Role.INDITECH)
+    org = request.org
+    if is_inditech and request.POST.get("org_id"):
+        org = get_object_or_404(Organization, pk=request.POST["org_id"])
+    if kind == ExportJob.Kind.ALL_SCHOOLS_SUMMARY:
+        if not is_inditech:
+            return HttpResponseForbidden("Insufficient role.")
+        org = None
+    elif not org:
+        return HttpResponseForbidden("Organization context required.")
+
+    def _parse(d):
+        try: return date.fromisoformat(d)
+        except Exception: return None
+    # Concrete dates so "last 6 months" requests made on the same day share an artifact.
+    default_end = timezone.localdate()
+    default_start = default_end - timedelta(days=180)
+    if kind in (ExportJob.Kind.SCREENINGS, ExportJob.Kind.SCREENINGS_WIDE):
+        params = {"since": (_parse(request.POST.get("since")) or default_start).isoformat(),
+                  "until": (_parse(request.POST.get("until")) or default_end).isoformat()}
+    else:
+        params = {"start": (_parse(request.POST.get("start")) or default_start).isoformat(),
+                  "end": (_parse(request.POST.get("end")) or default_end).isoformat()}
+
+    job, created = request_export(org=org, kind=kind, params=params, user=request.user, fmt=fmt)
+    audit_log(request.user, org, "EXPORT_REQUESTED", target=job,
+              payload={"kind": kind, "fmt": fmt, "params": params, "reused": not created})
+    return redirect("reporting:export_status", job_id=job.id)
+
+@login_required
+def export_status(request, job_id: int):
+    job = get_object_or_404(ExportJob.objects.select_related("organization"), pk=job_id)
+    if not _can_access_export(request, job):
+        return HttpResponseForbidden("Forbidden")
+    url = download_url(job) if job.status == ExportJob.Status.DONE else None
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "id": job.id, "status": job.status, "progress_rows": job.progress_rows,
+            "total_rows": job.total_rows, "percent": job.progress_percent,
+            "download_url": url, "error": job.error or None,
+        })
+    return render(request, "reporting/export_job.html", {"job": job, "download_url": url})
+
+@login_required
+def export_download(request, token: str):
+    try:
+        job_id = read_download_token(token)
+    except signing.BadSignature:
+        return HttpResponseForbidden("Download link is invalid or has expired.")
+    job = get_object_or_404(ExportJob.objects.select_related("organization"), pk=job_id)
+    if not _can_access_export(request, job):
+        return HttpResponseForbidden("Forbidden")
+    if job.status != ExportJob.Status.DONE or not job.file_name:
+        raise Http404("Export is not available")
+    storage = get_export_storage()
+    if not storage.exists(job.file_name):
+        raise Http404("Export is not available")
+    audit_log(request.user, job.organization, "EXPORT_DOWNLOADED", target=job)
+    content_type = "application/gzip" if job.fmt == ExportJob.Format.CSV_GZ else "application/octet-stream"
+    return FileResponse(storage.open(job.file_name, "rb"), as_attachment=True,
+                        filename=job.download_filename, content_type=content_type)
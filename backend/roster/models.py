@@ -46,6 +46,17 @@ class Guardian(TimeStampedModel):
             return f"Guardian {self.pid[:8]}"
         return f"Guardian {self.pk}"
 
+def student_display_name(first_name, last_name, student_code, pid) -> str:
+    """Student.full_name from bare column values (for values() readers such as exports)."""
+    # Backwards-compatible display string WITHOUT storing real PII.
+    if first_name or last_name:
+        return f"{first_name or ''} {last_name or ''}".strip()
+    if student_code:
+        return f"Student {student_code}"
+    if pid:
+        return f"Student {pid[:8]}"
+    return "Student"
+
 class Student(TimeStampedModel):
     class Gender(models.TextChoices):
         MALE = "M", "Male"
@@ -82,14 +93,7 @@ class Student(TimeStampedModel):
 
     @property
     def full_name(self) -> str:
-        # Backwards-compatible display string WITHOUT storing real PII.
-        if self.first_name or self.last_name:
-            return f"{self.first_name or ''} {self.last_name or ''}".strip()
-        if self.student_code:
-            return f"Student {self.student_code}"
-        if self.pid:
-            return f"Student {self.pid[:8]}"
-        return "Student"
+        return student_display_name(self.first_name, self.last_name, self.student_code, self.pid)
 
 
 class StudentGuardian(TimeStampedModel):
@@ -4,5 +4,5 @@ from .models import Screening
 @admin.register(Screening)
 class ScreeningAdmin(admin.ModelAdmin):
     list_display = ("student", "organization", "risk_level", "screened_at")
-    list_filter = ("organization", "risk_level", "screened_at")
+    list_filter = ("organization", "risk_level", "risk_rules_version", "screened_at")
     search_fields = ("student__first_name", "student__last_name")
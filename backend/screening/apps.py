@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ScreeningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'screening'
+
+    def ready(self):
+        # Register signal handlers that keep ScreeningFlag in sync with red_flags.
+        from . import signals  # noqa: F401
@@ -1,7 +1,10 @@
 import json
+from bisect import bisect_left
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
+
+import numpy as np
 
 _DATA_DIR = Path(__file__).resolve().parent / "data"
 _BOYS_FILE = _DATA_DIR / "bmi_boys_5_18.json"
@@ -14,25 +17,132 @@ def _load_table(sex: str) -> Dict[float, Dict[str, float]]:
     raw = json.loads(path.read_text(encoding="utf-8"))
     return {float(k): {"median": float(v["median"]), "sd": float(v["sd"])} for k, v in raw.items()}
 
+
+class BmiReference:
+    """
+    BMI-for-age reference for one sex, held as sorted NumPy arrays (age, median, SD).
+
+    Lookups are O(log n): bisect for single values, searchsorted for arrays.
+    By default the nearest tabulated age is used (ties go to the younger age);
+    with interpolate=True median and SD are interpolated linearly between ages.
+    """
+
+    def __init__(self, table: Dict[float, Dict[str, float]]):
+        ages = sorted(table.keys())
+        self.ages = np.array(ages, dtype=np.float64)
+        self.medians = np.array([table[a]["median"] for a in ages], dtype=np.float64)
+        self.sds = np.array([table[a]["sd"] for a in ages], dtype=np.float64)
+        if len(ages) < 2:
+            raise ValueError("BMI reference table needs at least two ages")
+        if (self.sds <= 0).any():
+            raise ValueError("Invalid SD in BMI reference table")
+        # Plain lists for the scalar (per-screening) path; bisect beats NumPy on one value.
+        self._ages = ages
+        self._medians = self.medians.tolist()
+        self._sds = self.sds.tolist()
+
+    # -- single value (web path) ------------------------------------------------
+
+    def nearest_age(self, age_years: float) -> float:
+        return self._ages[self._nearest_pos(float(age_years))]
+
+    def _nearest_pos(self, age: float) -> int:
+        ages = self._ages
+        hi = min(max(bisect_left(ages, age), 1), len(ages) - 1)
+        lo = hi - 1
+        return hi if abs(ages[hi] - age) < abs(ages[lo] - age) else lo
+
+    def lookup(self, age_years: float, *, interpolate: bool = False) -> Tuple[float, float, float]:
+        """Returns (ref_age_used, median, sd) for one age."""
+        age = float(age_years)
+        if not interpolate:
+            i = self._nearest_pos(age)
+            return self._ages[i], self._medians[i], self._sds[i]
+
+        ages = self._ages
+        if age <= ages[0]:
+            return ages[0], self._medians[0], self._sds[0]
+        if age >= ages[-1]:
+            return ages[-1], self._medians[-1], self._sds[-1]
+        hi = bisect_left(ages, age)
+        lo = hi - 1
+        t = (age - ages[lo]) / (ages[hi] - ages[lo])
+        median = self._medians[lo] + t * (self._medians[hi] - self._medians[lo])
+        sd = self._sds[lo] + t * (self._sds[hi] - self._sds[lo])
+        return age, median, sd
+
+    # -- arrays (batch re-scoring) ----------------------------------------------
+
+    def lookup_many(self, age_years: np.ndarray, *, interpolate: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorised lookup(); returns (ref_age_used, median, sd) arrays."""
+        ages = np.asarray(age_years, dtype=np.float64)
+        if interpolate:
+            clipped = np.clip(ages, self.ages[0], self.ages[-1])
+            return clipped, np.interp(clipped, self.ages, self.medians), np.interp(clipped, self.ages, self.sds)
+
+        hi = np.clip(np.searchsorted(self.ages, ages), 1, len(self.ages) - 1)
+        lo = hi - 1
+        idx = np.where(np.abs(self.ages[hi] - ages) < np.abs(self.ages[lo] - ages), hi, lo)
+        return self.ages[idx], self.medians[idx], self.sds[idx]
+
+
+class BmiReferenceIndex:
+    """Both sexes; each BmiReference is built once on first use and then shared."""
+
+    def __init__(self):
+        self._by_sex: Dict[str, BmiReference] = {}
+
+    def for_sex(self, sex: str) -> BmiReference:
+        key = "M" if (sex or "").upper() == "M" else "F"
+        ref = self._by_sex.get(key)
+        if ref is None:
+            ref = BmiReference(_load_table(key))
+            self._by_sex[key] = ref
+        return ref
+
+
+# Shared by the web path (bmi_to_baz) and batch re-scoring (bmi_to_baz_many).
+BMI_REFERENCE = BmiReferenceIndex()
+
+
 def nearest_age_key(age_years: float, sex: str) -> float:
-    table = _load_table(sex)
-    ages = sorted(table.keys())
-    if age_years <= ages[0]:
-        return ages[0]
-    if age_years >= ages[-1]:
-        return ages[-1]
-    return min(ages, key=lambda a: abs(a - age_years))
-
-def bmi_to_baz(*, bmi: float, age_years: float, sex: str) -> Tuple[float, float, float, float]:
+    return BMI_REFERENCE.for_sex(sex).nearest_age(age_years)
+
+def bmi_to_baz(*, bmi: float, age_years: float, sex: str, interpolate: bool = False) -> Tuple[float, float, float, float]:
     """
     BAZ = (BMI - median) / SD
     Returns: (baz, ref_age_used, median, sd)
     """
-    ref_age = nearest_age_key(age_years, sex)
-    ref = _load_table(sex)[ref_age]
-    median = ref["median"]
-    sd = ref["sd"]
-    if sd <= 0:
-        raise ValueError("Invalid SD in BMI reference table")
+    ref_age, median, sd = BMI_REFERENCE.for_sex(sex).lookup(age_years, interpolate=interpolate)
     baz = (float(bmi) - float(median)) / float(sd)
     return baz, ref_age, median, sd
+
+def bmi_to_baz_many(
+    *,
+    bmi: np.ndarray,
+    age_years: np.ndarray,
+    sex: Union[str, np.ndarray],
+    interpolate: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorised bmi_to_baz(). ``sex`` is one code for all rows or an array of codes
+    ("M" = boys table, anything else = girls table).
+    Returns: (baz, ref_age_used, median, sd) arrays.
+    """
+    bmi = np.asarray(bmi, dtype=np.float64)
+    age_years = np.asarray(age_years, dtype=np.float64)
+
+    if isinstance(sex, str):
+        ref_age, median, sd = BMI_REFERENCE.for_sex(sex).lookup_many(age_years, interpolate=interpolate)
+        return (bmi - median) / sd, ref_age, median, sd
+
+    is_m = np.array([(s or "").upper() == "M" for s in sex], dtype=bool)
+    ref_age = np.empty_like(age_years)
+    median = np.empty_like(age_years)
+    sd = np.empty_like(age_years)
+    for code, rows in (("M", is_m), ("F", ~is_m)):
+        if rows.any():
+            ref_age[rows], median[rows], sd[rows] = BMI_REFERENCE.for_sex(code).lookup_many(
+                age_years[rows], interpolate=interpolate
+            )
+    return (bmi - median) / sd, ref_age, median, sd
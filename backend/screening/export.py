@@ -1,11 +1,155 @@
 import csv
-from datetime import timedelta
-from django.http import HttpResponse
+from datetime import date, timedelta
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from accounts.decorators import require_roles
 from accounts.models import Role
 from .models import Screening
 from audit.utils import audit_log
+from roster.models import student_display_name
+from reporting.exports import Column, ExportSource, csv_cell
+from reporting.services import _bounds_for_period
+from .forms import SCREENING_ANSWER_COLUMNS, _coerce_bool
+
+# Rows fetched per query while streaming; memory stays flat regardless of export size.
+EXPORT_CHUNK_SIZE = 2000
+
+_EXPORT_COLUMNS = (
+    "id", "screened_at", "gender", "age_years", "height_cm", "weight_kg", "risk_level", "red_flags",
+    "student__first_name", "student__last_name", "student__student_code", "student__pid",
+    "student__classroom__grade", "student__classroom__division",
+    "student__primary_guardian__phone_e164",
+)
+
+class Echo:
+    """File-like object for csv.writer: write() returns the line instead of buffering it."""
+    def write(self, value):
+        return value
+
+def iter_screening_chunks(qs, chunk_size: int = None, fields=_EXPORT_COLUMNS):
+    """
+    Yield lists of values_list() tuples, newest first.
+
+    Keyset pagination on (screened_at, id) instead of one big cursor: MySQL's
+    client buffers a whole result set, so each chunk is its own small query.
+    `fields` must start with ("id", "screened_at").
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    last = None
+    while True:
+        page = qs
+        if last is not None:
+            last_at, last_id = last
+            page = page.filter(Q(screened_at__lt=last_at) | Q(screened_at=last_at, id__lt=last_id))
+        rows = list(page.order_by("-screened_at", "-id").values_list(*fields)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last = (rows[-1][1], rows[-1][0])
+
+def _classroom_label(grade, division):
+    if grade is None:
+        return None
+    return f"{grade}{('-' + division) if division else ''}"
+
+EXPORT_COLUMNS = (
+    Column("Screened At"), Column("Student Name"), Column("Gender", "category"),
+    Column("Age (years)", "float"), Column("Classroom", "category"), Column("Parent Phone"),
+    Column("Height (cm)", "float"), Column("Weight (kg)", "float"), Column("BMI (approx)", "float"),
+    Column("Risk", "category"), Column("Red Flags"),
+)
+
+def iter_export_rows(qs, chunk_size: int = None):
+    """Yield lists of EXPORT_COLUMNS rows; empty cells are None."""
+    for chunk in iter_screening_chunks(qs, chunk_size):
+        rows = []
+        for (_id, screened_at, gender, age_years, height_cm, weight_kg, risk_level, red_flags,
+             first_name, last_name, student_code, pid, grade, division, phone) in chunk:
+            # compute BMI for export only
+            bmi = None
+            if height_cm and weight_kg and float(height_cm) > 0:
+                h = float(height_cm) / 100.0
+                bmi = round(float(weight_kg) / (h*h), 1)
+            rows.append([
+                screened_at.strftime("%Y-%m-%d %H:%M"),
+                student_display_name(first_name, last_name, student_code, pid),
+                gender,
+                age_years or None,
+                _classroom_label(grade, division),
+                phone or None,
+                height_cm or None,
+                weight_kg or None,
+                bmi,
+                risk_level,
+                ";".join(red_flags or []),
+            ])
+        yield rows
+
+def screenings_export_source(job) -> ExportSource:
+    """ExportJob source; params: since/until as ISO dates (until inclusive, optional)."""
+    qs = _job_queryset(job)
+    return ExportSource(columns=EXPORT_COLUMNS, chunks=iter_export_rows(qs), total=qs.count())
+
+# --- Wide export: one column per Screening.answers key ------------------------
+
+_WIDE_FIELDS = (
+    "id", "screened_at", "student_id", "pid", "student__pid", "student__classroom__grade", "student__classroom__division",
+    "gender", "age_years", "age_months", "height_cm", "weight_kg", "muac_cm", "bmi", "baz",
+    "risk_level", "risk_rules_version", "red_flags", "is_low_income_at_screen", "answers",
+)
+
+# No names or phone numbers: this export is meant for analysis, keyed by PID.
+WIDE_EXPORT_COLUMNS = (
+    Column("screening_id", "int"), Column("screened_at", "timestamp"), Column("student_id", "int"),
+    Column("pid"), Column("classroom", "category"), Column("gender", "category"),
+    Column("age_years", "float"), Column("age_months", "int"), Column("height_cm", "float"),
+    Column("weight_kg", "float"), Column("muac_cm", "float"), Column("bmi", "float"), Column("baz", "float"),
+    Column("risk_level", "category"), Column("risk_rules_version", "int"), Column("red_flags"),
+    Column("is_low_income", "bool"),
+) + tuple(Column(key, type_) for key, type_ in SCREENING_ANSWER_COLUMNS)
+
+def _answer_value(v, type_):
+    """Coerce one stored answer to its column type; unknown/legacy values become None."""
+    if v is None or v == "":
+        return None
+    if type_ == "bool":
+        return _coerce_bool(v)
+    try:
+        if type_ == "int":
+            return int(float(v))
+        if type_ == "float":
+            return float(v)
+    except (TypeError, ValueError):
+        return None
+    return str(v)
+
+def iter_wide_rows(qs, chunk_size: int = None):
+    """Yield lists of WIDE_EXPORT_COLUMNS rows."""
+    for chunk in iter_screening_chunks(qs, chunk_size, fields=_WIDE_FIELDS):
+        rows = []
+        for (sid, screened_at, student_id, pid, student_pid, grade, division, gender, age_years, age_months,
+             height_cm, weight_kg, muac_cm, bmi, baz, risk_level, rules_version, red_flags,
+             low_income, answers) in chunk:
+            answers = answers or {}
+            rows.append([
+                sid, screened_at, student_id, pid or student_pid, _classroom_label(grade, division), gender,
+                age_years, age_months, height_cm, weight_kg, muac_cm, bmi, baz,
+                risk_level, rules_version, ";".join(red_flags or []), low_income,
+                *[_answer_value(answers.get(key), type_) for key, type_ in SCREENING_ANSWER_COLUMNS],
+            ])
+        yield rows
+
+def _job_queryset(job):
+    since = date.fromisoformat(job.params["since"])
+    until = date.fromisoformat(job.params["until"]) if job.params.get("until") else timezone.localdate()
+    return Screening.objects.filter(
+        organization_id=job.organization_id, screened_at__range=_bounds_for_period(since, until)
+    )
+
+def screenings_wide_source(job) -> ExportSource:
+    qs = _job_queryset(job)
+    return ExportSource(columns=WIDE_EXPORT_COLUMNS, chunks=iter_wide_rows(qs), total=qs.count())
 
 @require_roles(Role.ORG_ADMIN, Role.INDITECH, allow_superuser=True)
 def export_screenings_csv(request):
@@ -24,39 +168,61 @@ def export_screenings_csv(request):
     else:
         since = timezone.now() - timedelta(days=180)
 
-    qs = (Screening.objects
-          .select_related("student", "student__classroom", "student__primary_guardian")
-          .filter(organization=org, screened_at__gte=since)
-          .order_by("-screened_at"))
-    audit_log(request.user, org, "CSV_EXPORTED", payload={"count": qs.count()})
-    
-    response = HttpResponse(content_type="text/csv")
+    qs = Screening.objects.filter(organization=org, screened_at__gte=since)
+    user = request.user
+
+    def rows():
+        writer = csv.writer(Echo())
+        count = 0
+        complete = False
+        try:
+            yield writer.writerow([c.name for c in EXPORT_COLUMNS])
+            for chunk in iter_export_rows(qs):
+                count += len(chunk)
+                yield "".join(writer.writerow(row) for row in chunk)
+            complete = True
+        finally:
+            # Logged once streaming ends, with the number of rows actually sent.
+            audit_log(user, org, "CSV_EXPORTED", payload={"count": count, "complete": complete})
+
+    response = StreamingHttpResponse(rows(), content_type="text/csv")
     response["Content-Disposition"] = 'attachment; filename="screenings.csv"'
-    writer = csv.writer(response)
-    writer.writerow([
-        "Screened At", "Student Name", "Gender", "Age (years)", "Classroom",
-        "Parent Phone", "Height (cm)", "Weight (kg)", "BMI (approx)",
-        "Risk", "Red Flags"
-    ])
-    for s in qs:
-        # compute BMI for export only
-        bmi = ""
-        if s.height_cm and s.weight_kg and float(s.height_cm) > 0:
-            h = float(s.height_cm) / 100.0
-            bmi = round(float(s.weight_kg) / (h*h), 1)
-        guardian_phone = s.student.primary_guardian.phone_e164 if s.student.primary_guardian else ""
-        classroom = s.student.classroom or ""
-        writer.writerow([
-            s.screened_at.strftime("%Y-%m-%d %H:%M"),
-            s.student.full_name,
-            s.gender,
-            s.age_years or "",
-            str(classroom),
-            guardian_phone,
-            s.height_cm or "",
-            s.weight_kg or "",
-            bmi,
-            s.risk_level,
-            ";".join(s.red_flags or []),
-        ])
+    return response
+
+@require_roles(Role.ORG_ADMIN, Role.INDITECH, allow_superuser=True)
+def export_screenings_wide_csv(request):
+    """
+    Every Section A–F answer as its own column (see WIDE_EXPORT_COLUMNS), streamed.
+    ?since=/&until= are ISO dates (default: last 180 days). Booleans are true/false,
+    timestamps ISO 8601, missing values empty.
+    """
+    org = getattr(request, "org", None)
+    if not org:
+        return HttpResponse("Organization context required", status=403)
+
+    def _parse(d):
+        try: return date.fromisoformat(d)
+        except Exception: return None
+    until = _parse(request.GET.get("until") or "") or timezone.localdate()
+    since = _parse(request.GET.get("since") or "") or (until - timedelta(days=180))
+
+    qs = Screening.objects.filter(organization=org, screened_at__range=_bounds_for_period(since, until))
+    user = request.user
+
+    def rows():
+        writer = csv.writer(Echo())
+        count = 0
+        complete = False
+        try:
+            yield writer.writerow([c.name for c in WIDE_EXPORT_COLUMNS])
+            for chunk in iter_wide_rows(qs):
+                count += len(chunk)
+                yield "".join(writer.writerow([csv_cell(v) for v in row]) for row in chunk)
+            complete = True
+        finally:
+            audit_log(user, org, "CSV_EXPORTED",
+                      payload={"kind": "screenings_wide", "count": count, "complete": complete})
+
+    response = StreamingHttpResponse(rows(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="screenings_wide_{since}_{until}.csv"'
     return response
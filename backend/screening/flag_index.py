@@ -0,0 +1,103 @@
+"""
+ScreeningFlag maintenance + prevalence queries.
+
+Screening.red_flags mixes reason codes ("health_pallor", "food_insecurity", ...)
+with debug strings ("baz=-1.23", "bmi=15.2"). Only the reason codes are indexed.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Count
+
+from accounts.models import Organization
+from .models import Screening, ScreeningFlag
+
+# (screening_id, organization_id, screened_at, red_flags)
+FlagSource = Tuple[int, int, datetime, Optional[Sequence[str]]]
+
+
+def flag_codes(red_flags: Optional[Sequence[str]]) -> List[str]:
+    """Distinct reason codes in stored order, without the "key=value" debug strings."""
+    seen: List[str] = []
+    for f in red_flags or []:
+        if isinstance(f, str) and f and "=" not in f and f not in seen:
+            seen.append(f[:64])
+    return seen
+
+
+def replace_screening_flags(rows: Iterable[FlagSource], *, created: bool = False) -> int:
+    """
+    (Re)write the ScreeningFlag rows for the given screenings.
+
+    created=True skips the delete for screenings that cannot have rows yet.
+    Returns the number of flag rows written.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    objs = [
+        ScreeningFlag(screening_id=sid, organization_id=org_id, code=code, screened_at=screened_at)
+        for sid, org_id, screened_at, red_flags in rows
+        for code in flag_codes(red_flags)
+    ]
+    with transaction.atomic():
+        if not created:
+            ScreeningFlag.objects.filter(screening_id__in=[r[0] for r in rows]).delete()
+        ScreeningFlag.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
+
+
+def sync_screening_flags(screening: Screening, *, created: bool = False) -> int:
+    return replace_screening_flags(
+        [(screening.pk, screening.organization_id, screening.screened_at, screening.red_flags)],
+        created=created,
+    )
+
+
+def flag_prevalence(
+    org: Organization,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    *,
+    codes: Optional[Iterable[str]] = None,
+) -> List[Dict]:
+    """
+    Per-code counts for one org (optionally within [start, end] on screened_at).
+
+    One GROUP BY over ScreeningFlag; returns
+    [{"code": ..., "screenings": n, "students": m}, ...] ordered by students desc.
+    """
+    qs = ScreeningFlag.objects.filter(organization=org)
+    if start is not None:
+        qs = qs.filter(screened_at__gte=start)
+    if end is not None:
+        qs = qs.filter(screened_at__lte=end)
+    if codes is not None:
+        qs = qs.filter(code__in=list(codes))
+    return list(
+        qs.values("code")
+        .annotate(
+            screenings=Count("screening_id"),
+            students=Count("screening__student_id", distinct=True),
+        )
+        .order_by("-students", "code")
+    )
+
+
+def students_with_any_flag(
+    org: Organization,
+    codes: Iterable[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> int:
+    """Distinct students with at least one of ``codes`` (e.g. health_pallor OR food_insecurity)."""
+    qs = ScreeningFlag.objects.filter(organization=org, code__in=list(codes))
+    if start is not None:
+        qs = qs.filter(screened_at__gte=start)
+    if end is not None:
+        qs = qs.filter(screened_at__lte=end)
+    return qs.aggregate(n=Count("screening__student_id", distinct=True))["n"] or 0
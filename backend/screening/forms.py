@@ -63,6 +63,55 @@ def YesNoField(label: str, *, required: bool = True):
         widget=forms.RadioSelect,
     )
 
+# Keys NewScreeningForm.clean() writes into Screening.answers, in order, with the
+# column type used by the wide export (screening.export). Keep in sync with clean().
+SCREENING_ANSWER_COLUMNS = (
+    # A
+    ("unique_student_id", "string"),
+    ("sex", "category"),
+    # B
+    ("weight_kg_r1", "float"),
+    ("height_cm_r1", "float"),
+    ("muac_tape_color", "category"),
+    # C
+    ("health_general_poor", "bool"),
+    ("health_pallor", "bool"),
+    ("health_fatigue_dizzy_faint", "bool"),
+    ("health_breathlessness", "bool"),
+    ("health_frequent_infections", "bool"),
+    ("health_chronic_cough_or_diarrhea", "bool"),
+    ("health_visible_worms", "bool"),
+    ("health_dental_or_gum_or_ulcers", "bool"),
+    ("health_night_vision_difficulty", "bool"),
+    ("health_bone_or_joint_pain", "bool"),
+    ("appetite", "bool"),
+    ("menarche_started", "bool"),
+    ("menarche_age_years", "float"),
+    ("pads_per_day", "int"),
+    ("bleeding_clots", "bool"),
+    ("cycle_length_days", "category"),
+    ("bleeding_days", "int"),
+    # D
+    ("diet_type", "category"),
+    ("breakfast_eaten", "bool"),
+    ("lunch_eaten", "bool"),
+    ("green_leafy_veg", "bool"),
+    ("other_vegetables", "bool"),
+    ("fruits", "bool"),
+    ("dal_pulses_beans", "bool"),
+    ("milk_curd", "bool"),
+    ("egg", "bool"),
+    ("fish_chicken_meat", "bool"),
+    ("nuts_groundnuts", "bool"),
+    ("millet_whole_grains", "bool"),
+    ("ssb_or_packaged_snacks", "bool"),
+    # E
+    ("deworming_taken", "category"),
+    ("deworming_date", "int"),  # months ago
+    # F
+    ("hunger_vital_sign", "category"),
+)
+
 class NewScreeningForm(forms.ModelForm):
     # SECTION A
     student_name = forms.CharField(label="Student Name", max_length=255, required=True)
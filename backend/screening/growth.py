@@ -0,0 +1,292 @@
+"""
+Longitudinal growth per child (organization, pid).
+
+All screenings for one PID, a set of PIDs or a whole classroom are read in one
+query, sorted by (pid, screened_at), and height / weight / BAZ deltas and
+per-month velocities are computed with NumPy over the whole batch at once.
+
+Each interval is checked for implausible jumps (likely measurement errors) and
+faltering growth. Results are cached per PID; the Screening signals and bulk
+writers call invalidate_trajectories() when a PID's screenings change.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Screening
+
+DAYS_PER_MONTH = 30.4375
+
+# Implausible: more than 10 cm / 10 kg change per ~6 months (the old
+# _warn_if_large_change rule), scaled up for longer gaps; or height shrinking
+# beyond measurement error.
+MAX_CHANGE_PER_6_MONTHS = 10.0
+HEIGHT_SHRINK_TOLERANCE_CM = 1.0
+
+# Faltering
+BAZ_FALTER_DROP = 0.67         # one centile band, within WEIGHT_TREND_MONTHS
+WEIGHT_LOSS_FRACTION = 0.05    # >5 % body weight lost between screenings
+HEIGHT_STALL_MONTHS = 6.0      # no height gain over at least this long
+HEIGHT_STALL_CM = 0.5
+WEIGHT_TREND_MONTHS = 12.0
+
+GROWTH_CACHE_SECONDS = getattr(settings, "GROWTH_CACHE_SECONDS", 7 * 24 * 3600)
+
+FLAG_TEXT = {
+    "height_jump": "Height changed by more than expected since the last screening. Please verify readings.",
+    "height_shrink": "Height is lower than at the last screening. Please verify readings.",
+    "weight_jump": "Weight changed by more than expected since the last screening. Please verify readings.",
+    "weight_loss": "Weight dropped by more than 5% since the last screening.",
+    "height_stalled": "Height has not increased in 6+ months.",
+    "baz_faltering": "BMI-for-age has dropped by more than one centile band in the last year.",
+}
+IMPLAUSIBLE_FLAGS = ("height_jump", "height_shrink", "weight_jump")
+
+
+@dataclass
+class GrowthInterval:
+    from_screening_id: int
+    to_screening_id: int
+    months: float
+    height_delta: Optional[float]
+    weight_delta: Optional[float]
+    baz_delta: Optional[float]
+    height_velocity: Optional[float]   # cm / month
+    weight_velocity: Optional[float]   # kg / month
+    baz_velocity: Optional[float]      # SD / month
+    flags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Trajectory:
+    organization_id: int
+    pid: str
+    screening_ids: List[int]
+    screened_at: List[datetime]
+    height_cm: List[Optional[float]]
+    weight_kg: List[Optional[float]]
+    baz: List[Optional[float]]
+    intervals: List[GrowthInterval]
+    flags: List[str]   # current status: latest interval + BAZ trend
+
+    @property
+    def latest_interval(self) -> Optional[GrowthInterval]:
+        return self.intervals[-1] if self.intervals else None
+
+    @property
+    def is_faltering(self) -> bool:
+        return any(f not in IMPLAUSIBLE_FLAGS for f in self.flags)
+
+    @property
+    def needs_review(self) -> bool:
+        return any(f in IMPLAUSIBLE_FLAGS for f in self.flags)
+
+    @property
+    def messages(self) -> List[str]:
+        return [FLAG_TEXT[f] for f in self.flags]
+
+    def upto(self, screening_id: int) -> "Trajectory":
+        """The trajectory as it looked right after `screening_id` (for historical result pages)."""
+        if screening_id not in self.screening_ids:
+            return self
+        n = self.screening_ids.index(screening_id) + 1
+        if n == len(self.screening_ids):
+            return self
+        return _build(self.organization_id, self.pid, self.screening_ids[:n], self.screened_at[:n],
+                      self.height_cm[:n], self.weight_kg[:n], self.baz[:n])
+
+    def rows(self) -> List[dict]:
+        """One dict per screening with the interval leading into it (template-friendly)."""
+        out = []
+        for i, sid in enumerate(self.screening_ids):
+            iv = self.intervals[i - 1] if i else None
+            out.append({
+                "screening_id": sid, "screened_at": self.screened_at[i],
+                "height_cm": self.height_cm[i], "weight_kg": self.weight_kg[i], "baz": self.baz[i],
+                "interval": iv,
+            })
+        return out
+
+
+# --- computation ---------------------------------------------------------------
+
+def _opt(v) -> Optional[float]:
+    return None if v is None or np.isnan(v) else round(float(v), 3)
+
+
+def _interval_arrays(t_days, height, weight, baz):
+    """Vectorised deltas, velocities and flag masks for consecutive points of ONE sorted batch."""
+    months = np.diff(t_days) / DAYS_PER_MONTH
+    dh, dw, db = np.diff(height), np.diff(weight), np.diff(baz)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        safe = np.where(months > 0, months, np.nan)
+        hv, wv, bv = dh / safe, dw / safe, db / safe
+        limit = np.maximum(MAX_CHANGE_PER_6_MONTHS, MAX_CHANGE_PER_6_MONTHS * months / 6.0)
+        masks = {
+            "height_jump": np.abs(dh) > limit,
+            "height_shrink": dh < -HEIGHT_SHRINK_TOLERANCE_CM,
+            "weight_jump": np.abs(dw) > limit,
+            "weight_loss": (dw < 0) & (-dw > WEIGHT_LOSS_FRACTION * weight[:-1]) & ~(np.abs(dw) > limit),
+            "height_stalled": (months >= HEIGHT_STALL_MONTHS) & (dh < HEIGHT_STALL_CM) & (dh >= -HEIGHT_SHRINK_TOLERANCE_CM),
+        }
+    return months, (dh, dw, db), (hv, wv, bv), masks
+
+
+def _build(org_id, pid, ids, screened_at, height, weight, baz) -> Trajectory:
+    t = np.array([dt.timestamp() / 86400.0 for dt in screened_at], dtype=np.float64)
+    h = np.array([np.nan if v is None else v for v in height], dtype=np.float64)
+    w = np.array([np.nan if v is None else v for v in weight], dtype=np.float64)
+    b = np.array([np.nan if v is None else v for v in baz], dtype=np.float64)
+    traj = Trajectory(org_id, pid, list(ids), list(screened_at), list(height), list(weight), list(baz), [], [])
+    if len(ids) < 2:
+        return traj
+    months, deltas, vels, masks = _interval_arrays(t, h, w, b)
+    _attach(traj, 0, len(ids), months, deltas, vels, masks, t, b)
+    return traj
+
+
+def _attach(traj, lo, hi, months, deltas, vels, masks, t, b) -> None:
+    """Fill traj.intervals / traj.flags from batch arrays; points lo..hi-1, intervals lo..hi-2."""
+    dh, dw, db = deltas
+    hv, wv, bv = vels
+    for k in range(lo, hi - 1):
+        traj.intervals.append(GrowthInterval(
+            from_screening_id=traj.screening_ids[k - lo], to_screening_id=traj.screening_ids[k - lo + 1],
+            months=round(float(months[k]), 2),
+            height_delta=_opt(dh[k]), weight_delta=_opt(dw[k]), baz_delta=_opt(db[k]),
+            height_velocity=_opt(hv[k]), weight_velocity=_opt(wv[k]), baz_velocity=_opt(bv[k]),
+            flags=[name for name, m in masks.items() if m[k]],
+        ))
+    flags = list(traj.intervals[-1].flags) if traj.intervals else []
+
+    # BAZ trend: latest vs the best reading in the previous WEIGHT_TREND_MONTHS.
+    tb, bb = t[lo:hi], b[lo:hi]
+    if not np.isnan(bb[-1]):
+        window = (tb >= tb[-1] - WEIGHT_TREND_MONTHS * DAYS_PER_MONTH) & ~np.isnan(bb)
+        window[-1] = False
+        if window.any() and bb[window].max() - bb[-1] >= BAZ_FALTER_DROP:
+            flags.append("baz_faltering")
+    traj.flags = flags
+
+
+def _compute_many(org_id: int, rows: Sequence[tuple]) -> Dict[str, Trajectory]:
+    """rows: (pid, id, screened_at, height_cm, weight_kg, baz) sorted by (pid, screened_at, id)."""
+    if not rows:
+        return {}
+    pids = [r[0] for r in rows]
+    t = np.array([r[2].timestamp() / 86400.0 for r in rows], dtype=np.float64)
+    h = np.array([np.nan if r[3] is None else float(r[3]) for r in rows], dtype=np.float64)
+    w = np.array([np.nan if r[4] is None else float(r[4]) for r in rows], dtype=np.float64)
+    b = np.array([np.nan if r[5] is None else float(r[5]) for r in rows], dtype=np.float64)
+
+    # One pass over the whole batch; intervals that straddle two PIDs are simply not used.
+    months, deltas, vels, masks = _interval_arrays(t, h, w, b)
+
+    starts = [0] + [i for i in range(1, len(rows)) if pids[i] != pids[i - 1]] + [len(rows)]
+    out = {}
+    for lo, hi in zip(starts[:-1], starts[1:]):
+        part = rows[lo:hi]
+        traj = Trajectory(
+            org_id, pids[lo], [r[1] for r in part], [r[2] for r in part],
+            [None if np.isnan(v) else float(v) for v in h[lo:hi]],
+            [None if np.isnan(v) else float(v) for v in w[lo:hi]],
+            [None if np.isnan(v) else float(v) for v in b[lo:hi]],
+            [], [],
+        )
+        _attach(traj, lo, hi, months, deltas, vels, masks, t, b)
+        out[traj.pid] = traj
+    return out
+
+
+def _load(org_id: int, screenings_qs) -> Dict[str, Trajectory]:
+    rows = list(
+        screenings_qs.filter(organization_id=org_id, pid__isnull=False)
+        .exclude(pid="")
+        .order_by("pid", "screened_at", "id")
+        .values_list("pid", "id", "screened_at", "height_cm", "weight_kg", "baz")
+    )
+    return _compute_many(org_id, rows)
+
+
+# --- public API ----------------------------------------------------------------
+
+def _cache_key(org_id: int, pid: str) -> str:
+    return f"growth:v1:{org_id}:{pid}"
+
+
+def trajectories_for_pids(org_id: int, pids: Iterable[str]) -> Dict[str, Trajectory]:
+    """Cached trajectories for many PIDs; cache misses are loaded with a single query."""
+    pids = {p for p in pids if p}
+    if not pids:
+        return {}
+    keys = {_cache_key(org_id, p): p for p in pids}
+    found = {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+    missing = pids - set(found)
+    if missing:
+        loaded = _load(org_id, Screening.objects.filter(pid__in=missing))
+        cache.set_many({_cache_key(org_id, p): t for p, t in loaded.items()}, GROWTH_CACHE_SECONDS)
+        found.update(loaded)
+    return found
+
+
+def trajectory_for_pid(org_id: int, pid: Optional[str]) -> Optional[Trajectory]:
+    if not pid:
+        return None
+    return trajectories_for_pids(org_id, [pid]).get(pid)
+
+
+def trajectory_for_screening(s: Screening) -> Optional[Trajectory]:
+    """The trajectory as of `s` (for result pages), or None with nothing to compare against."""
+    traj = trajectory_for_pid(s.organization_id, s.pid)
+    if traj is None:
+        return None
+    traj = traj.upto(s.id)
+    return traj if traj.intervals else None
+
+
+def trajectories_for_classroom(classroom) -> Dict[str, Trajectory]:
+    """Every student in the classroom, computed in one query (and cached per PID)."""
+    org_id = classroom.organization_id
+    trajectories = _load(org_id, Screening.objects.filter(student__classroom=classroom))
+    cache.set_many({_cache_key(org_id, p): t for p, t in trajectories.items()}, GROWTH_CACHE_SECONDS)
+    return trajectories
+
+
+def invalidate_trajectories(org_id: int, pids: Iterable[str]) -> None:
+    """
+    Drop cached trajectories now and again on commit, so a concurrent reader
+    can't re-cache the pre-commit history.
+    """
+    keys = [_cache_key(org_id, p) for p in set(pids) if p]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def assess_measurement(org_id: int, pid: Optional[str], *, screened_at: datetime,
+                       height_cm: Optional[float], weight_kg: Optional[float],
+                       baz: Optional[float] = None) -> List[str]:
+    """
+    Flags for a new, not-yet-saved measurement against the PID's history
+    (the teacher form's "please verify readings" warnings).
+    """
+    traj = trajectory_for_pid(org_id, pid)
+    if traj is None:
+        return []
+    prior = [i for i, dt in enumerate(traj.screened_at) if dt <= screened_at]
+    if not prior:
+        return []
+    n = prior[-1] + 1
+    candidate = _build(
+        org_id, pid,
+        traj.screening_ids[:n] + [0], traj.screened_at[:n] + [screened_at],
+        traj.height_cm[:n] + [height_cm], traj.weight_kg[:n] + [weight_kg], traj.baz[:n] + [baz],
+    )
+    return candidate.flags
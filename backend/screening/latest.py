@@ -0,0 +1,123 @@
+"""
+LatestScreening maintenance.
+
+record_new_screening() is the cheap path for a freshly created Screening
+(one locked row update). Anything else that can move the latest screening
+(edits, deletes, bulk re-scoring) recomputes from Screening rows.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import LatestScreening, Screening
+
+_RED = Screening.RiskLevel.RED
+
+
+def _copy_latest(snap: LatestScreening, s: Screening) -> None:
+    snap.organization_id = s.organization_id
+    snap.pid = s.pid
+    snap.screening_id = s.pk
+    snap.screened_at = s.screened_at
+    snap.risk_level = s.risk_level
+    snap.baz = s.baz
+    snap.teacher_id = s.teacher_id
+
+
+@transaction.atomic
+def record_new_screening(s: Screening) -> LatestScreening:
+    snap = LatestScreening.objects.select_for_update().filter(student_id=s.student_id).first()
+    if snap is None:
+        snap = LatestScreening(
+            student_id=s.student_id,
+            screening_count=1,
+            first_screened_at=s.screened_at,
+            last_red_at=s.screened_at if s.risk_level == _RED else None,
+        )
+        _copy_latest(snap, s)
+        try:
+            with transaction.atomic():
+                snap.save()
+            return snap
+        except IntegrityError:
+            # A concurrent first screening for the same student, or another student row
+            # that already holds this (organization, pid): update the snapshot that owns
+            # the conflicting key, preferring the student's own.
+            clashes = list(
+                LatestScreening.objects.select_for_update().filter(
+                    Q(student_id=s.student_id) | Q(organization_id=s.organization_id, pid=s.pid)
+                )
+            )
+            snap = next((c for c in clashes if c.student_id == s.student_id), clashes[0] if clashes else None)
+            if snap is None:
+                refresh_latest_screening(s.student_id)
+                return LatestScreening.objects.filter(student_id=s.student_id).first()
+
+    snap.screening_count += 1
+    if s.screened_at >= snap.screened_at:
+        _copy_latest(snap, s)
+    if s.screened_at < snap.first_screened_at:
+        snap.first_screened_at = s.screened_at
+    if s.risk_level == _RED and (snap.last_red_at is None or s.screened_at > snap.last_red_at):
+        snap.last_red_at = s.screened_at
+    snap.save()
+    return snap
+
+
+def rebuild_latest_screenings(*, organization_id: Optional[int] = None, student_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute snapshots from Screening rows for an org, a set of students, or everything.
+
+    Streams screenings ordered by (student, screened_at, id) and folds each student
+    in one pass. Students left without screenings lose their snapshot.
+    Returns the number of snapshots written.
+    """
+    qs = Screening.objects.all()
+    snaps = LatestScreening.objects.all()
+    if organization_id is not None:
+        qs = qs.filter(organization_id=organization_id)
+        snaps = snaps.filter(organization_id=organization_id)
+    if student_ids is not None:
+        student_ids = list(set(student_ids))
+        if not student_ids:
+            return 0
+        qs = qs.filter(student_id__in=student_ids)
+        snaps = snaps.filter(student_id__in=student_ids)
+
+    rows = qs.order_by("student_id", "screened_at", "id").values_list(
+        "id", "student_id", "organization_id", "pid", "screened_at", "risk_level", "baz", "teacher_id"
+    )
+
+    written = 0
+    batch = []
+    current = None
+    with transaction.atomic():
+        snaps.delete()
+        for sid, student_id, org_id, pid, screened_at, risk, baz, teacher_id in rows.iterator(chunk_size=2000):
+            if current is None or current.student_id != student_id:
+                if current is not None:
+                    batch.append(current)
+                current = LatestScreening(student_id=student_id, screening_count=0, first_screened_at=screened_at)
+            current.screening_count += 1
+            current.organization_id, current.pid = org_id, pid
+            current.screening_id, current.screened_at = sid, screened_at
+            current.risk_level, current.baz, current.teacher_id = risk, baz, teacher_id
+            if risk == _RED:
+                current.last_red_at = screened_at
+            if len(batch) >= 1000:
+                LatestScreening.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if current is not None:
+            batch.append(current)
+        LatestScreening.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def refresh_latest_screening(student_id: int) -> None:
+    rebuild_latest_screenings(student_ids=[student_id])
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from screening.flag_index import replace_screening_flags
+from screening.models import Screening
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ScreeningFlag index from Screening.red_flags."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all)")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        qs = Screening.objects.all()
+        if opts.get("org"):
+            qs = qs.filter(organization_id=opts["org"])
+        chunk_size = max(1, opts["chunk_size"])
+
+        last_id = 0
+        screenings = flags = 0
+        while True:
+            rows = list(
+                qs.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "organization_id", "screened_at", "red_flags")[:chunk_size]
+            )
+            if not rows:
+                break
+            flags += replace_screening_flags(rows)
+            screenings += len(rows)
+            last_id = rows[-1][0]
+            self.stdout.write(f"Indexed {screenings} screenings (last id {last_id})")
+        self.stdout.write(self.style.SUCCESS(f"Done. {flags} flag rows for {screenings} screenings."))
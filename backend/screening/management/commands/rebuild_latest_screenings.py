@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Organization
+from screening.latest import rebuild_latest_screenings
+
+
+class Command(BaseCommand):
+    help = "Rebuild LatestScreening snapshots from Screening rows (one org at a time)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all)")
+
+    def handle(self, *args, **opts):
+        orgs = Organization.objects.all().order_by("id")
+        if opts.get("org"):
+            orgs = orgs.filter(pk=opts["org"])
+        total = 0
+        for org in orgs.iterator():
+            n = rebuild_latest_screenings(organization_id=org.id)
+            if n:
+                self.stdout.write(f"{org.name}: {n} students")
+            total += n
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} snapshots written."))
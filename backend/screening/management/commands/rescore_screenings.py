@@ -0,0 +1,167 @@
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import Organization
+from reporting.rollup_queue import mark_dirty
+from screening.flag_index import replace_screening_flags
+from screening.growth import invalidate_trajectories
+from screening.latest import rebuild_latest_screenings
+from screening.models import RescoreCheckpoint, Screening
+from screening.services import RISK_RULES_VERSION, score_screening_rows
+
+# Columns read per row; the scoring tuple is everything from "gender" on.
+_FIELDS = (
+    "id", "organization_id", "screened_at", "risk_level", "student_id", "pid",
+    "gender", "age_years", "age_months", "height_cm", "weight_kg", "muac_cm", "answers",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-score Screening rows whose risk_rules_version is older than the current rules "
+        "(or all rows with --all). Resumable; scores chunks in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id")
+        parser.add_argument("--since", type=str, help="YYYY-MM-DD (screened_at on or after)")
+        parser.add_argument("--all", action="store_true", help="Re-score rows already on the current rules version")
+        parser.add_argument("--dry-run", action="store_true", help="Score and report, write nothing")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+        parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint")
+
+    def handle(self, *args, **opts):
+        org_id = opts.get("org")
+        since = None
+        if opts.get("since"):
+            try:
+                since = date.fromisoformat(opts["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD")
+        if org_id and not Organization.objects.filter(pk=org_id).exists():
+            raise CommandError(f"Organization {org_id} not found")
+
+        self.dry_run = bool(opts.get("dry_run"))
+        chunk_size = max(1, opts["chunk_size"])
+        workers = max(1, opts["workers"])
+
+        qs = Screening.objects.all()
+        if org_id:
+            qs = qs.filter(organization_id=org_id)
+        if since:
+            start = timezone.make_aware(datetime.combine(since, datetime.min.time()), timezone.get_current_timezone())
+            qs = qs.filter(screened_at__gte=start)
+        if not opts.get("all"):
+            qs = qs.filter(Q(risk_rules_version__isnull=True) | Q(risk_rules_version__lt=RISK_RULES_VERSION))
+
+        self.checkpoint = None
+        start_id = 0
+        if not self.dry_run:
+            key = f"v{RISK_RULES_VERSION}:org={org_id or '*'}:since={since or '*'}:all={int(bool(opts.get('all')))}"
+            self.checkpoint, _ = RescoreCheckpoint.objects.get_or_create(
+                key=key, defaults={"rules_version": RISK_RULES_VERSION}
+            )
+            if opts.get("restart") or self.checkpoint.completed_at:
+                self.checkpoint.last_id = 0
+                self.checkpoint.processed = 0
+                self.checkpoint.changed = 0
+                self.checkpoint.completed_at = None
+                self.checkpoint.save()
+            elif self.checkpoint.last_id:
+                self.stdout.write(f"Resuming after screening id {self.checkpoint.last_id}")
+            start_id = self.checkpoint.last_id
+
+        self.processed = 0
+        self.changed = 0
+        self.transitions = Counter()
+        started = time.monotonic()
+
+        chunks = self._chunks(qs, start_id, chunk_size)
+        if workers == 1:
+            for rows in chunks:
+                self._apply(rows, score_screening_rows([r[6:] for r in rows]))
+        else:
+            # spawn: workers only import screening.services (no ORM, no inherited DB sockets)
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                pending = deque()
+                for rows in chunks:
+                    pending.append((rows, pool.submit(score_screening_rows, [r[6:] for r in rows])))
+                    # Bounded window; results are applied in id order so the checkpoint stays exact.
+                    if len(pending) >= workers * 2:
+                        done_rows, fut = pending.popleft()
+                        self._apply(done_rows, fut.result())
+                while pending:
+                    done_rows, fut = pending.popleft()
+                    self._apply(done_rows, fut.result())
+
+        if self.checkpoint:
+            self.checkpoint.completed_at = timezone.now()
+            self.checkpoint.save(update_fields=["completed_at", "updated_at"])
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        for (old, new), n in sorted(self.transitions.items()):
+            self.stdout.write(f"  {old} -> {new}: {n}")
+        verb = "would change" if self.dry_run else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {self.processed} screenings ({self.processed / elapsed:.0f}/s); "
+            f"{self.changed} {verb} risk level."
+        ))
+
+    def _chunks(self, qs, start_id: int, chunk_size: int):
+        """Keyset pagination on id: constant cost per chunk, no OFFSET scans."""
+        last_id = start_id
+        while True:
+            rows = list(qs.filter(id__gt=last_id).order_by("id").values_list(*_FIELDS)[:chunk_size])
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def _apply(self, rows, results):
+        objs = []
+        flag_rows = []
+        changed = 0
+        changed_days = set()
+        for row, (level, flags, bmi, baz) in zip(rows, results):
+            sid, org_id, screened_at, old_level = row[:4]
+            flag_rows.append((sid, org_id, screened_at, flags))
+            if level != old_level:
+                changed += 1
+                self.transitions[(old_level, level)] += 1
+                changed_days.add((org_id, timezone.localtime(screened_at).date()))
+            objs.append(Screening(
+                id=sid, risk_level=level, red_flags=flags, bmi=bmi, baz=baz,
+                risk_rules_version=RISK_RULES_VERSION,
+            ))
+        self.processed += len(rows)
+        self.changed += changed
+
+        if not self.dry_run:
+            with transaction.atomic():
+                Screening.objects.bulk_update(
+                    objs, ["risk_level", "red_flags", "bmi", "baz", "risk_rules_version"], batch_size=500
+                )
+                replace_screening_flags(flag_rows)
+                rebuild_latest_screenings(student_ids=[row[4] for row in rows])
+                for org_id in {row[1] for row in rows}:
+                    invalidate_trajectories(org_id, [row[5] for row in rows if row[1] == org_id])
+                self.checkpoint.last_id = rows[-1][0]
+                self.checkpoint.processed += len(rows)
+                self.checkpoint.changed += changed
+                self.checkpoint.save(update_fields=["last_id", "processed", "changed", "updated_at"])
+
+            # bulk_update bypasses signals; queue the affected rollup days (RED counts).
+            mark_dirty(changed_days)
+
+        self.stdout.write(f"Scored {self.processed} screenings (last id {rows[-1][0]}), {self.changed} level changes")
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.14 on 2026-10-16 20:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        ('screening', '0004_risk_rules_version_rescorecheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=64)),
+                ('screened_at', models.DateTimeField()),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screening_flags', to='accounts.organization')),
+                ('screening', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flag_rows', to='screening.screening')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'code', 'screened_at'], name='screening_s_organiz_b6a3b3_idx'), models.Index(fields=['organization', 'screened_at', 'code'], name='screening_s_organiz_1d9aa8_idx'), models.Index(fields=['code', 'screened_at'], name='screening_s_code_a5a8d3_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='screeningflag',
+            constraint=models.UniqueConstraint(fields=('screening', 'code'), name='uniq_flag_per_screening'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.14 on 2026-10-16 20:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        ('roster', '0004_alter_student_unique_together_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('screening', '0005_screeningflag'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestScreening',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pid', models.CharField(blank=True, max_length=64, null=True)),
+                ('screened_at', models.DateTimeField()),
+                ('risk_level', models.CharField(choices=[('GREEN', 'Green'), ('YELLOW', 'Yellow'), ('RED', 'Red')], max_length=8)),
+                ('baz', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('screening_count', models.PositiveIntegerField(default=0)),
+                ('first_screened_at', models.DateTimeField()),
+                ('last_red_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latest_screenings', to='accounts.organization')),
+                ('screening', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='screening.screening')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='latest_screening', to='roster.student')),
+                ('teacher', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'risk_level'], name='screening_l_organiz_69bdad_idx'), models.Index(fields=['organization', 'screened_at'], name='screening_l_organiz_3a9f5e_idx'), models.Index(fields=['organization', 'last_red_at'], name='screening_l_organiz_54d4f4_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='latestscreening',
+            constraint=models.UniqueConstraint(fields=('organization', 'pid'), name='uniq_latest_screening_pid_per_org'),
+        ),
+    ]
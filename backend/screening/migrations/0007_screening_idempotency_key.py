@@ -0,0 +1,22 @@
+# Generated by Django 4.2.14 on 2026-10-16 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0006_latestscreening'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screening',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='screening',
+            constraint=models.UniqueConstraint(fields=('organization', 'idempotency_key'), name='uniq_screening_idempotency_key_per_org'),
+        ),
+    ]
@@ -31,9 +31,19 @@ class Screening(models.Model):
 
     risk_level = models.CharField(max_length=8, choices=RiskLevel.choices, default=RiskLevel.GREEN)
     red_flags = models.JSONField(default=list, blank=True)  # now holds all triggering reasons
+    # screening.services.RISK_RULES_VERSION that produced risk_level/red_flags (NULL = scored before versioning)
+    risk_rules_version = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True)
     is_low_income_at_screen = models.BooleanField(default=False)
+    # Client-generated key for batch/offline sync (screening.sync); unique per org when set.
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["organization", "idempotency_key"],
+                name="uniq_screening_idempotency_key_per_org",
+            ),
+        ]
         indexes = [
             models.Index(fields=["organization", "screened_at"]),
             models.Index(fields=["organization", "student", "screened_at"]),
@@ -43,3 +53,88 @@ class Screening(models.Model):
 
     def __str__(self):
         return f"{self.student.full_name} @ {self.screened_at:%Y-%m-%d} ({self.risk_level})"
+
+
+class RescoreCheckpoint(models.Model):
+    """
+    Progress of a `rescore_screenings` run, so an interrupted run resumes after
+    the last Screening id it wrote. One row per (rules version, filters) key.
+    """
+    key = models.CharField(max_length=128, unique=True)
+    rules_version = models.PositiveSmallIntegerField()
+    last_id = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} @ {self.last_id}"
+
+
+class ScreeningFlag(models.Model):
+    """
+    Inverted index over Screening.red_flags: one row per (screening, flag code).
+
+    Lets prevalence questions ("how many students had health_pallor this term")
+    run as a single GROUP BY instead of parsing every red_flags JSON list.
+    Kept in sync by screening.signals; rebuild with `manage.py backfill_screening_flags`.
+    """
+    screening = models.ForeignKey(Screening, on_delete=models.CASCADE, related_name="flag_rows")
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="screening_flags")
+    code = models.CharField(max_length=64)
+    screened_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["screening", "code"], name="uniq_flag_per_screening"),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "code", "screened_at"]),
+            models.Index(fields=["organization", "screened_at", "code"]),
+            models.Index(fields=["code", "screened_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.code} ({self.screening_id})"
+
+
+class LatestScreening(models.Model):
+    """
+    Denormalised "latest screening" per (organization, pid) / student.
+
+    Teacher and admin student lists join on this row instead of running
+    correlated subqueries against Screening for every student. Maintained by
+    screening.signals; rebuild with `manage.py rebuild_latest_screenings`.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="latest_screenings")
+    pid = models.CharField(max_length=64, null=True, blank=True)
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name="latest_screening")
+
+    screening = models.ForeignKey(Screening, on_delete=models.SET_NULL, null=True, related_name="+")
+    screened_at = models.DateTimeField()
+    risk_level = models.CharField(max_length=8, choices=Screening.RiskLevel.choices)
+    baz = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    teacher = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    screening_count = models.PositiveIntegerField(default=0)
+
+    # Needed by the "screened / red-flagged in period" student lists
+    first_screened_at = models.DateTimeField()
+    last_red_at = models.DateTimeField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["organization", "pid"], name="uniq_latest_screening_pid_per_org"),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "risk_level"]),
+            models.Index(fields=["organization", "screened_at"]),
+            models.Index(fields=["organization", "last_red_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} @ {self.screened_at:%Y-%m-%d} ({self.risk_level})"
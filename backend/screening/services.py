@@ -1,13 +1,20 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Sequence, Tuple, Any
 
-from .bmi_reference import bmi_to_baz
+import numpy as np
+
+from .bmi_reference import bmi_to_baz, bmi_to_baz_many
+
+# Bump whenever compute_risk()/compute_risk_batch() change what they return for the
+# same inputs; `manage.py rescore_screenings` re-scores rows stored with an older value.
+RISK_RULES_VERSION = 1
 
 @dataclass
 class RiskResult:
     level: str                 # "GREEN" | "YELLOW" | "RED"
     flags: List[str]           # machine-friendly reasons
     derived: Dict[str, Any]    # computed metrics for storage/debug
+    rules_version: int = RISK_RULES_VERSION
 
 def _bmi(height_cm: Optional[float], weight_kg: Optional[float]) -> Optional[float]:
     if height_cm is None or weight_kg is None:
@@ -254,3 +261,315 @@ def compute_risk(
         flags.append(f"bmi={derived['bmi']:.1f}")
 
     return RiskResult(level=level, flags=flags, derived=derived)
+
+
+# ---------------------------------------------------------------------------
+# Batch scoring (re-scoring historic Screening rows)
+# ---------------------------------------------------------------------------
+#
+# compute_risk_batch() applies the same rules as compute_risk() to column arrays.
+# Answers are unpacked once into small integer/boolean columns by
+# answers_to_columns(); everything after that is NumPy.
+
+# Tri-state encoding for yes/no answers
+ANSWER_TRUE = 1
+ANSWER_FALSE = 0
+ANSWER_UNSET = -1  # missing or legacy value
+
+_DIET_ANSWER_KEYS = [
+    "breakfast_eaten",
+    "lunch_eaten",
+    "green_leafy_veg",
+    "other_vegetables",
+    "fruits",
+    "dal_pulses_beans",
+    "milk_curd",
+    "egg",
+    "fish_chicken_meat",
+    "nuts_groundnuts",
+    "ssb_or_packaged_snacks",
+]
+
+# Category codes (0 = missing / anything else)
+MUAC_TAPE_CODES = {"RED": 1, "YELLOW": 2}
+HUNGER_CODES = {"OFTEN_TRUE": 1, "SOMETIMES_TRUE": 2, "NEVER_TRUE": 3}
+DIET_TYPE_CODES = {"LACTO_VEG": 1, "LACTO_OVO": 2, "NON_VEG": 3}
+
+# deworming_taken: 1 = legacy boolean False, 2 = "no", 3 = "don't know"
+DEWORMING_FALSE = 1
+DEWORMING_NO = 2
+DEWORMING_UNKNOWN = 3
+_DEWORMING_UNKNOWN_VALUES = {"dont_know", "don't know", "dontknow", "unknown"}
+
+_BAZ_CATEGORIES = ("severe_thinness", "thinness", "obesity", "overweight", "normal")
+
+
+@dataclass
+class RiskBatchResult:
+    levels: np.ndarray           # "GREEN" | "YELLOW" | "RED" per row
+    flags: List[List[str]]       # same per-row reasons as RiskResult.flags
+    derived: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+
+def _tristate(v: Any) -> int:
+    if v is True:
+        return ANSWER_TRUE
+    if v is False:
+        return ANSWER_FALSE
+    return ANSWER_UNSET
+
+def _appetite_code(v: Any) -> int:
+    # Old records: GOOD/NORMAL/POOR. "POOR" is scored like a "No" answer.
+    if isinstance(v, str):
+        return ANSWER_FALSE if v.upper() == "POOR" else ANSWER_UNSET
+    return _tristate(v)
+
+def _muac_tape_code(v: Any) -> int:
+    if not v:
+        return 0
+    return MUAC_TAPE_CODES.get(str(v).upper(), 0)
+
+def _deworming_code(v: Any) -> int:
+    if v is False:
+        return DEWORMING_FALSE
+    if isinstance(v, str):
+        v = v.lower()
+        if v == "no":
+            return DEWORMING_NO
+        if v in _DEWORMING_UNKNOWN_VALUES:
+            return DEWORMING_UNKNOWN
+    return 0
+
+def _cycle_gt_45(v: Any) -> bool:
+    if isinstance(v, str) and v.upper() == "GT_45":
+        return True
+    if v is None:
+        return False
+    # old numeric compatibility
+    try:
+        return int(v) > 45
+    except Exception:
+        return False
+
+def _int_or_missing(v: Any) -> int:
+    return int(v) if v is not None else -1
+
+def _float_column(values: Any) -> np.ndarray:
+    """1-D float64 array; None becomes NaN."""
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        return values.astype(np.float64, copy=False)
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+def answers_to_columns(answers: Sequence[Optional[Dict[str, Any]]]) -> Dict[str, np.ndarray]:
+    """
+    Unpack Screening.answers dicts into the column arrays read by compute_risk_batch().
+
+    Yes/No answers become int8 tri-state columns (ANSWER_TRUE / ANSWER_FALSE / ANSWER_UNSET),
+    single-choice answers become small integer codes, and the girls' section becomes
+    boolean / integer columns (-1 = not answered).
+    """
+    rows = [a or {} for a in answers]
+    n = len(rows)
+
+    def _col(fn, key, dtype):
+        return np.fromiter((fn(a.get(key)) for a in rows), dtype=dtype, count=n)
+
+    cols: Dict[str, np.ndarray] = {}
+    for key in _HEALTH_REDFLAG_KEYS + _DIET_ANSWER_KEYS:
+        cols[key] = _col(_tristate, key, np.int8)
+
+    cols["appetite"] = _col(_appetite_code, "appetite", np.int8)
+    cols["muac_tape_color"] = _col(_muac_tape_code, "muac_tape_color", np.int8)
+
+    cols["menarche_started"] = _col(bool, "menarche_started", np.bool_)
+    cols["pads_per_day"] = _col(_int_or_missing, "pads_per_day", np.int64)
+    cols["bleeding_clots"] = _col(bool, "bleeding_clots", np.bool_)
+    cols["bleeding_days"] = _col(_int_or_missing, "bleeding_days", np.int64)
+    cols["cycle_gt_45"] = _col(_cycle_gt_45, "cycle_length_days", np.bool_)
+
+    cols["hunger_vital_sign"] = _col(lambda v: HUNGER_CODES.get((v or "").upper(), 0), "hunger_vital_sign", np.int8)
+    cols["diet_type"] = _col(lambda v: DIET_TYPE_CODES.get((v or "").upper(), 0), "diet_type", np.int8)
+    cols["deworming_taken"] = _col(_deworming_code, "deworming_taken", np.int8)
+    return cols
+
+def compute_risk_batch(
+    *,
+    age_years: Any,
+    age_months: Any,
+    sex: Sequence[Optional[str]],
+    height_cm: Any,
+    weight_kg: Any,
+    muac_cm: Any,
+    answers: Dict[str, np.ndarray],
+) -> RiskBatchResult:
+    """
+    compute_risk() over N screenings at once.
+
+    Numeric inputs are 1-D sequences (None/NaN = missing); ``answers`` is the dict
+    returned by answers_to_columns(). Levels and flags are identical to calling
+    compute_risk() row by row.
+    """
+    age_years = _float_column(age_years)
+    age_months = _float_column(age_months)
+    height_cm = _float_column(height_cm)
+    weight_kg = _float_column(weight_kg)
+    muac_cm = _float_column(muac_cm)
+    sex = np.array([(s or "").upper() for s in sex], dtype=object)
+    n = len(age_years)
+
+    # --- BMI + BAZ ---
+    bmi_ok = ~np.isnan(height_cm) & ~np.isnan(weight_kg) & (height_cm > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m = height_cm / 100.0
+        bmi = np.where(bmi_ok, weight_kg / (m * m), np.nan)
+
+    is_m = sex == "M"
+    is_f = sex == "F"
+    baz_ok = bmi_ok & ~np.isnan(age_years) & (age_years >= 5.0) & (age_years <= 18.0) & (is_m | is_f)
+
+    baz = np.full(n, np.nan)
+    ref_age = np.full(n, np.nan)
+    ref_median = np.full(n, np.nan)
+    ref_sd = np.full(n, np.nan)
+    for code, rows in (("M", baz_ok & is_m), ("F", baz_ok & is_f)):
+        if rows.any():
+            baz[rows], ref_age[rows], ref_median[rows], ref_sd[rows] = bmi_to_baz_many(
+                bmi=bmi[rows], age_years=age_years[rows], sex=code
+            )
+
+    conds = [baz < -3, baz < -2, baz > 2, baz > 1]
+    baz_category = np.where(baz_ok, np.select(conds, _BAZ_CATEGORIES[:4], default="normal"), None)
+    growth_level = np.where(baz_ok, np.select(conds, ["RED", "YELLOW", "RED", "YELLOW"], default="GREEN"), "YELLOW")
+
+    # --- MUAC (6–59 months only); tape colour wins over the numeric reading ---
+    months_ok = ~np.isnan(age_months) & (age_months >= 6) & (age_months <= 59)
+    tape = answers["muac_tape_color"]
+    tape_red = months_ok & (tape == MUAC_TAPE_CODES["RED"])
+    tape_yellow = months_ok & (tape == MUAC_TAPE_CODES["YELLOW"])
+    numeric_ok = months_ok & ~(tape_red | tape_yellow) & ~np.isnan(muac_cm)
+    muac_red = tape_red | (numeric_ok & (muac_cm < 11.5))
+    muac_yellow = tape_yellow | (numeric_ok & (muac_cm >= 11.5) & (muac_cm < 12.5))
+    muac_level = np.where(muac_red, "RED", np.where(muac_yellow, "YELLOW", None))
+
+    # --- Section C: Quick Health Red Flags ---
+    health: List[Tuple[str, np.ndarray]] = []
+    for key in _HEALTH_REDFLAG_KEYS:
+        if key == "health_general_poor":
+            health.append((key, answers[key] == ANSWER_FALSE))
+        else:
+            health.append((key, answers[key] == ANSWER_TRUE))
+    health.append(("appetite_not_hungry", answers["appetite"] == ANSWER_FALSE))
+
+    girls = is_f & ~np.isnan(age_years) & (age_years >= 10.0) & answers["menarche_started"]
+    health.append(("heavy_bleeding", girls & (answers["pads_per_day"] > 4)))
+    health.append(("heavy_bleeding", girls & answers["bleeding_clots"]))
+    health.append(("bleeding_days_gt_10", girls & (answers["bleeding_days"] > 10)))
+    health.append(("irregular_cycles_gt_45", girls & answers["cycle_gt_45"]))
+    health_red = np.logical_or.reduce([mask for _, mask in health])
+
+    # --- Section F: Food Security ---
+    hunger = answers["hunger_vital_sign"]
+    food_security_red = (hunger == HUNGER_CODES["SOMETIMES_TRUE"]) | (hunger == HUNGER_CODES["NEVER_TRUE"])
+
+    # --- Section D + E: Diet + Program ---
+    diet_type = answers["diet_type"]
+    enabled = {
+        "milk_curd": (diet_type == DIET_TYPE_CODES["LACTO_VEG"]) | (diet_type == DIET_TYPE_CODES["NON_VEG"]),
+        "egg": (diet_type == DIET_TYPE_CODES["LACTO_OVO"]) | (diet_type == DIET_TYPE_CODES["NON_VEG"]),
+        "fish_chicken_meat": diet_type == DIET_TYPE_CODES["NON_VEG"],
+    }
+    diet: List[Tuple[str, np.ndarray]] = [
+        ("breakfast_skipped", answers["breakfast_eaten"] == ANSWER_FALSE),
+        ("lunch_skipped", answers["lunch_eaten"] == ANSWER_FALSE),
+    ]
+    for key in ("green_leafy_veg", "other_vegetables", "fruits", "dal_pulses_beans",
+                "milk_curd", "egg", "fish_chicken_meat", "nuts_groundnuts"):
+        mask = answers[key] == ANSWER_FALSE
+        if key in enabled:
+            mask = mask & enabled[key]
+        diet.append((f"missing_{key}", mask))
+
+    ssb_red = answers["ssb_or_packaged_snacks"] == ANSWER_TRUE
+    diet.append(("ssb_or_packaged_snacks", ssb_red))
+
+    deworming = answers["deworming_taken"]
+    diet.append(("deworming_not_recent", deworming == DEWORMING_FALSE))
+    # "no" / "don't know" strings only reach derived["diet_flags"] in compute_risk, but still drive RED
+    diet_flagged = np.logical_or.reduce([mask for _, mask in diet]) | (deworming > 0)
+
+    # --- Final status decision ---
+    red = (growth_level == "RED") | muac_red | health_red | food_security_red | ssb_red | diet_flagged
+    yellow = (growth_level == "YELLOW") | muac_yellow
+    levels = np.where(red, "RED", np.where(yellow, "YELLOW", "GREEN"))
+
+    # --- Flags, in compute_risk() order ---
+    ordered: List[Tuple[str, np.ndarray]] = [
+        (f"baz_{cat}", baz_category == cat) for cat in _BAZ_CATEGORIES
+    ]
+    ordered.append(("baz_unavailable", ~baz_ok))
+    ordered.append(("muac_red", muac_red))
+    ordered.append(("muac_yellow", muac_yellow))
+    ordered.extend(health)
+    ordered.append(("food_insecurity", food_security_red))
+    ordered.extend(diet)
+
+    flags: List[List[str]] = [[] for _ in range(n)]
+    for label, mask in ordered:
+        for i in np.flatnonzero(mask):
+            flags[i].append(label)
+    for i in np.flatnonzero(baz_ok):
+        flags[i].append(f"baz={baz[i]:.2f}")
+    for i in np.flatnonzero(bmi_ok):
+        flags[i].append(f"bmi={bmi[i]:.1f}")
+
+    derived = {
+        "bmi": bmi,
+        "baz": baz,
+        "bmi_ref_age_years": ref_age,
+        "bmi_ref_median": ref_median,
+        "bmi_ref_sd": ref_sd,
+        "baz_category": baz_category,
+        "growth_level": growth_level,
+        "muac_level": muac_level,
+        "health_red": health_red,
+        "food_insecurity": food_security_red,
+        "diet_flagged": diet_flagged,
+    }
+    return RiskBatchResult(levels=levels, flags=flags, derived=derived)
+
+def score_screening_rows(
+    rows: Sequence[Tuple[Any, Any, Any, Any, Any, Any, Dict[str, Any]]],
+) -> List[Tuple[str, List[str], Optional[float], Optional[float]]]:
+    """
+    Re-score stored screenings given as (gender, age_years, age_months, height_cm,
+    weight_kg, muac_cm, answers) tuples. Returns (level, flags, bmi, baz) per row,
+    with bmi/baz rounded to the Screening field precision (None when unavailable).
+
+    Kept free of ORM imports so it can run in spawned worker processes.
+    """
+    if not rows:
+        return []
+    gender, age_years, age_months, height_cm, weight_kg, muac_cm, answers = zip(*rows)
+    res = compute_risk_batch(
+        age_years=age_years,
+        age_months=age_months,
+        sex=gender,
+        height_cm=height_cm,
+        weight_kg=weight_kg,
+        muac_cm=muac_cm,
+        answers=answers_to_columns(answers),
+    )
+    bmi = res.derived["bmi"]
+    baz = res.derived["baz"]
+    return [
+        (
+            str(res.levels[i]),
+            res.flags[i],
+            None if np.isnan(bmi[i]) else round(float(bmi[i]), 2),
+            None if np.isnan(baz[i]) else round(float(baz[i]), 2),
+        )
+        for i in range(len(res))
+    ]
@@ -0,0 +1,65 @@
+"""Screening signals.
+
+Keep the derived per-screening tables in step with Screening rows:
+  * ScreeningFlag (inverted index over red_flags)
+  * LatestScreening (latest screening per student / pid)
+  * cached growth trajectories (screening.growth), dropped per pid
+"""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .flag_index import sync_screening_flags
+from .growth import invalidate_trajectories
+from .latest import record_new_screening, refresh_latest_screening
+from .models import Screening
+
+_FLAG_FIELDS = {"red_flags", "organization", "organization_id", "screened_at"}
+_LATEST_FIELDS = {
+    "organization", "organization_id", "student", "student_id", "pid", "teacher", "teacher_id",
+    "screened_at", "risk_level", "baz",
+}
+_GROWTH_FIELDS = {"organization", "organization_id", "pid", "screened_at", "height_cm", "weight_kg", "baz"}
+
+
+@receiver(post_save, sender=Screening)
+def _screening_sync_flags(sender, instance: Screening, created: bool, **kwargs):
+    if kwargs.get("raw"):
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not (_FLAG_FIELDS & set(update_fields)):
+        return
+    sync_screening_flags(instance, created=created)
+
+
+@receiver(post_save, sender=Screening)
+def _screening_update_latest(sender, instance: Screening, created: bool, **kwargs):
+    if kwargs.get("raw"):
+        return
+    if created:
+        record_new_screening(instance)
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not (_LATEST_FIELDS & set(update_fields)):
+        return
+    refresh_latest_screening(instance.student_id)
+
+
+@receiver(post_delete, sender=Screening)
+def _screening_delete_latest(sender, instance: Screening, **kwargs):
+    refresh_latest_screening(instance.student_id)
+
+
+@receiver(post_save, sender=Screening)
+def _screening_invalidate_growth(sender, instance: Screening, created: bool, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not (_GROWTH_FIELDS & set(update_fields)):
+        return
+    invalidate_trajectories(instance.organization_id, [instance.pid])
+
+
+@receiver(post_delete, sender=Screening)
+def _screening_delete_growth(sender, instance: Screening, **kwargs):
+    invalidate_trajectories(instance.organization_id, [instance.pid])
@@ -0,0 +1,455 @@
+"""
+Batch / offline screening sync.
+
+A teacher's device captures a class offline and posts it in one request:
+
+    POST /screening/teacher/sync/
+    {"items": [{"idempotency_key": "<uuid>", "screened_at": "<ISO datetime, optional>",
+                "student_id": <existing student, optional>,
+                "grade": "5", "division": "A", "is_low_income": false,   # new students
+                ...NewScreeningForm fields (student_name, dob, sex, parent_phone_e164, ...)}]}
+
+Each item is validated with NewScreeningForm's rules, scored with the batch risk
+scorer, and Students/Guardians are upserted by PID in bulk before the Screenings
+are bulk-created. Replaying a batch is safe: items whose idempotency_key already
+exists come back as "duplicate" with the original screening id.
+
+Auth is the teacher session (same as the form views); send the CSRF token header.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.http import HttpResponseForbidden, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from audit.utils import audit_log
+from program.services import complete_milestones_for_screenings
+from reporting.rollup_queue import mark_dirty_on_commit
+from roster.models import Classroom, Guardian, Student
+from roster.pid import compute_pid
+from screening_only.coverage import academic_year_of, refresh_coverage_on_commit
+
+from .decorators import require_teacher_or_public
+from .flag_index import replace_screening_flags
+from .forms import NewScreeningForm, _normalize_phone_to_e164
+from .growth import invalidate_trajectories
+from .latest import rebuild_latest_screenings
+from .models import Screening
+from .services import RISK_RULES_VERSION, score_screening_rows
+
+logger = logging.getLogger(__name__)
+
+MAX_SYNC_ITEMS = 200
+# Offline captures may be back-dated, but not into the future beyond clock skew.
+_MAX_CLOCK_SKEW = timedelta(minutes=10)
+_MAX_BACKDATE = timedelta(days=30)
+
+_ROLL_TAKEN = "A student with this Roll Number already exists in the selected class and section."
+
+
+@dataclass
+class _Context:
+    """Everything the per-item validation needs, loaded up front in a few queries."""
+    classrooms: Dict[tuple, Classroom]
+    students_by_id: Dict[int, Student]
+    students_by_pid: Dict[str, Student]
+    # (classroom_id, lower(roll number)) -> identities holding it; "s<id>" for
+    # existing students, "p<pid>" for students created earlier in this batch.
+    roll_numbers: Dict[tuple, set] = field(default_factory=dict)
+
+
+@dataclass
+class _Pending:
+    index: int
+    key: str
+    screened_at: datetime
+    form: NewScreeningForm
+    pid: Optional[str]
+    student: Optional[Student]     # existing row (by id or PID); None -> create
+    classroom: Optional[Classroom]
+    is_low_income: Optional[bool]  # None on the existing-student path (not posted)
+
+
+class SyncScreeningForm(NewScreeningForm):
+    """
+    NewScreeningForm with the roll-number uniqueness check answered from the
+    preloaded _Context instead of one query per item. Same rule and messages.
+    """
+
+    def __init__(self, *args, context: _Context, classroom: Optional[Classroom], identity: str, **kwargs):
+        self.sync_context = context
+        self.sync_classroom = classroom
+        self.sync_identity = identity
+        super().__init__(*args, **kwargs)
+
+    def clean_unique_student_id(self):
+        student_id = (self.cleaned_data.get("unique_student_id") or "").strip()
+        if not student_id:
+            return student_id
+        if self.sync_classroom is None:
+            raise forms.ValidationError("Selected Class/Section is invalid. Please re-select Class and Section.")
+        holders = self.sync_context.roll_numbers.get((self.sync_classroom.id, student_id.lower()), set())
+        if holders - {self.sync_identity}:
+            raise forms.ValidationError(_ROLL_TAKEN)
+        return student_id
+
+
+def _form_data(item: Dict[str, Any]) -> Dict[str, str]:
+    """JSON item -> form-encoded style data (yes/no selects take "yes"/"no", not true/false)."""
+    data = {}
+    for name, value in item.items():
+        if value is None:
+            continue
+        f = NewScreeningForm.base_fields.get(name)
+        if isinstance(value, bool) and not isinstance(f, forms.BooleanField):
+            value = "yes" if value else "no"
+        if isinstance(value, bool):
+            data[name] = "on" if value else ""
+        else:
+            data[name] = str(value)
+    return data
+
+
+def _parse_screened_at(raw, now: datetime) -> datetime:
+    if not raw:
+        return now
+    try:
+        dt = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValidationError("screened_at must be an ISO 8601 datetime.")
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_current_timezone())
+    if dt > now + _MAX_CLOCK_SKEW:
+        raise ValidationError("screened_at is in the future.")
+    if dt < now - _MAX_BACKDATE:
+        raise ValidationError("screened_at is too old to sync.")
+    return dt
+
+
+def _pre_pid(item: Dict[str, Any]) -> Optional[str]:
+    """PID from the raw item (same inputs teacher_add_student uses); None if not computable yet."""
+    try:
+        phone = _normalize_phone_to_e164(item.get("parent_phone_e164") or "")
+        return compute_pid(first_name=str(item.get("student_name") or ""), phone_e164=phone)
+    except (ValidationError, ValueError):
+        return None
+
+
+def _error(key, errors) -> Dict[str, Any]:
+    if isinstance(errors, ValidationError):
+        errors = {"__all__": errors.messages}
+    elif isinstance(errors, str):
+        errors = {"__all__": [errors]}
+    return {"idempotency_key": key, "status": "error", "errors": errors}
+
+
+def _load_context(org, items: List[Dict[str, Any]]) -> _Context:
+    classrooms = {(c.grade, c.division or ""): c for c in Classroom.objects.filter(organization=org)}
+
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item["student_id"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    pids = {p for p in (_pre_pid(i) for i in items if not i.get("student_id")) if p}
+    qs = Student.objects.filter(organization=org).select_related("classroom")
+    students = list(qs.filter(id__in=ids)) if ids else []
+    students += list(qs.filter(pid__in=pids).exclude(id__in=ids)) if pids else []
+
+    ctx = _Context(
+        classrooms=classrooms,
+        students_by_id={s.id: s for s in students},
+        students_by_pid={s.pid: s for s in students if s.pid},
+    )
+    # Roll numbers only for the classrooms this batch can touch.
+    classroom_ids = {s.classroom_id for s in students if s.classroom_id}
+    for item in items:
+        c = classrooms.get((str(item.get("grade") or "").strip(), str(item.get("division") or "").strip()))
+        if c:
+            classroom_ids.add(c.id)
+    for sid, cid, code in (Student.objects.filter(organization=org, classroom_id__in=classroom_ids)
+                           .exclude(student_code="").values_list("id", "classroom_id", "student_code")):
+        ctx.roll_numbers.setdefault((cid, code.lower()), set()).add(f"s{sid}")
+    return ctx
+
+
+def _validate(org, index: int, item: Dict[str, Any], ctx: _Context, now: datetime):
+    """Returns a _Pending or raises ValidationError / returns an error dict."""
+    key = item["idempotency_key"]
+    screened_at = _parse_screened_at(item.get("screened_at"), now)
+
+    if item.get("student_id"):
+        # screening_create semantics: existing student, roll number checked in their classroom
+        try:
+            student = ctx.students_by_id[int(item["student_id"])]
+        except (KeyError, TypeError, ValueError):
+            return _error(key, "Student not found.")
+        classroom = student.classroom if student.classroom_id else None
+        form = SyncScreeningForm(_form_data(item), student=student, organization=org,
+                                 context=ctx, classroom=classroom, identity=f"s{student.id}")
+        if not form.is_valid():
+            return _error(key, form.errors.get_json_data())
+        pid = student.pid
+        if not pid:
+            try:
+                pid = compute_pid(first_name=(student.first_name or ""),
+                                  phone_e164=form.cleaned_data["parent_phone_e164"])
+            except ValueError:
+                pid = None
+        return _Pending(index, key, screened_at, form, pid, student, classroom, None)
+
+    # teacher_add_student semantics: class/section + PID upsert
+    grade = str(item.get("grade") or "").strip()
+    division = str(item.get("division") or "").strip()
+    classroom = ctx.classrooms.get((grade, division)) if grade else None
+    if grade and classroom is None:
+        return _error(key, "Selected Grade/Division does not exist.")
+    pid = _pre_pid(item)
+    student = ctx.students_by_pid.get(pid) if pid else None
+    identity = f"s{student.id}" if student else f"p{pid}"
+    form = SyncScreeningForm(_form_data(item), student=None, organization=org,
+                             context=ctx, classroom=classroom, identity=identity)
+    if not form.is_valid():
+        return _error(key, form.errors.get_json_data())
+    if classroom is None:
+        return _error(key, "Selected Grade/Division does not exist.")
+    if not pid:
+        return _error(key, "Student name and parent phone are required.")
+    return _Pending(index, key, screened_at, form, pid, student, classroom, bool(item.get("is_low_income")))
+
+
+def _upsert_guardians(org, pids) -> Dict[str, int]:
+    pids = set(pids)
+    existing = dict(Guardian.objects.filter(organization=org, pid__in=pids).values_list("pid", "id"))
+    missing = pids - set(existing)
+    if missing:
+        Guardian.objects.bulk_create(
+            [Guardian(organization=org, pid=p, full_name=None, phone_e164=None, whatsapp_opt_in=True)
+             for p in sorted(missing)],
+            ignore_conflicts=True,
+        )
+        existing = dict(Guardian.objects.filter(organization=org, pid__in=pids).values_list("pid", "id"))
+    return existing
+
+
+def _upsert_students(org, pending: List[_Pending], guardian_ids: Dict[str, int], now: datetime) -> List[_Pending]:
+    """
+    Create PID students that don't exist yet and apply master-data changes to existing
+    ones (later items for the same student win). Returns items whose student could not be
+    created (e.g. a concurrent insert took the roll number).
+    """
+    to_create: Dict[str, Student] = {}
+    changed: Dict[int, Student] = {}
+    fields = set()
+
+    for p in pending:
+        cd = p.form.cleaned_data
+        answers = cd["answers"]
+        if p.student is None:
+            s = to_create.get(p.pid) or Student(organization=org, pid=p.pid, first_name=None, last_name=None)
+            s.classroom = p.classroom
+            s.gender = answers.get("sex")
+            s.dob = cd.get("dob")
+            s.is_low_income = bool(p.is_low_income)
+            s.student_code = answers.get("unique_student_id")
+            s.primary_guardian_id = guardian_ids.get(p.pid)
+            to_create[p.pid] = s
+            continue
+
+        s = p.student
+        updates = {
+            "student_code": answers.get("unique_student_id") or s.student_code,
+            "dob": cd.get("dob") or s.dob,
+            "gender": cd.get("sex") or s.gender,
+        }
+        if p.is_low_income is not None:  # add-student path
+            updates["classroom_id"] = p.classroom.id
+            updates["is_low_income"] = p.is_low_income
+        if p.pid and not s.pid:
+            updates["pid"] = p.pid
+        if p.pid and guardian_ids.get(p.pid):
+            updates["primary_guardian_id"] = guardian_ids[p.pid]
+        for attr, value in updates.items():
+            if getattr(s, attr) != value:
+                setattr(s, attr, value)
+                fields.add(attr.removesuffix("_id") if attr in ("classroom_id", "primary_guardian_id") else attr)
+                changed[s.id] = s
+
+    if changed:
+        for s in changed.values():
+            s.updated_at = now
+        Student.objects.bulk_update(list(changed.values()), sorted(fields | {"updated_at"}), batch_size=500)
+
+    failed = []
+    if to_create:
+        Student.objects.bulk_create(list(to_create.values()), ignore_conflicts=True)
+        created = {s.pid: s for s in Student.objects.filter(organization=org, pid__in=list(to_create))}
+        for p in pending:
+            if p.student is None:
+                p.student = created.get(p.pid)
+                if p.student is None:
+                    failed.append(p)
+    return failed
+
+
+def sync_screenings(org, items: List[Dict[str, Any]], *, teacher=None) -> List[Dict[str, Any]]:
+    """Validate, upsert and create screenings for `items`; returns one result dict per item, in order."""
+    now = timezone.now()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    seen = set()
+    candidates = []
+    for i, item in enumerate(items):
+        key = item.get("idempotency_key") if isinstance(item, dict) else None
+        if not isinstance(key, str) or not key.strip() or len(key.strip()) > 64:
+            results[i] = _error(key, "idempotency_key is required (max 64 characters).")
+            continue
+        item = dict(item, idempotency_key=key.strip())
+        if item["idempotency_key"] in seen:
+            results[i] = _error(key, "Duplicate idempotency_key in this batch.")
+            continue
+        seen.add(item["idempotency_key"])
+        candidates.append((i, item))
+
+    def _mark_duplicates():
+        existing = dict(
+            Screening.objects.filter(organization=org, idempotency_key__in=[it["idempotency_key"] for _, it in candidates])
+            .values_list("idempotency_key", "id")
+        )
+        remaining = []
+        for i, item in candidates:
+            if item["idempotency_key"] in existing:
+                results[i] = {"idempotency_key": item["idempotency_key"], "status": "duplicate",
+                              "screening_id": existing[item["idempotency_key"]]}
+            else:
+                remaining.append((i, item))
+        return remaining
+
+    for attempt in (1, 2):
+        candidates = _mark_duplicates()
+        ctx = _load_context(org, [item for _, item in candidates])
+
+        pending: List[_Pending] = []
+        for i, item in candidates:
+            try:
+                outcome = _validate(org, i, item, ctx, now)
+            except ValidationError as e:
+                outcome = _error(item["idempotency_key"], e)
+            if isinstance(outcome, dict):
+                results[i] = outcome
+                continue
+            pending.append(outcome)
+            code = (outcome.form.cleaned_data.get("answers") or {}).get("unique_student_id")
+            if code and outcome.classroom:
+                identity = f"s{outcome.student.id}" if outcome.student else f"p{outcome.pid}"
+                ctx.roll_numbers.setdefault((outcome.classroom.id, code.lower()), set()).add(identity)
+        if not pending:
+            return results
+
+        try:
+            with transaction.atomic():
+                created = _write(org, pending, results, teacher, now)
+        except IntegrityError:
+            # A concurrent sync inserted one of our keys first; re-check duplicates and rebuild once.
+            if attempt == 2:
+                raise
+            logger.info("Screening sync for org %s raced on idempotency keys; retrying", org.id)
+            continue
+
+        mark_dirty_on_commit((org.id, timezone.localtime(s.screened_at).date()) for s in created)
+        return results
+    return results
+
+
+def _write(org, pending: List[_Pending], results, teacher, now: datetime) -> List[Screening]:
+    guardian_ids = _upsert_guardians(org, {p.pid for p in pending if p.pid})
+    for p in _upsert_students(org, pending, guardian_ids, now):
+        results[p.index] = _error(p.key, "Could not create the student (roll number or PID already taken).")
+    pending = [p for p in pending if p.student is not None]
+    if not pending:
+        return []
+
+    scores = score_screening_rows([
+        (p.student.gender, p.form.cleaned_data["_derived"]["age_years"], p.form.cleaned_data["_derived"]["age_months"],
+         p.form.cleaned_data["_derived"]["height_cm"], p.form.cleaned_data["_derived"]["weight_kg"],
+         p.form.cleaned_data["_derived"].get("muac_cm"), p.form.cleaned_data["answers"])
+        for p in pending
+    ])
+
+    objs = []
+    for p, (level, flags, bmi, baz) in zip(pending, scores):
+        derived = p.form.cleaned_data["_derived"]
+        objs.append(Screening(
+            organization=org,
+            student=p.student,
+            pid=p.pid,
+            teacher=teacher,
+            screened_at=p.screened_at,
+            gender=p.student.gender,
+            age_years=derived["age_years"],
+            age_months=derived["age_months"],
+            height_cm=derived["height_cm"],
+            weight_kg=derived["weight_kg"],
+            muac_cm=derived.get("muac_cm"),
+            answers=p.form.cleaned_data["answers"],
+            is_low_income_at_screen=bool(p.student.is_low_income),
+            risk_level=level,
+            red_flags=flags,
+            risk_rules_version=RISK_RULES_VERSION,
+            bmi=bmi,
+            baz=baz,
+            idempotency_key=p.key,
+        ))
+    Screening.objects.bulk_create(objs, batch_size=500)
+
+    # bulk_create doesn't return ids on MySQL; the idempotency keys identify our rows.
+    ids = dict(Screening.objects.filter(organization=org, idempotency_key__in=[p.key for p in pending])
+               .values_list("idempotency_key", "id"))
+    for p, s in zip(pending, objs):
+        s.pk = s.id = ids[p.key]
+        results[p.index] = {
+            "idempotency_key": p.key, "status": "created", "screening_id": s.id,
+            "student_id": p.student.id, "risk_level": s.risk_level, "red_flags": s.red_flags,
+        }
+
+    # bulk_create skips post_save; do the signal work once for the whole batch.
+    replace_screening_flags([(s.id, org.id, s.screened_at, s.red_flags) for s in objs], created=True)
+    rebuild_latest_screenings(student_ids={s.student_id for s in objs})
+    invalidate_trajectories(org.id, {s.pid for s in objs})
+    refresh_coverage_on_commit({(org.id, academic_year_of(s.screened_at)) for s in objs})
+    complete_milestones_for_screenings(org, objs)
+    return objs
+
+
+@require_POST
+@require_teacher_or_public
+def screening_sync(request):
+    org = getattr(request, "org", None)
+    if not org:
+        return HttpResponseForbidden("Organization context required.")
+    try:
+        payload = json.loads(request.body or b"{}")
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Body must be JSON."}, status=400)
+    items = payload.get("items") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        return JsonResponse({"error": "Expected {\"items\": [...]}."}, status=400)
+    if len(items) > MAX_SYNC_ITEMS:
+        return JsonResponse({"error": f"At most {MAX_SYNC_ITEMS} items per request."}, status=400)
+
+    teacher = request.user if request.user.is_authenticated else None
+    results = sync_screenings(org, items, teacher=teacher)
+
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    audit_log(teacher, org, "SCREENINGS_SYNCED", payload={"items": len(items), **counts})
+    return JsonResponse({"results": results, "counts": counts})
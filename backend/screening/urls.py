@@ -7,7 +7,8 @@ from .views import (
     screening_result,
     send_parent_whatsapp,
 )
-from .export import export_screenings_csv
+from .export import export_screenings_csv, export_screenings_wide_csv
+from .sync import screening_sync
 
 urlpatterns = [
     re_path(r"^teacher/(?P<token>[-a-z0-9_]+-[A-Za-z0-9]{8})/add-student/$",
@@ -20,6 +21,8 @@ urlpatterns = [
     path("teacher/screen/<int:student_id>/", screening_create, name="screening_create"),
     path("teacher/result/<int:screening_id>/", screening_result, name="screening_result"),
     path("teacher/send/<int:screening_id>/", send_parent_whatsapp, name="send_parent_whatsapp"),
+    path("teacher/sync/", screening_sync, name="screening_sync"),
 
     path("admin/export/screenings.csv", export_screenings_csv, name="export_screenings_csv"),
+    path("admin/export/screenings-wide.csv", export_screenings_wide_csv, name="export_screenings_wide_csv"),
 ]
@@ -1,10 +1,9 @@
 import json
-from datetime import timedelta
 
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, transaction
-from django.db.models import Q, OuterRef, Subquery, Exists
+from django.db.models import F, Q, OuterRef, Exists
 from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
@@ -19,6 +18,7 @@ from roster.models import Classroom, Guardian, Student
 
 from .decorators import require_teacher_or_public
 from .forms import AddStudentForm, NewScreeningForm
+from .growth import FLAG_TEXT, assess_measurement, trajectory_for_screening
 from .models import Screening
 from .services import compute_risk
 from assist.models import Application
@@ -174,13 +174,6 @@ def teacher_portal(request):
     risk = request.GET.get("risk")  # GREEN|YELLOW|RED
     q = (request.GET.get("q") or "").strip()
 
-    last_screening = (
-        Screening.objects
-            .filter(organization=org, pid=OuterRef("pid"))
-            .order_by("-screened_at")
-            .values("risk_level")[:1]
-    )
-
     approved_application = (
         Application.objects
         .filter(
@@ -190,11 +183,12 @@ def teacher_portal(request):
         )
     )
 
+    # Latest risk comes from the LatestScreening snapshot (plain LEFT JOIN).
     students = (
         Student.objects
         .filter(organization=org)
         .annotate(
-            last_risk=Subquery(last_screening),
+            last_risk=F("latest_screening__risk_level"),
             supplements_granted=Exists(approved_application),
         )
     )
@@ -219,23 +213,9 @@ def teacher_portal(request):
     })
 
 def _warn_if_large_change(student: Student, height_cm: float, weight_kg: float, now_dt):
-    prev = Screening.objects.filter(
-        organization=student.organization,
-        pid=student.pid,
-        screened_at__gte=now_dt - timedelta(days=183),
-    ).order_by("-screened_at").first()
-
-    if not prev:
-        return []
-    warnings = []
-    try:
-        if prev.weight_kg is not None and abs(float(prev.weight_kg) - float(weight_kg)) > 10:
-            warnings.append("Weight changed by > 10kg in ~6 months. Please verify readings.")
-        if prev.height_cm is not None and abs(float(prev.height_cm) - float(height_cm)) > 10:
-            warnings.append("Height changed by > 10cm in ~6 months. Please verify readings.")
-    except Exception:
-        pass
-    return warnings
+    flags = assess_measurement(student.organization_id, student.pid, screened_at=now_dt,
+                               height_cm=height_cm, weight_kg=weight_kg)
+    return [FLAG_TEXT[f] for f in flags]
 
 @require_teacher_or_public
 def screening_create(request, student_id: int):
@@ -324,6 +304,7 @@ def screening_create(request, student_id: int):
             )
             s.risk_level = rr.level
             s.red_flags = rr.flags
+            s.risk_rules_version = rr.rules_version
             if rr.derived.get("bmi") is not None:
                 s.bmi = rr.derived["bmi"]
             if rr.derived.get("baz") is not None:
@@ -364,6 +345,7 @@ def screening_result(request, screening_id: int):
         "s": s,
         "last_message": last_message,
         "teacher_view": teacher_view,
+        "growth": trajectory_for_screening(s),
     })
 
 @require_teacher_or_public
@@ -547,6 +529,7 @@ def teacher_add_student(request, token=None):
                     )
                     s.risk_level = rr.level
                     s.red_flags = rr.flags
+                    s.risk_rules_version = rr.rules_version
                     if rr.derived.get("bmi") is not None:
                         s.bmi = rr.derived["bmi"]
                     if rr.derived.get("baz") is not None:
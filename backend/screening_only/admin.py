@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ScreeningSchoolProfile, ScreeningTermsAcceptance
+from .models import ScreeningCoverage, ScreeningSchoolProfile, ScreeningTermsAcceptance
 
 
 @admin.register(ScreeningSchoolProfile)
@@ -12,3 +12,11 @@ class ScreeningSchoolProfileAdmin(admin.ModelAdmin):
 class ScreeningTermsAcceptanceAdmin(admin.ModelAdmin):
     list_display = ("organization", "user", "actor_role", "version", "accepted_at")
     search_fields = ("organization__name", "user__email", "actor_role", "version")
+
+
+@admin.register(ScreeningCoverage)
+class ScreeningCoverageAdmin(admin.ModelAdmin):
+    list_display = ("organization", "academic_year", "grade", "division", "screened_once", "screened_twice",
+                    "total_students", "frozen", "updated_at")
+    list_filter = ("academic_year", "frozen")
+    search_fields = ("organization__name",)
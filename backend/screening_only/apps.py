@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ScreeningOnlyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "screening_only"
+
+    def ready(self):
+        # Register signal handlers that keep ScreeningCoverage current.
+        from . import signals  # noqa: F401
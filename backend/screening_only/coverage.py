@@ -0,0 +1,172 @@
+"""
+ScreeningCoverage maintenance.
+
+record_new_screening() is the cheap path for a freshly created Screening in the
+current academic year: a student's first screening of the year is added to the
+once bucket with one F() UPDATE, and the second rebuilds the (org, year), since
+two screenings committed together cannot tell which one moved the student to
+the twice bucket. Anything else (edits, deletes, bulk inserts, late screenings
+for a past year) rebuilds the (org, year) from Screening rows. Frozen years are only rebuilt on request.
+
+screening_only.tasks.refresh_screening_coverage rebuilds the current year
+nightly (classroom moves do not fire screening signals) and freezes years
+that have ended.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+
+from accounts.models import Organization
+from screening.models import Screening
+
+from .models import ScreeningCoverage
+from .services import academic_year_label_for_date, academic_year_range
+
+OrgYear = Tuple[int, str]   # (organization_id, academic year label)
+
+
+def academic_year_of(dt) -> str:
+    return academic_year_label_for_date(timezone.localtime(dt).date())
+
+
+def current_academic_year() -> str:
+    return academic_year_label_for_date(timezone.localdate())
+
+
+def _coverage_rows(org_id: int, label: str) -> List[ScreeningCoverage]:
+    """One GROUP BY student over the year's screenings, bucketed per classroom."""
+    start_dt, end_dt = academic_year_range(label)
+    per_student = (
+        Screening.objects
+        .filter(organization_id=org_id, screened_at__gte=start_dt, screened_at__lt=end_dt)
+        .values("student_id", "student__classroom_id", "student__classroom__grade", "student__classroom__division")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    by_classroom = {}
+    for row in per_student:
+        key = row["student__classroom_id"]
+        cov = by_classroom.get(key)
+        if cov is None:
+            cov = by_classroom[key] = ScreeningCoverage(
+                organization_id=org_id, academic_year=label, classroom_id=key,
+                grade=row["student__classroom__grade"] or "", division=row["student__classroom__division"] or "",
+            )
+        if row["n"] >= 2:
+            cov.screened_twice += 1
+        else:
+            cov.screened_once += 1
+        cov.total_students += 1
+    return list(by_classroom.values())
+
+
+def rebuild_coverage(org_id: int, label: str, *, freeze: bool = False, force: bool = False) -> int:
+    """
+    Recompute one (org, year) from Screening rows; returns rows written.
+    A frozen year is left alone unless force=True.
+    """
+    with transaction.atomic():
+        # Serialises rebuilds and incremental updates of the org's coverage.
+        Organization.objects.select_for_update().filter(pk=org_id).first()
+        existing = ScreeningCoverage.objects.filter(organization_id=org_id, academic_year=label)
+        if not force and existing.filter(frozen=True).exists():
+            return 0
+        rows = _coverage_rows(org_id, label)
+        for row in rows:
+            row.frozen = freeze
+        existing.delete()
+        ScreeningCoverage.objects.bulk_create(rows)
+    return len(rows)
+
+
+def refresh_coverage(pairs: Iterable[OrgYear]) -> int:
+    return sum(rebuild_coverage(org_id, label) for org_id, label in sorted(set(pairs)))
+
+
+def refresh_coverage_on_commit(pairs: Iterable[OrgYear]) -> None:
+    pairs = {(org_id, label) for org_id, label in pairs if org_id}
+    if pairs:
+        transaction.on_commit(lambda: refresh_coverage(pairs))
+
+
+def record_new_screening(s: Screening) -> None:
+    label = academic_year_of(s.screened_at)
+    if label != current_academic_year():
+        # Late data for an earlier year: full rebuild, which respects freezing.
+        rebuild_coverage(s.organization_id, label)
+        return
+    start_dt, end_dt = academic_year_range(label)
+    with transaction.atomic():
+        Organization.objects.select_for_update().filter(pk=s.organization_id).first()
+        counts = Screening.objects.filter(
+            organization_id=s.organization_id, student_id=s.student_id,
+            screened_at__gte=start_dt, screened_at__lt=end_dt,
+        ).aggregate(n=Count("id"), earlier=Count("id", filter=Q(id__lt=s.pk)))
+        if counts["n"] == 1:
+            classroom_id = s.student.classroom_id if s.student_id else None
+            updated = ScreeningCoverage.objects.filter(
+                organization_id=s.organization_id, academic_year=label, classroom_id=classroom_id,
+            ).update(screened_once=F("screened_once") + 1, total_students=F("total_students") + 1)
+        elif counts["earlier"] <= 1:
+            # The student's second screening: several can commit before their callbacks
+            # run, so the once -> twice move is not inferred from the count; rebuild.
+            updated = 0
+        else:
+            return
+    if not updated:
+        rebuild_coverage(s.organization_id, label)
+
+
+def refresh_current_year(org_ids: Optional[Iterable[int]] = None) -> int:
+    """Rebuild the current year for every org with screenings in it."""
+    label = current_academic_year()
+    start_dt, end_dt = academic_year_range(label)
+    orgs = Screening.objects.filter(screened_at__gte=start_dt, screened_at__lt=end_dt)
+    stored = ScreeningCoverage.objects.filter(academic_year=label)
+    if org_ids is not None:
+        org_ids = list(org_ids)
+        orgs = orgs.filter(organization_id__in=org_ids)
+        stored = stored.filter(organization_id__in=org_ids)
+    org_set: Set[int] = set(orgs.values_list("organization_id", flat=True).distinct())
+    # Orgs whose last screening of the year was deleted still have rows to clear.
+    org_set.update(stored.values_list("organization_id", flat=True).distinct())
+    return refresh_coverage((org_id, label) for org_id in org_set)
+
+
+def freeze_past_years() -> int:
+    """Final rebuild + freeze of every ended year that still has unfrozen rows."""
+    current = current_academic_year()
+    pairs = set(
+        ScreeningCoverage.objects.filter(frozen=False).exclude(academic_year=current)
+        .values_list("organization_id", "academic_year").distinct()
+    )
+    frozen = 0
+    for org_id, label in sorted(pairs):
+        if label < current:
+            rebuild_coverage(org_id, label, freeze=True)
+            frozen += 1
+    return frozen
+
+
+def rebuild_all_coverage(org_id: Optional[int] = None) -> int:
+    """Build every year with screenings (past years frozen); returns rows written."""
+    current = current_academic_year()
+    qs = Screening.objects.all()
+    if org_id is not None:
+        qs = qs.filter(organization_id=org_id)
+    years = defaultdict(set)
+    spans = qs.values("organization_id").annotate(first=Min("screened_at"), last=Max("screened_at")).order_by()
+    for r in spans:
+        first, last = int(academic_year_of(r["first"])[:4]), int(academic_year_of(r["last"])[:4])
+        for y in range(first, last + 1):
+            years[r["organization_id"]].add(f"{y}-{str(y + 1)[-2:]}")
+    written = 0
+    for org, labels in sorted(years.items()):
+        for label in sorted(labels):
+            written += rebuild_coverage(org, label, freeze=label < current, force=True)
+    return written
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Organization
+from screening_only.coverage import rebuild_all_coverage
+
+
+class Command(BaseCommand):
+    help = "Rebuild ScreeningCoverage from Screening rows for every academic year (past years are frozen)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: all)")
+
+    def handle(self, *args, **opts):
+        orgs = Organization.objects.all().order_by("id")
+        if opts.get("org"):
+            orgs = orgs.filter(pk=opts["org"])
+        total = 0
+        for org in orgs.iterator():
+            n = rebuild_all_coverage(org.id)
+            if n:
+                self.stdout.write(f"{org.name}: {n} rows")
+            total += n
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} coverage rows written."))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.14 on 2026-10-16 21:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roster', '0004_alter_student_unique_together_and_more'),
+        ('accounts', '0004_alter_organization_org_type_alter_orgmembership_role'),
+        ('screening_only', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=9)),
+                ('grade', models.CharField(blank=True, default='', max_length=64)),
+                ('division', models.CharField(blank=True, default='', max_length=64)),
+                ('screened_once', models.PositiveIntegerField(default=0)),
+                ('screened_twice', models.PositiveIntegerField(default=0)),
+                ('total_students', models.PositiveIntegerField(default=0)),
+                ('frozen', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('classroom', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='roster.classroom')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screening_coverage', to='accounts.organization')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='screeningcoverage',
+            constraint=models.UniqueConstraint(fields=('organization', 'academic_year', 'classroom'), name='uniq_screening_coverage_class_year'),
+        ),
+    ]
@@ -77,3 +77,49 @@ class ScreeningTermsAcceptance(models.Model):
 
     def __str__(self) -> str:
         return f"TermsAcceptance({self.organization_id},{self.user_id},{self.actor_role},{self.version})"
+
+
+class ScreeningCoverage(models.Model):
+    """
+    Per (organization, academic year, classroom) screening coverage: students
+    screened once, twice or more, and in total during the year.
+
+    Backs the Screening Program performance dashboards and the academic-year
+    picker. Maintained by screening_only.coverage (signals + nightly refresh; rebuild
+    with `manage.py rebuild_screening_coverage`);
+    past years are frozen at their last refresh, so promotions to a new
+    classroom do not move them. grade/division are copied for the same reason.
+    """
+    organization = models.ForeignKey(
+        "accounts.Organization",
+        on_delete=models.CASCADE,
+        related_name="screening_coverage",
+    )
+    academic_year = models.CharField(max_length=9)   # "2024-25"
+    classroom = models.ForeignKey(
+        "roster.Classroom",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    grade = models.CharField(max_length=64, blank=True, default="")
+    division = models.CharField(max_length=64, blank=True, default="")
+
+    screened_once = models.PositiveIntegerField(default=0)
+    screened_twice = models.PositiveIntegerField(default=0)
+    total_students = models.PositiveIntegerField(default=0)
+
+    frozen = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["organization", "academic_year", "classroom"],
+                name="uniq_screening_coverage_class_year",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Coverage({self.organization_id},{self.academic_year},{self.grade} {self.division})"
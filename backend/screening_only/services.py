@@ -1,13 +1,11 @@
 from __future__ import annotations
 from messaging.services import whatsapp_click_to_chat_url
-from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 from django.conf import settings
 from django.core import signing
-from django.db.models import Count
 from django.utils import timezone
 from django.utils.text import slugify
 
@@ -18,7 +16,11 @@ from messaging.i18n import flags_to_text
 from roster.services import _grades_nursery_to_12
 DEFAULT_GRADES=_grades_nursery_to_12()
 
-from screening.models import Screening
+from .models import ScreeningCoverage
+
+if TYPE_CHECKING:   # annotation only
+    from screening.models import Screening
+
 import uuid
 from django.urls import reverse
 
@@ -69,14 +71,12 @@ def academic_year_range(label: str, start_month: int = ACADEMIC_YEAR_START_MONTH
 
 
 def available_academic_years(org: Organization, years_back: int = 5) -> List[str]:
-    today = timezone.localdate()
-    current = academic_year_label_for_date(today)
-    # Simple last N options; can be refined if you want min/max from Screening data.
-    start_year = int(current.split("-")[0])
-    labels = []
-    for y in range(start_year - years_back + 1, start_year + 1):
-        labels.append(f"{y}-{str(y+1)[-2:]}")
-    return list(reversed(labels))
+    """Most recent academic years (newest first) with screenings, from ScreeningCoverage."""
+    labels = (
+        ScreeningCoverage.objects.filter(organization=org)
+        .values_list("academic_year", flat=True).distinct().order_by("-academic_year")
+    )
+    return list(labels[:years_back])
 
 
 def _grade_rank_map() -> Dict[str, int]:
@@ -87,40 +87,18 @@ def _grade_rank_map() -> Dict[str, int]:
     return ranks
 
 
-def screening_counts_by_class(org: Organization, start_dt: datetime, end_dt: datetime) -> List[dict]:
+def screening_counts_by_class(org: Organization, academic_year: str) -> List[dict]:
     """
     Returns rows like:
       {"grade": "4", "division": "C", "screened_once": 12, "screened_twice": 3, "total_students": 15}
-    computed based on number of Screening rows per student in the given range.
+    read from ScreeningCoverage (students by number of screenings in the year).
     """
     ranks = _grade_rank_map()
-
-    qs = (
-        Screening.objects
-        .filter(organization=org, screened_at__gte=start_dt, screened_at__lt=end_dt)
-        .values(
-            "student_id",
-            "student__classroom_id",
-            "student__classroom__grade",
-            "student__classroom__division",
-        )
-        .annotate(n=Count("id"))
+    rows = list(
+        ScreeningCoverage.objects.filter(organization=org, academic_year=academic_year)
+        .values("grade", "division", "screened_once", "screened_twice", "total_students")
     )
 
-    by_classroom = defaultdict(lambda: {"grade": "", "division": "", "screened_once": 0, "screened_twice": 0, "total_students": 0})
-    for row in qs:
-        key = row["student__classroom_id"] or 0
-        d = by_classroom[key]
-        d["grade"] = row["student__classroom__grade"] or ""
-        d["division"] = row["student__classroom__division"] or ""
-        if row["n"] >= 2:
-            d["screened_twice"] += 1
-        elif row["n"] == 1:
-            d["screened_once"] += 1
-        d["total_students"] += 1
-
-    rows = list(by_classroom.values())
-
     def _sort_key(r: dict):
         g = str(r.get("grade") or "")
         return (ranks.get(g, 10_000), str(r.get("division") or ""))
@@ -0,0 +1,47 @@
+"""Screening Program signals: keep ScreeningCoverage in step with Screening rows."""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from screening.models import Screening
+
+from .coverage import academic_year_of, record_new_screening, refresh_coverage_on_commit
+
+_COVERAGE_FIELDS = {"organization", "organization_id", "student", "student_id", "screened_at"}
+
+
+def _touches_coverage(update_fields) -> bool:
+    return update_fields is None or bool(_COVERAGE_FIELDS & set(update_fields))
+
+
+@receiver(pre_save, sender=Screening, dispatch_uid="screening-only-coverage-pre")
+def _coverage_capture_previous(sender, instance: Screening, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.pk or not _touches_coverage(update_fields):
+        return
+    prev = Screening.objects.filter(pk=instance.pk).values_list("organization_id", "screened_at").first()
+    instance._coverage_prev = (prev[0], academic_year_of(prev[1])) if prev else None
+
+
+@receiver(post_save, sender=Screening, dispatch_uid="screening-only-coverage-save")
+def _coverage_after_save(sender, instance: Screening, created: bool, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        transaction.on_commit(lambda: record_new_screening(instance))
+        return
+    if not _touches_coverage(update_fields):
+        return
+    pairs = {(instance.organization_id, academic_year_of(instance.screened_at))}
+    prev = getattr(instance, "_coverage_prev", None)
+    instance._coverage_prev = None
+    if prev:
+        pairs.add(prev)
+    refresh_coverage_on_commit(pairs)
+
+
+@receiver(post_delete, sender=Screening, dispatch_uid="screening-only-coverage-delete")
+def _coverage_after_delete(sender, instance: Screening, **kwargs):
+    refresh_coverage_on_commit([(instance.organization_id, academic_year_of(instance.screened_at))])
@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .coverage import freeze_past_years, refresh_current_year
+
+
+@shared_task
+def refresh_screening_coverage():
+    """
+    Nightly ScreeningCoverage backstop: rebuild the current academic year (picks
+    up classroom moves and writes that bypassed signals) and freeze ended years.
+    """
+    frozen = freeze_past_years()
+    rows = refresh_current_year()
+    return {"current_rows": rows, "years_frozen": frozen}
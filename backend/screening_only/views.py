@@ -13,8 +13,9 @@ from django.utils import timezone
 from messaging.i18n import flags_to_text
 from accounts.models import Organization, OrgMembership, Role
 from roster.models import Classroom, Student
+from screening.growth import trajectory_for_screening
 from screening.models import Screening
-from django.db.models import OuterRef, Subquery, Q
+from django.db.models import Exists, F, OuterRef, Q
 from .decorators import require_screening_only_admin, require_screening_only_teacher
 from .forms import SchoolEnrollmentForm, TeacherAccessForm
 from .google_oauth import (
@@ -27,6 +28,7 @@ from .google_oauth import (
 from .models import ScreeningSchoolProfile, ScreeningTermsAcceptance
 from .services import (
     TERMS_VERSION,
+    academic_year_label_for_date,
     academic_year_range,
     available_academic_years,
     screening_counts_by_class,
@@ -593,10 +595,10 @@ def admin_performance_dashboard(request: HttpRequest) -> HttpResponse:
     ay = request.GET.get("ay") or ""
     years = available_academic_years(org)
     if not ay:
-        ay = years[0] if years else ""
+        ay = years[0] if years else academic_year_label_for_date(timezone.localdate())
 
     start_dt, end_dt = academic_year_range(ay)
-    rows = screening_counts_by_class(org, start_dt, end_dt)
+    rows = screening_counts_by_class(org, ay)
 
     return render(
         request,
@@ -706,9 +708,11 @@ def teacher_dashboard(request: HttpRequest) -> HttpResponse:
     q = (request.GET.get("q") or "").strip()
     lang = (request.GET.get("lang") or "en").strip().lower()
 
+    # Students this teacher has screened (semi-join, no DISTINCT over the join)
+    screened_by_me = Screening.objects.filter(student=OuterRef("pk"), teacher=request.user)
     students = (
-        Student.objects.filter(organization=org, screenings__teacher=request.user)
-        .distinct()
+        Student.objects.filter(organization=org)
+        .filter(Exists(screened_by_me))
         .select_related("classroom")
     )
 
@@ -722,17 +726,11 @@ def teacher_dashboard(request: HttpRequest) -> HttpResponse:
             Q(student_code__icontains=q)
         )
 
-    # Annotate last screening
-    from django.db.models import OuterRef, Subquery
-
-    last_screening = (
-        Screening.objects.filter(student=OuterRef("pk"), teacher=request.user)
-        .order_by("-screened_at")
-    )
+    # Last screening from the LatestScreening snapshot (plain LEFT JOIN)
     students = students.annotate(
-        last_screening_id=Subquery(last_screening.values("id")[:1]),
-        last_screened_at=Subquery(last_screening.values("screened_at")[:1]),
-        last_risk=Subquery(last_screening.values("risk_level")[:1]),
+        last_screening_id=F("latest_screening__screening_id"),
+        last_screened_at=F("latest_screening__screened_at"),
+        last_risk=F("latest_screening__risk_level"),
     ).order_by("last_name", "first_name", "id")
 
     for s in students:
@@ -834,6 +832,7 @@ def parent_result(request: HttpRequest, token: str) -> HttpResponse:
             "flags_text": flags_text,
             "video_url": reverse("screening_only:parent_video", args=[token]),
             "is_parent_view": True,
+            "growth": trajectory_for_screening(s),
         },
     )
 
@@ -874,10 +873,10 @@ def inditech_school_dashboard(request: HttpRequest, org_id: int) -> HttpResponse
     ay = request.GET.get("ay") or ""
     years = available_academic_years(org)
     if not ay:
-        ay = years[0] if years else ""
+        ay = years[0] if years else academic_year_label_for_date(timezone.localdate())
 
     start_dt, end_dt = academic_year_range(ay)
-    rows = screening_counts_by_class(org, start_dt, end_dt)
+    rows = screening_counts_by_class(org, ay)
 
     return render(
         request,
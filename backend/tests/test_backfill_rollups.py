@@ -0,0 +1,23 @@
+from datetime import date
+import pytest
+from django.core.management import call_command
+from accounts.models import Organization
+from reporting.models import RollupBackfillShard, SchoolStatDaily
+
+@pytest.mark.django_db
+def test_backfill_is_sharded_and_resumable(capsys):
+    a = Organization.objects.create(name="A", screening_link_token="a")
+    Organization.objects.create(name="B", screening_link_token="b")
+    args = ["backfill_rollups", "--start", "2026-01-01", "--end", "2026-02-14", "--shard-days", "15", "--workers", "1"]
+
+    call_command(*args)
+    assert RollupBackfillShard.objects.filter(completed_at__isnull=False).count() == 6   # 2 orgs x 3 ranges
+    assert SchoolStatDaily.objects.count() == 90
+    assert "org-days/s" in capsys.readouterr().out
+
+    # An interrupted shard is the only thing redone.
+    RollupBackfillShard.objects.filter(organization=a, start_day=date(2026, 1, 16)).update(completed_at=None)
+    call_command(*args)
+    assert "1 shards, 15 org-days" in capsys.readouterr().out
+    call_command(*args)
+    assert "Nothing to do" in capsys.readouterr().out
@@ -0,0 +1,100 @@
+import gzip
+from datetime import timedelta
+from unittest import mock
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from accounts.models import Organization, OrgMembership, Role
+from reporting import exports
+from reporting.models import ExportJob
+
+User = get_user_model()
+PARAMS = {"start": "2024-01-01", "end": "2024-06-30"}
+
+
+@pytest.fixture(autouse=True)
+def export_root(settings, tmp_path):
+    settings.EXPORT_STORAGE_BACKEND = "django.core.files.storage.FileSystemStorage"
+    settings.EXPORT_ROOT = str(tmp_path)
+    exports.get_export_storage.cache_clear()
+    yield tmp_path
+    exports.get_export_storage.cache_clear()
+
+
+def _admin(client, org, email):
+    u = User.objects.create_user(email=email, password="x")
+    OrgMembership.objects.create(user=u, organization=org, role=Role.ORG_ADMIN)
+    client.login(email=email, password="x")
+    return u
+
+
+def _done_job(org):
+    job, _ = exports.request_export(org=org, kind=ExportJob.Kind.SCHOOL_SUMMARY, params=PARAMS)
+    exports.build_export(job)
+    job.refresh_from_db()
+    return job
+
+
+@pytest.mark.django_db
+def test_identical_requests_share_one_job(settings):
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    request = lambda **kw: exports.request_export(org=org, kind=ExportJob.Kind.SCHOOL_SUMMARY, **kw)
+
+    job, created = request(params=PARAMS)
+    assert created
+    assert request(params=dict(PARAMS)) == (job, False)            # in flight
+    assert request(params={**PARAMS, "end": "2024-07-31"})[1]      # other params, other job
+
+    exports.build_export(job)
+    assert request(params=PARAMS) == (job, False)                  # recent artifact
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        finished_at=timezone.now() - timedelta(seconds=settings.EXPORT_REUSE_SECONDS + 1))
+    fresh, created = request(params=PARAMS)
+    assert created and fresh.pk != job.pk
+
+
+@pytest.mark.django_db
+def test_download_streams_the_stored_artifact(client):
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    job = _done_job(org)
+    _admin(client, org, "admin@test")
+
+    resp = client.get(exports.download_url(job))
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/gzip"
+    body = gzip.decompress(b"".join(resp.streaming_content)).decode()
+    assert body.startswith("metric,value") and "screened" in body
+
+
+@pytest.mark.django_db
+def test_bad_links_and_other_orgs_are_refused(client):
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    other = Organization.objects.create(name="T", screening_link_token="t")
+    job = _done_job(org)
+    url = exports.download_url(job)
+
+    _admin(client, other, "other@test")
+    assert client.get(url).status_code == 403                      # valid link, wrong school
+
+    client.logout()
+    _admin(client, org, "admin@test")
+    tampered = url[:-1] + ("A" if url[-1] != "A" else "B")
+    assert client.get(tampered).status_code == 403
+    later = timezone.now().timestamp() + 2 * 24 * 3600
+    with mock.patch("django.core.signing.time.time", return_value=later):
+        assert client.get(url).status_code == 403                  # past EXPORT_LINK_MAX_AGE
+
+
+@pytest.mark.django_db
+def test_purge_deletes_expired_artifacts_and_jobs(export_root):
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    expired = _done_job(org)
+    kept = _done_job(Organization.objects.create(name="T", screening_link_token="t"))
+    ExportJob.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert exports.purge_expired_exports() == 1
+    assert not (export_root / expired.file_name).exists()
+    assert not ExportJob.objects.filter(pk=expired.pk).exists()
+    assert (export_root / kept.file_name).exists()
+    assert ExportJob.objects.filter(pk=kept.pk).exists()
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from django.utils import timezone
+from accounts.models import Organization
+from roster.models import Classroom, Student
+from screening.flag_index import flag_codes, flag_prevalence, students_with_any_flag
+from screening.management.commands import rescore_screenings
+from screening.models import Screening, ScreeningFlag
+from screening.sync import sync_screenings
+
+_MEALS = ("breakfast_eaten", "lunch_eaten", "green_leafy_veg", "other_vegetables", "fruits", "dal_pulses_beans",
+          "milk_curd", "egg", "fish_chicken_meat", "nuts_groundnuts", "ssb_or_packaged_snacks")
+
+
+def _expected():
+    """Index rows derived from scratch out of Screening.red_flags."""
+    return {
+        (s.id, s.organization_id, code, s.screened_at)
+        for s in Screening.objects.all()
+        for code in flag_codes(s.red_flags)
+    }
+
+
+def _index():
+    return set(ScreeningFlag.objects.values_list("screening_id", "organization_id", "code", "screened_at"))
+
+
+@pytest.mark.django_db
+def test_index_follows_screening_writes(settings):
+    settings.PID_HMAC_KEY = "test-key"
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    room, _ = Classroom.objects.get_or_create(organization=org, grade="5", division="A")
+    st = Student.objects.create(organization=org, classroom=room, pid="p1", student_code="1", gender="M")
+    now = timezone.now()
+
+    a = Screening.objects.create(organization=org, student=st, pid="p1", screened_at=now - timedelta(days=3),
+                                 red_flags=["health_pallor", "baz=-2.10", "health_pallor", "food_insecurity"])
+    b = Screening.objects.create(organization=org, student=st, pid="p1", screened_at=now, red_flags=["bmi=15.0"])
+    assert _index() == _expected() and ScreeningFlag.objects.filter(screening=a).count() == 2
+
+    a.red_flags = ["appetite_not_hungry"]
+    a.save()
+    b.screened_at = now - timedelta(days=1)
+    b.red_flags = ["health_pallor"]
+    b.save(update_fields=["screened_at", "red_flags"])
+    assert _index() == _expected()
+
+    a.delete()
+    assert _index() == _expected()
+
+    # bulk rescore: bulk_update skips signals, the command rewrites the index itself
+    Screening.objects.create(organization=org, student=st, pid="p1", gender="M", age_years=9, height_cm=130,
+                             weight_kg=28, muac_cm=14, answers={"appetite": "POOR"}, red_flags=["stale_code"])
+    with mock.patch.object(rescore_screenings, "mark_dirty"):
+        call_command("rescore_screenings", "--workers", "1", stdout=mock.Mock())
+    assert "stale_code" not in {row[2] for row in _index()}
+    assert _index() == _expected()
+
+    # batch sync: bulk_create skips signals, sync writes the rows for the new screenings
+    item = {"idempotency_key": "k1", "grade": "5", "division": "A", "student_name": "Asha",
+            "unique_student_id": "R1", "dob": "2015-01-01", "sex": "F", "parent_phone_e164": "9876543210",
+            "weight_kg_r1": 18, "height_cm_r1": 130, "appetite": False, "diet_type": "LACTO_VEG",
+            "deworming_taken": "yes", "deworming_date": 3, "hunger_vital_sign": "OFTEN_TRUE",
+            "health_pallor": True, **{k: True for k in _MEALS}}
+    [result] = sync_screenings(org, [item])
+    assert result["status"] == "created"
+    assert ScreeningFlag.objects.filter(screening_id=result["screening_id"], code="health_pallor").exists()
+    assert _index() == _expected()
+
+    ScreeningFlag.objects.all().delete()
+    call_command("backfill_screening_flags", "--chunk-size", "1", stdout=mock.Mock())
+    assert _index() == _expected()
+
+
+@pytest.mark.django_db
+def test_prevalence_reads_the_index(django_assert_num_queries):
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    other = Organization.objects.create(name="T", screening_link_token="t")
+    now = timezone.now()
+    flags = [["health_pallor", "food_insecurity"], ["health_pallor"], ["health_pallor", "baz=-3.0"], []]
+    for i, red_flags in enumerate(flags):
+        st = Student.objects.create(organization=org, pid=f"p{i}", gender="F")
+        for days in (2, 40):   # each student screened twice, once outside the window
+            Screening.objects.create(organization=org, student=st, pid=st.pid, red_flags=red_flags,
+                                     screened_at=now - timedelta(days=days))
+    st = Student.objects.create(organization=other, pid="q", gender="F")
+    Screening.objects.create(organization=other, student=st, pid="q", red_flags=["food_insecurity"])
+
+    start = now - timedelta(days=30)
+    with django_assert_num_queries(1):   # one GROUP BY over ScreeningFlag
+        rows = flag_prevalence(org, start, now)
+    assert rows == [
+        {"code": "health_pallor", "screenings": 3, "students": 3},
+        {"code": "food_insecurity", "screenings": 1, "students": 1},
+    ]
+    assert flag_prevalence(org) == [
+        {"code": "health_pallor", "screenings": 6, "students": 3},
+        {"code": "food_insecurity", "screenings": 2, "students": 1},
+    ]
+    assert flag_prevalence(org, codes=["food_insecurity"]) == [
+        {"code": "food_insecurity", "screenings": 2, "students": 1},
+    ]
+    assert students_with_any_flag(org, ["health_pallor", "food_insecurity"], start, now) == 3
+    assert students_with_any_flag(org, ["food_insecurity"]) == 1
+
+    # and it agrees with counting red_flags directly
+    by_code = ScreeningFlag.objects.filter(organization=org).values("code").annotate(n=Count("id"))
+    assert {r["code"]: r["n"] for r in by_code} == {
+        code: sum(code in flag_codes(s.red_flags) for s in Screening.objects.filter(organization=org))
+        for code in ("health_pallor", "food_insecurity")
+    }
@@ -0,0 +1,89 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Organization
+from assist.models import Application
+from program.models import ComplianceSubmission, Enrollment, MonthlySupply
+from reporting.funnel import compute_funnel, funnel_for_org
+from roster.models import Classroom, Student
+from screening.models import Screening
+
+@pytest.fixture(autouse=True)
+def _clear_cache(settings):
+    settings.REPORTING_CACHE_ALLOW_LOCAL = True   # one process: locmem is shared here
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.mark.django_db
+def test_funnel_counts_rates_and_latencies(client, django_assert_num_queries):
+    org = Organization.objects.create(name="A", screening_link_token="a")
+    room = Classroom.objects.create(organization=org, grade="5", division="A")
+    now = timezone.now()
+    today = timezone.localdate()
+    st = [Student.objects.create(organization=org, classroom=room, pid=f"p{i}", student_code=str(i)) for i in range(4)]
+    Screening.objects.create(organization=org, student=st[0], screened_at=now - timedelta(days=20), risk_level="RED")
+    Screening.objects.create(organization=org, student=st[1], screened_at=now - timedelta(days=10), risk_level="RED")
+    Screening.objects.create(organization=org, student=st[2], screened_at=now - timedelta(days=5))
+    Screening.objects.create(organization=org, student=st[3], screened_at=now - timedelta(days=400), risk_level="RED")
+
+    app = Application.objects.create(organization=org, student=st[0], status="APPROVED",
+                                     applied_at=now - timedelta(days=18), forwarded_at=now - timedelta(days=16),
+                                     sapa_reviewed_at=now - timedelta(days=12))
+    Application.objects.create(organization=org, student=st[1], applied_at=now - timedelta(days=9))
+    enrollment = Enrollment.objects.create(organization=org, application=app, student=st[0], created_at=now - timedelta(days=11),
+                                           start_date=today, end_date=today + timedelta(days=180))
+    supply = MonthlySupply.objects.get(enrollment=enrollment, month_index=1)
+    supply.delivered_on = today - timedelta(days=6)
+    supply.save()
+    ComplianceSubmission.objects.update_or_create(monthly_supply=supply, defaults={
+        "status": "COMPLIANT", "submitted_at": now - timedelta(days=1)})
+
+    start, end = today - timedelta(days=180), today
+    with django_assert_num_queries(1):
+        funnel = compute_funnel(org, start, end)
+    stages = {s["key"]: s for s in funnel["stages"]}
+    assert funnel["cohort"] == 3
+    assert [s["count"] for s in funnel["stages"]] == [3, 2, 2, 1, 1, 1, 1, 1]
+    assert stages["red_flagged"]["rate_from_previous"] == 66.7
+    assert stages["forwarded"]["rate_from_previous"] == 50.0
+    assert stages["compliant"]["rate_from_screened"] == 33.3
+    assert stages["applied"]["median_days_from_previous"] == 1.5   # 2 days (st0) and 1 day (st1)
+    assert stages["screened"]["median_days_from_previous"] is None
+
+    funnel_for_org(org, start, end)
+    with django_assert_num_queries(0):
+        assert funnel_for_org(org, start, end) == funnel
+
+    get_user_model().objects.create_superuser(email="root@test", password="x")
+    client.login(email="root@test", password="x")
+    resp = client.get(reverse("reporting:inditech_school", args=[org.id]))
+    assert b"Program funnel" in resp.content
+    csv_body = client.get(reverse("reporting:inditech_export_funnel_csv", args=[org.id])).content.decode()
+    assert "Compliant,1,100.0,33.3," in csv_body
+
+
+@pytest.mark.django_db
+def test_earlier_cycle_records_do_not_count_for_the_cohort():
+    org = Organization.objects.create(name="A", screening_link_token="a")
+    st = Student.objects.create(organization=org, pid="p", student_code="1")
+    now = timezone.now()
+    today = timezone.localdate()
+    # last year's cycle: screened, applied, approved and enrolled long before the window
+    old = Application.objects.create(organization=org, student=st, status="APPROVED",
+                                     applied_at=now - timedelta(days=400), forwarded_at=now - timedelta(days=399),
+                                     sapa_reviewed_at=now - timedelta(days=398))
+    Enrollment.objects.create(organization=org, application=old, student=st, created_at=now - timedelta(days=397),
+                              start_date=today - timedelta(days=397), end_date=today - timedelta(days=217))
+    Screening.objects.create(organization=org, student=st, screened_at=now - timedelta(days=10), risk_level="RED")
+
+    funnel = compute_funnel(org, today - timedelta(days=180), today)
+    assert [s["count"] for s in funnel["stages"]] == [1, 1, 0, 0, 0, 0, 0, 0]
+
+    Application.objects.create(organization=org, student=st, applied_at=now - timedelta(days=8))
+    funnel = compute_funnel(org, today - timedelta(days=180), today)
+    assert [s["count"] for s in funnel["stages"]] == [1, 1, 1, 0, 0, 0, 0, 0]
+    assert funnel["stages"][2]["median_days_from_previous"] == 2.0
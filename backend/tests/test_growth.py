@@ -0,0 +1,43 @@
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from accounts.models import Organization
+from roster.models import Classroom, Student
+from screening.growth import assess_measurement, trajectories_for_classroom, trajectory_for_pid
+from screening.models import Screening
+
+def _screen(org, student, days_ago, height, weight, baz=None):
+    return Screening.objects.create(
+        organization=org, student=student, pid=student.pid, gender="F",
+        screened_at=timezone.now() - timedelta(days=days_ago),
+        height_cm=height, weight_kg=weight, baz=baz,
+    )
+
+@pytest.mark.django_db
+def test_trajectory_velocities_flags_and_cache():
+    org = Organization.objects.create(name="S")
+    room = Classroom.objects.create(organization=org, grade="5", division="A")
+    a = Student.objects.create(organization=org, classroom=room, pid="pid-a", student_code="1")
+    b = Student.objects.create(organization=org, classroom=room, pid="pid-b", student_code="2")
+    _screen(org, a, 365, 120, 22, 0.5)
+    _screen(org, a, 183, 123, 23, 0.3)
+    _screen(org, a, 0, 126, 21, -0.4)      # weight loss + BAZ drop > 0.67 in a year
+    _screen(org, b, 183, 120, 22)
+    _screen(org, b, 0, 145, 22)             # +25 cm in 6 months: implausible
+
+    trajectories = trajectories_for_classroom(room)
+    ta, tb = trajectories["pid-a"], trajectories["pid-b"]
+    assert len(ta.intervals) == 2
+    assert ta.intervals[0].height_delta == 3.0
+    assert ta.intervals[0].height_velocity == pytest.approx(0.5, abs=0.01)
+    assert set(ta.flags) == {"weight_loss", "baz_faltering"} and ta.is_faltering and not ta.needs_review
+    assert tb.flags == ["height_jump"] and tb.needs_review
+
+    # Cached until a new screening arrives for that PID.
+    assert trajectory_for_pid(org.id, "pid-a") is not None
+    s = _screen(org, a, -1, 126.5, 21.2)
+    assert trajectory_for_pid(org.id, "pid-a").screening_ids[-1] == s.id
+    assert trajectory_for_pid(org.id, "pid-a").upto(ta.screening_ids[1]).screening_ids == ta.screening_ids[:2]
+
+    assert assess_measurement(org.id, "pid-b", screened_at=timezone.now() + timedelta(days=2),
+                              height_cm=146, weight_kg=40) == ["weight_jump"]
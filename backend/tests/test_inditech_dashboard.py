@@ -0,0 +1,40 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Organization
+from reporting.models import SchoolReportStatus, SchoolStatDaily
+
+User = get_user_model()
+
+@pytest.mark.django_db
+def test_inditech_dashboard_is_one_sorted_paged_read(client, django_assert_max_num_queries):
+    today = timezone.localdate()
+    orgs = [Organization.objects.create(name=f"School {i:02d}", screening_link_token=f"t-{i}") for i in range(60)]
+    SchoolStatDaily.objects.bulk_create(
+        [SchoolStatDaily(organization=o, day=today - timedelta(days=d), screened=i, red_flags=1,
+                         compliance_submitted=4, compliance_compliant=i % 5)
+         for i, o in enumerate(orgs) for d in (1, 3)]
+        + [SchoolStatDaily(organization=orgs[0], day=today - timedelta(days=400), screened=999)]
+    )
+    SchoolReportStatus.objects.create(organization=orgs[7], next_due_on=today)
+    User.objects.create_superuser(email="root@test", password="x")
+    client.login(email="root@test", password="x")
+    url = reverse("reporting:inditech_dashboard")
+
+    with django_assert_max_num_queries(6):
+        resp = client.get(url + "?sort=-screened")
+    assert resp.status_code == 200
+    rows = list(resp.context["rows"])
+    assert len(rows) == 50 and resp.context["page_obj"].paginator.count == 60
+    assert [r["name"] for r in rows[:2]] == ["School 59", "School 58"]
+    assert rows[0]["screened"] == 118 and rows[1]["compliance_rate"] == 75.0
+    assert not SchoolReportStatus.objects.exclude(organization=orgs[7]).exists()   # GET writes nothing
+
+    resp = client.get(url + "?sort=-screened&page=2")
+    last = list(resp.context["rows"])
+    assert [r["name"] for r in last][-1] == "School 00" and last[-1]["screened"] == 0   # outside window ignored
+
+    resp = client.get(url + "?sort=due")
+    assert list(resp.context["rows"])[0]["next_due_on"] == today
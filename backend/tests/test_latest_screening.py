@@ -0,0 +1,86 @@
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from accounts.models import Organization
+from roster.models import Classroom, Student
+from screening.latest import rebuild_latest_screenings, record_new_screening
+from screening.models import LatestScreening, Screening
+
+FIELDS = ("organization_id", "pid", "screening_id", "screened_at", "risk_level",
+          "screening_count", "first_screened_at", "last_red_at")
+
+
+def _expected():
+    """Snapshots recomputed from scratch out of Screening rows."""
+    out = {}
+    for s in Screening.objects.order_by("student_id", "screened_at", "id"):
+        snap = out.setdefault(s.student_id, {"screening_count": 0, "first_screened_at": s.screened_at,
+                                             "last_red_at": None})
+        snap["screening_count"] += 1
+        snap.update(organization_id=s.organization_id, pid=s.pid, screening_id=s.id,
+                    screened_at=s.screened_at, risk_level=s.risk_level)
+        if s.risk_level == "RED":
+            snap["last_red_at"] = s.screened_at
+    return out
+
+
+def _actual():
+    return {row.pop("student_id"): row for row in LatestScreening.objects.values("student_id", *FIELDS)}
+
+
+def _check():
+    expected = _expected()
+    assert _actual() == expected               # maintained by the signals
+    rebuild_latest_screenings()
+    assert _actual() == expected               # and the from-scratch rebuild agrees
+
+
+@pytest.mark.django_db
+def test_snapshot_matches_recomputation_through_edits():
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    room, _ = Classroom.objects.get_or_create(organization=org, grade="5", division="A")
+    a = Student.objects.create(organization=org, classroom=room, pid="pa", student_code="1")
+    b = Student.objects.create(organization=org, classroom=room, pid="pb", student_code="2")
+    now = timezone.now()
+    screen = lambda st, days, risk: Screening.objects.create(
+        organization=org, student=st, pid=st.pid, screened_at=now - timedelta(days=days), risk_level=risk)
+
+    red = screen(a, 10, "RED")
+    screen(a, 5, "GREEN")                      # RED then GREEN: latest GREEN, last_red_at kept
+    older = screen(a, 20, "YELLOW")            # out of order: counted, does not become latest
+    screen(b, 3, "YELLOW")
+    _check()
+    assert LatestScreening.objects.get(student=a).risk_level == "GREEN"
+
+    older.screened_at = now - timedelta(days=1)
+    older.risk_level = "RED"
+    older.save()                               # edit moves it to latest
+    _check()
+
+    older.delete()
+    _check()
+    red.delete()
+    _check()
+    assert LatestScreening.objects.get(student=a).last_red_at is None
+
+    Screening.objects.filter(student=b).delete()
+    _check()
+    assert not LatestScreening.objects.filter(student=b).exists()
+
+
+@pytest.mark.django_db
+def test_pid_clash_updates_the_conflicting_snapshot(monkeypatch):
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    room, _ = Classroom.objects.get_or_create(organization=org, grade="5", division="A")
+    first = Student.objects.create(organization=org, classroom=room, pid="dup", student_code="1")
+    second = Student.objects.create(organization=org, classroom=room, pid="other", student_code="2")
+    s1 = Screening.objects.create(organization=org, student=first, pid="dup",
+                                  screened_at=timezone.now() - timedelta(days=2), risk_level="GREEN")
+
+    # a second student row for the same child: (organization, pid) is already taken
+    s2 = Screening(organization=org, student=second, pid="dup", screened_at=timezone.now(), risk_level="RED")
+    monkeypatch.setattr("screening.signals.record_new_screening", lambda s: None)
+    s2.save()
+    snap = record_new_screening(s2)
+    assert snap.student_id == first.id and snap.screening_id == s2.id and snap.screening_count == 2
+    assert LatestScreening.objects.get().screened_at > s1.screened_at
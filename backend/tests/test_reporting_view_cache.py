@@ -0,0 +1,51 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Organization
+from reporting.models import SchoolStatDaily
+from reporting.services import upsert_daily_rows
+
+User = get_user_model()
+
+@pytest.fixture(autouse=True)
+def _clear_cache(settings):
+    settings.REPORTING_CACHE_ALLOW_LOCAL = True   # one process: locmem is shared here
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.mark.django_db
+def test_summary_csv_cached_until_org_rollups_change(client, django_assert_max_num_queries):
+    org = Organization.objects.create(name="A", screening_link_token="a")
+    other = Organization.objects.create(name="B", screening_link_token="b")
+    day = timezone.localdate() - timedelta(days=2)
+    SchoolStatDaily.objects.create(organization=org, day=day, screened=5)
+    User.objects.create_superuser(email="root@test", password="x")
+    client.login(email="root@test", password="x")
+    url = reverse("reporting:inditech_export_school_csv", args=[org.id])
+
+    first = client.get(url).content
+    assert b"screened,5" in first
+    with django_assert_max_num_queries(4):   # session, user, membership, org lookups only
+        assert client.get(url).content == first
+
+    upsert_daily_rows([SchoolStatDaily(organization=other, day=day, screened=9)])
+    assert client.get(url).content == first
+
+    upsert_daily_rows([SchoolStatDaily(organization=org, day=day, screened=7)])
+    assert b"screened,7" in client.get(url).content
+
+    SchoolStatDaily.objects.filter(organization=org).delete()
+    assert b"screened,0" in client.get(url).content
+
+
+@pytest.mark.django_db
+def test_locmem_cache_is_bypassed_outside_tests(settings):
+    from reporting.view_cache import cached_for_org
+    settings.REPORTING_CACHE_ALLOW_LOCAL = False
+    calls = []
+    build = lambda: calls.append(1) or len(calls)
+    assert [cached_for_org(1, "v", (), build) for _ in range(2)] == [1, 2]
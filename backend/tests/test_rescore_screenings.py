@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from accounts.models import Organization
+from roster.models import Classroom, Student
+from screening.management.commands import rescore_screenings
+from screening.models import RescoreCheckpoint, Screening, ScreeningFlag
+from screening.services import RISK_RULES_VERSION
+
+
+@pytest.fixture
+def stale():
+    """Eight screenings stored as unversioned GREEN; half of them score RED."""
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    room, _ = Classroom.objects.get_or_create(organization=org, grade="5", division="A")
+    now = timezone.now()
+    rows = []
+    for i in range(8):
+        st = Student.objects.create(organization=org, classroom=room, pid=f"p{i}", student_code=str(i))
+        rows.append(Screening.objects.create(
+            organization=org, student=st, pid=st.pid, screened_at=now - timedelta(days=i), gender="M",
+            age_years=9, height_cm=130, weight_kg=28, muac_cm=14,
+            answers={"appetite": "POOR"} if i % 2 else {},
+        ))
+    return org, rows
+
+
+def _rescore(*args):
+    out = StringIO()
+    with mock.patch.object(rescore_screenings, "mark_dirty") as dirty:
+        call_command("rescore_screenings", "--chunk-size", "3", "--workers", "1", *args, stdout=out)
+    return out.getvalue(), dirty
+
+
+def _state():
+    return (
+        sorted(Screening.objects.values_list("id", "risk_level", "red_flags", "risk_rules_version")),
+        sorted(ScreeningFlag.objects.values_list("screening_id", "organization_id", "code", "screened_at")),
+    )
+
+
+@pytest.mark.django_db
+def test_dry_run_writes_nothing(stale):
+    before = _state()
+    out, dirty = _rescore("--dry-run")
+    assert "4 would change" in out
+    assert _state() == before
+    assert not RescoreCheckpoint.objects.exists()
+    dirty.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_rescore_marks_changed_days_dirty(stale):
+    org, rows = stale
+    out, dirty = _rescore()
+    assert "4 changed" in out
+    assert set(Screening.objects.values_list("risk_level", flat=True)) == {"GREEN", "RED"}
+    assert not Screening.objects.exclude(risk_rules_version=RISK_RULES_VERSION).exists()
+
+    marked = set().union(*(set(c.args[0]) for c in dirty.call_args_list))
+    assert marked == {(org.id, timezone.localtime(s.screened_at).date()) for s in rows[1::2]}
+
+
+@pytest.mark.django_db
+def test_resumes_from_checkpoint_and_restart_resets_it(stale):
+    _, rows = stale
+    real = rescore_screenings.replace_screening_flags
+    calls = []
+
+    def fail_second_chunk(flag_rows):
+        calls.append(flag_rows)
+        if len(calls) == 2:
+            raise RuntimeError("worker killed")
+        return real(flag_rows)
+
+    with mock.patch.object(rescore_screenings, "replace_screening_flags", fail_second_chunk), pytest.raises(RuntimeError):
+        _rescore("--all")
+    cp = RescoreCheckpoint.objects.get()
+    assert (cp.last_id, cp.processed, cp.completed_at) == (rows[2].id, 3, None)
+
+    out, _ = _rescore("--all")
+    assert f"Resuming after screening id {rows[2].id}" in out
+    assert "Scored 5 screenings" in out
+    cp.refresh_from_db()
+    assert (cp.last_id, cp.processed) == (rows[-1].id, 8) and cp.completed_at
+
+    Screening.objects.filter(pk=rows[0].pk).update(risk_rules_version=None)
+    cp.last_id = rows[4].id
+    cp.completed_at = None
+    cp.save()
+    out, _ = _rescore("--all", "--restart")
+    assert "Resuming" not in out and "Scored 8 screenings" in out
+    cp.refresh_from_db()
+    assert (cp.last_id, cp.processed) == (rows[-1].id, 8)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_pool_matches_single_process(stale):
+    _rescore("--workers", "1")
+    single = _state()
+
+    Screening.objects.update(risk_level="GREEN", red_flags=[], risk_rules_version=None)
+    ScreeningFlag.objects.all().delete()
+    _rescore("--workers", "2", "--restart")
+    assert _state() == single
@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+
+from screening.services import (
+    _DIET_ANSWER_KEYS,
+    _HEALTH_REDFLAG_KEYS,
+    answers_to_columns,
+    compute_risk,
+    compute_risk_batch,
+)
+
+
+def _maybe(rng, values):
+    return rng.choice(values)
+
+
+def _random_case(rng):
+    yes_no = [True, False, None]
+    answers = {key: _maybe(rng, yes_no) for key in _HEALTH_REDFLAG_KEYS + _DIET_ANSWER_KEYS}
+    answers.update({
+        "appetite": _maybe(rng, [True, False, None, "POOR", "poor", "GOOD", "NORMAL"]),
+        "muac_tape_color": _maybe(rng, ["RED", "YELLOW", "GREEN", "red", "", None]),
+        "menarche_started": _maybe(rng, [True, False, None]),
+        "pads_per_day": _maybe(rng, [None, 1, 4, 5, 10]),
+        "bleeding_clots": _maybe(rng, [True, False, None]),
+        "bleeding_days": _maybe(rng, [None, 0, 10, 11]),
+        "cycle_length_days": _maybe(rng, [None, "GT_45", "LT_45", "gt_45", 30, 46, "50"]),
+        "hunger_vital_sign": _maybe(rng, ["OFTEN_TRUE", "SOMETIMES_TRUE", "NEVER_TRUE", "", None]),
+        "diet_type": _maybe(rng, ["LACTO_VEG", "LACTO_OVO", "NON_VEG", "non_veg", None]),
+        "deworming_taken": _maybe(rng, ["yes", "no", "dont_know", "unknown", True, False, None]),
+    })
+    if rng.random() < 0.1:
+        answers = {}
+    return {
+        "age_years": _maybe(rng, [None, 4.99, 5.0, 7.25, 18.0, 18.5, round(rng.uniform(3, 19), 2)]),
+        "age_months": _maybe(rng, [None, 0, 5, 6, 59, 60, rng.randint(0, 220)]),
+        "sex": _maybe(rng, ["M", "F", "f", "O", "", None]),
+        "height_cm": _maybe(rng, [None, 0, round(rng.uniform(60, 190), 2)]),
+        "weight_kg": _maybe(rng, [None, round(rng.uniform(5, 120), 2)]),
+        "muac_cm": _maybe(rng, [None, 11.4, 11.5, 12.4, 12.5, round(rng.uniform(9, 15), 1)]),
+        "answers": answers,
+    }
+
+
+def test_compute_risk_batch_matches_scalar():
+    rng = random.Random(20240601)
+    cases = [_random_case(rng) for _ in range(5000)]
+
+    batch = compute_risk_batch(
+        age_years=[c["age_years"] for c in cases],
+        age_months=[c["age_months"] for c in cases],
+        sex=[c["sex"] for c in cases],
+        height_cm=[c["height_cm"] for c in cases],
+        weight_kg=[c["weight_kg"] for c in cases],
+        muac_cm=[c["muac_cm"] for c in cases],
+        answers=answers_to_columns([c["answers"] for c in cases]),
+    )
+
+    assert len(batch) == len(cases)
+    for i, c in enumerate(cases):
+        rr = compute_risk(**c)
+        assert batch.levels[i] == rr.level, (i, c)
+        assert batch.flags[i] == rr.flags, (i, c)
+        if rr.derived.get("baz") is not None:
+            assert batch.derived["baz"][i] == rr.derived["baz"]
+        else:
+            assert np.isnan(batch.derived["baz"][i])
+
+
+def test_compute_risk_batch_empty():
+    batch = compute_risk_batch(
+        age_years=[], age_months=[], sex=[], height_cm=[], weight_kg=[], muac_cm=[],
+        answers=answers_to_columns([]),
+    )
+    assert len(batch) == 0
+    assert batch.flags == []
+
+
+def test_bmi_reference_vectorised_lookup_matches_scalar():
+    from screening.bmi_reference import bmi_to_baz, bmi_to_baz_many
+
+    ages = np.array([4.0, 5.0, 7.25, 7.3, 11.9, 18.0, 19.0])
+    bmi = np.full(len(ages), 17.0)
+    for interpolate in (False, True):
+        baz, ref_age, median, sd = bmi_to_baz_many(bmi=bmi, age_years=ages, sex="F", interpolate=interpolate)
+        for i, age in enumerate(ages):
+            expected = bmi_to_baz(bmi=17.0, age_years=float(age), sex="F", interpolate=interpolate)
+            assert np.allclose([baz[i], ref_age[i], median[i], sd[i]], expected)
@@ -0,0 +1,60 @@
+from datetime import timedelta
+import pytest
+from django.forms.models import model_to_dict
+from django.utils import timezone
+from accounts.models import Organization
+from django.db.models import Sum
+from reporting.models import SchoolStatDaily, SchoolStatMonthly
+from reporting.services import build_daily_rollup
+from roster.models import Classroom, Student
+from screening.models import Screening
+
+_COUNTERS = ("screened", "red_flags")
+
+def _counts(org, day):
+    row = SchoolStatDaily.objects.get(organization=org, day=day)
+    return {k: getattr(row, k) for k in _COUNTERS}
+
+@pytest.mark.django_db
+def test_signals_apply_deltas_matching_full_rebuild(django_capture_on_commit_callbacks, django_assert_num_queries):
+    org = Organization.objects.create(name="S")
+    room = Classroom.objects.create(organization=org, grade="5", division="A")
+    student = Student.objects.create(organization=org, classroom=room, pid="p1", student_code="1")
+    today = timezone.localdate()
+    now = timezone.now()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = Screening.objects.create(organization=org, student=student, screened_at=now, risk_level="GREEN")
+    assert _counts(org, today) == {"screened": 1, "red_flags": 0}
+
+    # Later saves touch only the counters: one UPDATE for the day, one for its month.
+    with django_capture_on_commit_callbacks() as callbacks:
+        Screening.objects.create(organization=org, student=student, screened_at=now, risk_level="RED")
+    rollup_cbs = [cb for cb in callbacks if cb.__qualname__.startswith("queue_deltas.")]
+    assert len(rollup_cbs) == 1
+    with django_assert_num_queries(2):
+        rollup_cbs[0]()
+    for cb in callbacks:
+        if cb not in rollup_cbs:
+            cb()
+    with django_capture_on_commit_callbacks(execute=True):
+        first.risk_level = "RED"
+        first.save()
+    assert _counts(org, today) == {"screened": 2, "red_flags": 2}
+
+    # Moving a screening to another day, then deleting it.
+    with django_capture_on_commit_callbacks(execute=True):
+        first.screened_at = now - timedelta(days=1)
+        first.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert _counts(org, today) == {"screened": 1, "red_flags": 1}
+    assert _counts(org, today - timedelta(days=1)) == {"screened": 0, "red_flags": 0}
+
+    incremental = model_to_dict(SchoolStatDaily.objects.get(organization=org, day=today), exclude=["id", "created_at"])
+    rebuilt = model_to_dict(build_daily_rollup(org, today), exclude=["id", "created_at"])
+    assert incremental == rebuilt
+    month = SchoolStatMonthly.objects.get(organization=org, month=today.replace(day=1))
+    daily = SchoolStatDaily.objects.filter(organization=org, day__gte=month.month).aggregate(
+        screened=Sum("screened"), red_flags=Sum("red_flags"))
+    assert {"screened": month.screened, "red_flags": month.red_flags} == daily
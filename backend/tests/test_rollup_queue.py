@@ -0,0 +1,28 @@
+from datetime import timedelta
+from unittest import mock
+import pytest
+from django.utils import timezone
+from accounts.models import Organization
+from reporting import rollup_queue
+from reporting.models import RollupDirtyDay, SchoolStatDaily
+
+@pytest.mark.django_db
+def test_dirty_days_are_coalesced_and_rebuilt_once(settings):
+    settings.ROLLUP_QUEUE_REDIS_URL = ""   # database fallback
+    org = Organization.objects.create(name="S")
+    today = timezone.localdate()
+    days = [today - timedelta(days=i) for i in (0, 1, 2, 5)]
+
+    with mock.patch.object(rollup_queue, "_schedule_drain"):
+        for _ in range(3):   # the same days marked by many writes
+            rollup_queue.mark_dirty((org.id, d) for d in days)
+    assert RollupDirtyDay.objects.count() == 4
+
+    with mock.patch.object(rollup_queue, "build_daily_rollup", wraps=rollup_queue.build_daily_rollup) as daily, \
+         mock.patch.object(rollup_queue, "build_rollups_for_period_bulk",
+                           wraps=rollup_queue.build_rollups_for_period_bulk) as bulk:
+        assert rollup_queue.drain_dirty_rollups() == 4
+    daily.assert_called_once_with(org, days[3])
+    bulk.assert_called_once_with(org, days[2], days[0])
+    assert RollupDirtyDay.objects.count() == 0
+    assert set(SchoolStatDaily.objects.filter(organization=org).values_list("day", flat=True)) == set(days)
@@ -0,0 +1,43 @@
+import threading
+import pytest
+from django.db import connection, connections
+from django.utils import timezone
+from accounts.models import Organization
+from reporting.models import SchoolStatDaily, SchoolStatMonthly
+from reporting.services import build_daily_rollup
+from roster.models import Classroom, Student
+from screening.models import Screening
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_rebuilds_of_one_day_upsert_a_single_row():
+    if connection.vendor == "sqlite":
+        pytest.skip("SQLite serialises writers with table locks; run against MySQL")
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    room, _ = Classroom.objects.get_or_create(organization=org, grade="5", division="A")
+    student = Student.objects.create(organization=org, classroom=room, pid="p1", student_code="1")
+    for risk in ("RED", "GREEN", "RED"):
+        Screening.objects.create(organization=org, student=student, screened_at=timezone.now(), risk_level=risk)
+    day = timezone.localdate()
+
+    errors, barrier = [], threading.Barrier(6)
+
+    def rebuild():
+        try:
+            barrier.wait()
+            for _ in range(5):
+                build_daily_rollup(org, day)
+        except Exception as exc:   # deadlocks / duplicate keys surface here
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=rebuild) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    row = SchoolStatDaily.objects.get(organization=org, day=day)
+    assert (row.screened, row.red_flags) == (3, 2)
+    assert SchoolStatMonthly.objects.get(organization=org, month=day.replace(day=1)).screened == 3
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+import pytest
+from django.utils import timezone
+from accounts.models import Organization
+from assist.models import Application
+from program.models import Enrollment, MonthlySupply
+from reporting.models import SchoolStatDaily, SchoolStatMonthly
+from reporting.services import (
+    ROLLUP_METRICS, build_daily_rollup, build_rollups_for_all_orgs, period_summary, refresh_monthly_rollups,
+)
+from roster.models import Classroom, Student
+from screening.models import Screening
+
+def _row(org, day):
+    r = SchoolStatDaily.objects.get(organization=org, day=day)
+    return {m: getattr(r, m) for m in ROLLUP_METRICS}
+
+@pytest.mark.django_db
+def test_all_orgs_builder_matches_per_org_rollup(django_assert_max_num_queries):
+    active, other, idle = (Organization.objects.create(name=n, screening_link_token=n) for n in ("A", "B", "Idle"))
+    now = timezone.now()
+    today, yesterday = timezone.localdate(), timezone.localdate() - timedelta(days=1)
+    for org in (active, other):
+        room = Classroom.objects.create(organization=org, grade="5", division="A")
+        st = Student.objects.create(organization=org, classroom=room, pid=f"p-{org.id}", student_code="1")
+        Screening.objects.create(organization=org, student=st, screened_at=now, risk_level="RED")
+        Screening.objects.create(organization=org, student=st, screened_at=now - timedelta(days=1))
+    st = Student.objects.filter(organization=active).first()
+    app = Application.objects.create(organization=active, student=st, status="APPROVED",
+                                     forwarded_at=now, sapa_reviewed_at=now)
+    enrollment = Enrollment.objects.create(organization=active, application=app, student=st,
+                                           start_date=today, end_date=today + timedelta(days=180))
+    MonthlySupply.objects.filter(enrollment=enrollment, month_index=1).update(delivered_on=today)
+    SchoolStatDaily.objects.create(organization=idle, day=today, screened=7)   # stale
+
+    with django_assert_max_num_queries(21):
+        build_rollups_for_all_orgs(yesterday, today)
+
+    built = {(org.id, d): _row(org, d) for org in (active, other) for d in (yesterday, today)}
+    assert built[(active.id, today)]["supplies_delivered"] == 1
+    assert built[(active.id, today)]["approved"] == 1
+    assert _row(idle, today)["screened"] == 0
+    assert not SchoolStatDaily.objects.filter(organization=idle, day=yesterday).exists()
+    for org in (active, other):
+        for d in (yesterday, today):
+            build_daily_rollup(org, d)
+            assert _row(org, d) == built[(org.id, d)]
+
+@pytest.mark.django_db
+def test_period_summary_composes_months_and_daily_edges(django_assert_num_queries):
+    org = Organization.objects.create(name="A", screening_link_token="a")
+    start, end = date(2026, 1, 1), date(2026, 7, 10)
+    d, rows = start, []
+    while d <= end:
+        rows.append(SchoolStatDaily(organization=org, day=d, screened=d.day, red_flags=d.day % 3,
+                                    compliance_submitted=2, compliance_compliant=1))
+        d += timedelta(days=1)
+    SchoolStatDaily.objects.bulk_create(rows)
+    refresh_monthly_rollups(start, end, org_ids=[org.id])
+    assert SchoolStatMonthly.objects.filter(organization=org).count() == 7
+
+    lo, hi = date(2026, 1, 20), date(2026, 7, 5)   # 12 + 5 edge days, Feb..Jun whole months
+    with django_assert_num_queries(2):
+        agg = period_summary(org, lo, hi)
+    expected = [r for r in rows if lo <= r.day <= hi]
+    assert agg["screened"] == sum(r.screened for r in expected)
+    assert agg["red_flags"] == sum(r.red_flags for r in expected)
+    assert agg["compliance_rate"] == 50.0
+    assert period_summary(org, date(2026, 3, 1), date(2026, 3, 31))["screened"] == sum(range(1, 32))
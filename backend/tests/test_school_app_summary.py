@@ -0,0 +1,40 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from accounts.models import Organization
+from assist.views import _period_bounds, _student_screening_summary
+from roster.models import Classroom, Student
+from screening.models import Screening
+
+def _distinct(qs):
+    return qs.values_list("student_id", flat=True).distinct().count()
+
+@pytest.mark.django_db
+def test_student_summary_matches_distinct_counts(django_assert_num_queries):
+    org = Organization.objects.create(name="A", screening_link_token="a")
+    room = Classroom.objects.create(organization=org, grade="5", division="A")
+    now = timezone.now()
+    plan = [("M", [(10, "RED"), (200, "GREEN")]), ("M", [(300, "RED")]), ("F", [(20, "GREEN"), (40, "RED")]),
+            ("F", [(5, "GREEN"), (400, "RED")]), ("F", []), ("M", [(1, "AMBER"), (2, "AMBER")])]
+    for i, (gender, screenings) in enumerate(plan):
+        st = Student.objects.create(organization=org, classroom=room, gender=gender, pid=f"p{i}", student_code=str(i))
+        for days_ago, level in screenings:
+            Screening.objects.create(organization=org, student=st, gender=gender, risk_level=level,
+                                     screened_at=now - timedelta(days=days_ago))
+
+    for period in ("3m", "12m", "all"):
+        start_dt, end_dt = _period_bounds(period)
+        scr = Screening.objects.filter(organization=org)
+        if start_dt:
+            scr = scr.filter(screened_at__range=(start_dt, end_dt))
+        red = scr.filter(risk_level="RED")
+        with django_assert_num_queries(1):
+            summary = _student_screening_summary(org, start_dt)
+        assert summary == {
+            "total_students": 6,
+            "total_screened": _distinct(scr), "total_redflag": _distinct(red),
+            "boys_screened": _distinct(scr.filter(student__gender="M")),
+            "boys_redflag": _distinct(red.filter(student__gender="M")),
+            "girls_screened": _distinct(scr.filter(student__gender="F")),
+            "girls_redflag": _distinct(red.filter(student__gender="F")),
+        }, period
@@ -0,0 +1,63 @@
+import pytest
+from datetime import timedelta
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
+from accounts.models import Organization
+from reporting.models import SchoolReportStatus
+from nutrilift.celery import app as celery_app
+from reporting.tasks import deliver_school_reports, send_due_school_reports
+
+@pytest.fixture
+def celery_eager():
+    """Run the chord in-process instead of publishing to the broker / result backend."""
+    saved = celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates
+    celery_app.conf.task_always_eager = celery_app.conf.task_eager_propagates = True
+    yield
+    celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates = saved
+
+@pytest.mark.django_db
+def test_due_reports_fan_out_and_failures_stay_due(monkeypatch, celery_eager):
+    monkeypatch.setenv("ESAPA_REPORT_TO", "ops@test")
+    today = timezone.localdate()
+    due, later, new_due, failing = (Organization.objects.create(name=n, screening_link_token=n)
+                                    for n in ("Due", "Later", "NoStatus", "Failing"))
+    SchoolReportStatus.objects.create(organization=due, next_due_on=today)
+    SchoolReportStatus.objects.create(organization=later, next_due_on=today + timedelta(days=30))
+    SchoolReportStatus.objects.create(organization=failing, next_due_on=today - timedelta(days=1))
+    Organization.objects.filter(pk=new_due.pk).update(created_at=timezone.now() - timedelta(days=200))
+
+    real_send = EmailBackend.send_messages
+    def send(self, messages):
+        if any("Failing" in m.subject for m in messages):
+            raise OSError("smtp down")
+        return real_send(self, messages)
+    monkeypatch.setattr(EmailBackend, "send_messages", send)
+
+    assert send_due_school_reports() == 3
+    assert sorted(m.subject.split(" – ")[1].split()[0] for m in mail.outbox) == ["Due", "NoStatus"]
+    assert mail.outbox[0].attachments[0][2] == "text/csv"
+
+    statuses = SchoolReportStatus.objects.in_bulk(field_name="organization_id")
+    for org in (due, new_due):
+        assert statuses[org.id].next_due_on == today + timedelta(days=180)
+        assert statuses[org.id].last_sent_at and not statuses[org.id].last_error
+    assert statuses[failing.id].next_due_on == today - timedelta(days=1)
+    assert "smtp down" in statuses[failing.id].last_error and statuses[failing.id].last_sent_at is None
+    assert statuses[later.id].last_attempt_at is None
+
+@pytest.mark.django_db
+def test_deliver_with_only_failed_builds_records_errors(monkeypatch):
+    today = timezone.localdate()
+    org = Organization.objects.create(name="Broken", screening_link_token="b")
+    SchoolReportStatus.objects.create(organization=org, next_due_on=today)
+    def no_connection(*args, **kwargs):
+        raise AssertionError("no mail connection needed when nothing was built")
+    monkeypatch.setattr("reporting.tasks.get_connection", no_connection)
+
+    start, end = (today - timedelta(days=180)).isoformat(), today.isoformat()
+    result = deliver_school_reports([{"org_id": org.id, "error": "build failed: boom"}], start, end, ["ops@test"])
+    assert result == {"sent": 0, "failed": [org.id]}
+    assert not mail.outbox
+    rs = SchoolReportStatus.objects.get(organization=org)
+    assert rs.next_due_on == today and rs.last_error == "build failed: boom" and rs.last_attempt_at
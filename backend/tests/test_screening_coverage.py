@@ -0,0 +1,81 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from accounts.models import Organization
+from roster.models import Classroom, Student
+from screening.models import Screening
+from screening_only.coverage import (
+    _coverage_rows, academic_year_of, current_academic_year, rebuild_all_coverage, refresh_current_year,
+)
+from screening_only.models import ScreeningCoverage
+from screening_only.services import available_academic_years, screening_counts_by_class
+
+def _stored(org, label):
+    return {(r.classroom_id, r.screened_once, r.screened_twice, r.total_students)
+            for r in ScreeningCoverage.objects.filter(organization=org, academic_year=label)}
+
+def _fresh(org, label):
+    return {(r.classroom_id, r.screened_once, r.screened_twice, r.total_students) for r in _coverage_rows(org.id, label)}
+
+@pytest.mark.django_db
+def test_coverage_tracks_screenings_and_freezes_past_years(django_capture_on_commit_callbacks):
+    org = Organization.objects.create(name="A", screening_link_token="a")
+    rooms = [Classroom.objects.create(organization=org, grade=g, division="A") for g in ("4", "5")]
+    students = [Student.objects.create(organization=org, classroom=rooms[i % 2], pid=f"p{i}", student_code=str(i))
+                for i in range(4)]
+    now = timezone.now()
+    current, past = current_academic_year(), academic_year_of(now - timedelta(days=400))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Screening.objects.create(organization=org, student=students[0], screened_at=now - timedelta(days=400))
+    rebuild_all_coverage(org.id)
+    assert ScreeningCoverage.objects.get(organization=org, academic_year=past).frozen
+    assert available_academic_years(org) == [past]
+
+    for i, st in enumerate(students[:3] + students[:2] + students[:1]):
+        with django_capture_on_commit_callbacks(execute=True):
+            Screening.objects.create(organization=org, student=st, screened_at=now - timedelta(minutes=i))
+        assert _stored(org, current) == _fresh(org, current)
+    assert available_academic_years(org) == [current, past]
+    assert [(r["grade"], r["screened_once"], r["screened_twice"], r["total_students"])
+            for r in screening_counts_by_class(org, current)] == [("4", 1, 1, 2), ("5", 0, 1, 1)]
+
+    # Late data for the frozen year is ignored; a delete in the current year is rebuilt.
+    with django_capture_on_commit_callbacks(execute=True):
+        Screening.objects.create(organization=org, student=students[1], screened_at=now - timedelta(days=390))
+        Screening.objects.filter(student=students[2]).first().delete()
+    assert _stored(org, past) == {(rooms[0].id, 1, 0, 1)}
+    assert _stored(org, current) == _fresh(org, current)
+
+    # Classroom moves are picked up by the nightly refresh of the current year only.
+    Student.objects.filter(pk=students[0].pk).update(classroom=rooms[1])
+    refresh_current_year()
+    assert _stored(org, current) == _fresh(org, current)
+    assert _stored(org, past) == {(rooms[0].id, 1, 0, 1)}
+
+@pytest.mark.django_db
+def test_screenings_committed_together_keep_buckets_exact(django_capture_on_commit_callbacks):
+    org = Organization.objects.create(name="A", screening_link_token="a")
+    room = Classroom.objects.create(organization=org, grade="5", division="A")
+    st = Student.objects.create(organization=org, classroom=room, pid="p", student_code="1")
+    other = Student.objects.create(organization=org, classroom=room, pid="q", student_code="2")
+    now = timezone.now()
+    current = current_academic_year()
+    with django_capture_on_commit_callbacks(execute=True):
+        Screening.objects.create(organization=org, student=other, screened_at=now)
+
+    # Both commits land before either callback runs: each sees two screenings.
+    with django_capture_on_commit_callbacks() as callbacks:
+        Screening.objects.create(organization=org, student=st, screened_at=now - timedelta(minutes=2))
+        Screening.objects.create(organization=org, student=st, screened_at=now - timedelta(minutes=1))
+    for cb in callbacks:
+        cb()
+    assert _stored(org, current) == _fresh(org, current) == {(room.id, 1, 1, 2)}
+
+    # The second and third screenings of a student committed together.
+    with django_capture_on_commit_callbacks() as callbacks:
+        Screening.objects.create(organization=org, student=other, screened_at=now - timedelta(minutes=2))
+        Screening.objects.create(organization=org, student=other, screened_at=now - timedelta(minutes=1))
+    for cb in reversed(callbacks):
+        cb()
+    assert _stored(org, current) == _fresh(org, current) == {(room.id, 0, 2, 2)}
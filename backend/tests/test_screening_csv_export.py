@@ -0,0 +1,79 @@
+import csv
+import io
+from datetime import timedelta
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Organization, OrgMembership, Role
+from audit.models import AuditLog
+from roster.models import Classroom, Guardian, Student
+from screening import export
+from screening.models import Screening
+
+User = get_user_model()
+
+
+def _old_rows(qs):
+    """The pre-streaming view's rows, built from model instances."""
+    rows = []
+    for s in qs.select_related("student__classroom", "student__primary_guardian").order_by("-screened_at", "-id"):
+        bmi = ""
+        if s.height_cm and s.weight_kg and float(s.height_cm) > 0:
+            h = float(s.height_cm) / 100.0
+            bmi = round(float(s.weight_kg) / (h * h), 1)
+        guardian = s.student.primary_guardian
+        rows.append([str(v) for v in (
+            s.screened_at.strftime("%Y-%m-%d %H:%M"), s.student.full_name, s.gender, s.age_years or "",
+            str(s.student.classroom or ""), guardian.phone_e164 if guardian else "",
+            s.height_cm or "", s.weight_kg or "", bmi, s.risk_level, ";".join(s.red_flags or []),
+        )])
+    return rows
+
+
+@pytest.mark.django_db
+def test_streamed_csv_matches_old_output_across_chunks(client, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_CHUNK_SIZE", 2)
+    org = Organization.objects.create(name="S", screening_link_token="s")
+    other = Organization.objects.create(name="T", screening_link_token="t")
+    room_a = Classroom.objects.create(organization=org, grade="5", division="A")
+    room_b = Classroom.objects.create(organization=org, grade="6", division="")
+    guardian = Guardian.objects.create(organization=org, pid="g1", phone_e164="+919876543210")
+    students = [
+        Student.objects.create(organization=org, classroom=room_a, first_name="Asha", last_name="K",
+                               gender="F", primary_guardian=guardian),
+        Student.objects.create(organization=org, classroom=room_b, student_code="R7", gender="M"),
+        Student.objects.create(organization=org, pid="abcdef123456", gender="F"),
+        Student.objects.create(organization=org, gender="M"),
+    ]
+    tied = timezone.now() - timedelta(days=3)
+    for i in range(7):   # five rows share one screened_at, straddling the 2-row chunks
+        st = students[i % len(students)]
+        Screening.objects.create(
+            organization=org, student=st, gender=st.gender, screened_at=tied if i < 5 else tied - timedelta(days=i),
+            age_years=9 if i % 2 else None, height_cm=130, weight_kg=25 + i, risk_level="RED" if i == 3 else "GREEN",
+            red_flags=["health_pallor", "baz=-1.0"] if i == 3 else [],
+        )
+    Screening.objects.create(organization=org, student=students[0], gender="F",
+                             screened_at=timezone.now() - timedelta(days=400))   # before the default window
+    st = Student.objects.create(organization=other, gender="F", first_name="Other")
+    Screening.objects.create(organization=other, student=st, gender="F")
+
+    u = User.objects.create_user(email="admin@test", password="x")
+    OrgMembership.objects.create(user=u, organization=org, role=Role.ORG_ADMIN)
+    client.login(email="admin@test", password="x")
+    resp = client.get(reverse("export_screenings_csv"))
+    assert resp.status_code == 200 and resp.streaming
+    assert not AuditLog.objects.filter(action="CSV_EXPORTED").exists()   # logged once streaming ends
+
+    header, *rows = list(csv.reader(io.StringIO(b"".join(resp.streaming_content).decode())))
+    assert header == ["Screened At", "Student Name", "Gender", "Age (years)", "Classroom", "Parent Phone",
+                      "Height (cm)", "Weight (kg)", "BMI (approx)", "Risk", "Red Flags"]
+    window = Screening.objects.filter(organization=org, screened_at__gte=timezone.now() - timedelta(days=180))
+    assert rows == _old_rows(window)
+    assert len(rows) == 7
+    assert {r[1] for r in rows} == {"Asha K", "Student R7", "Student abcdef12", "Student"}
+    assert {r[4] for r in rows} == {"5-A", "6", ""}
+
+    log = AuditLog.objects.get(action="CSV_EXPORTED")
+    assert log.organization == org and log.payload == {"count": 7, "complete": True}
@@ -0,0 +1,49 @@
+import pytest
+from accounts.models import Organization
+from roster.models import Classroom, Student
+from screening.export import WIDE_EXPORT_COLUMNS, iter_wide_rows
+from screening.forms import SCREENING_ANSWER_COLUMNS, NewScreeningForm
+from screening.models import Screening
+
+def _form_data(**overrides):
+    data = {
+        "student_name": "A", "unique_student_id": "R1", "dob": "2015-01-01", "sex": "F",
+        "parent_phone_e164": "9876543210", "weight_kg_r1": "25", "height_cm_r1": "130",
+        "appetite": "no", "diet_type": "LACTO_VEG", "deworming_taken": "yes", "deworming_date": "3",
+        "hunger_vital_sign": "OFTEN_TRUE",
+    }
+    for key in ("breakfast_eaten", "lunch_eaten", "green_leafy_veg", "other_vegetables", "fruits",
+                "dal_pulses_beans", "milk_curd", "egg", "fish_chicken_meat", "nuts_groundnuts",
+                "ssb_or_packaged_snacks"):
+        data[key] = "yes"
+    data.update(overrides)
+    return data
+
+@pytest.mark.django_db
+def test_answer_columns_match_form_clean():
+    org = Organization.objects.create(name="S", screening_link_token="t-1")
+    room = Classroom.objects.create(organization=org, grade="5", division="A")
+    student = Student.objects.create(organization=org, classroom=room, gender="F")
+    form = NewScreeningForm(_form_data(), student=student, organization=org)
+    assert form.is_valid(), form.errors
+    assert list(form.cleaned_data["answers"]) == [key for key, _ in SCREENING_ANSWER_COLUMNS]
+
+@pytest.mark.django_db
+def test_wide_rows_are_typed():
+    org = Organization.objects.create(name="S", screening_link_token="t-1")
+    student = Student.objects.create(organization=org, gender="F", pid="p1")
+    Screening.objects.create(
+        organization=org, student=student, gender="F", height_cm=130, weight_kg=25,
+        answers={"health_pallor": True, "fruits": "no", "pads_per_day": "4", "diet_type": "NON_VEG",
+                 "weight_kg_r1": "25.00", "egg": "maybe"},
+    )
+    [[row]] = list(iter_wide_rows(Screening.objects.all()))
+    assert len(row) == len(WIDE_EXPORT_COLUMNS)
+    values = {c.name: v for c, v in zip(WIDE_EXPORT_COLUMNS, row)}
+    assert values["health_pallor"] is True
+    assert values["fruits"] is False
+    assert values["egg"] is None
+    assert values["pads_per_day"] == 4
+    assert values["weight_kg_r1"] == 25.0
+    assert values["diet_type"] == "NON_VEG"
+    assert values["hunger_vital_sign"] is None
@@ -0,0 +1,61 @@
+import json
+import pytest
+from django.contrib.auth import get_user_model
+from accounts.models import Organization, OrgMembership, Role
+from roster.models import Classroom, Guardian, Student
+from screening.models import LatestScreening, Screening, ScreeningFlag
+
+User = get_user_model()
+
+def _item(key, **overrides):
+    item = {
+        "idempotency_key": key, "grade": "5", "division": "A",
+        "student_name": "Asha", "unique_student_id": "R1", "dob": "2015-01-01", "sex": "F",
+        "parent_phone_e164": "9876543210", "weight_kg_r1": 18, "height_cm_r1": 130,
+        "appetite": False, "diet_type": "LACTO_VEG", "deworming_taken": "yes", "deworming_date": 3,
+        "hunger_vital_sign": "OFTEN_TRUE", "health_pallor": True,
+    }
+    for key_ in ("breakfast_eaten", "lunch_eaten", "green_leafy_veg", "other_vegetables", "fruits",
+                 "dal_pulses_beans", "milk_curd", "egg", "fish_chicken_meat", "nuts_groundnuts",
+                 "ssb_or_packaged_snacks"):
+        item[key_] = True
+    item.update(overrides)
+    return item
+
+def _post(client, items):
+    resp = client.post("/screening/teacher/sync/", data=json.dumps({"items": items}),
+                       content_type="application/json")
+    assert resp.status_code == 200, resp.content
+    return resp.json()["results"]
+
+@pytest.mark.django_db
+def test_sync_creates_dedupes_and_validates(client, settings, django_capture_on_commit_callbacks):
+    settings.PID_HMAC_KEY = "test-key"
+    org = Organization.objects.create(name="S", screening_link_token="t-1")
+    Classroom.objects.create(organization=org, grade="5", division="A")
+    u = User.objects.create_user(email="t@test", password="x")
+    OrgMembership.objects.create(user=u, organization=org, role=Role.TEACHER)
+    client.login(email="t@test", password="x")
+
+    items = [
+        _item("k1"),
+        _item("k2", student_name="Ravi", unique_student_id="R2", sex="M", parent_phone_e164="9876500000"),
+        _item("k3", student_name="Mina", unique_student_id="R1", parent_phone_e164="9876511111"),  # roll taken by k1
+        _item("k4", weight_kg_r1=900),
+    ]
+    with django_capture_on_commit_callbacks(execute=True):
+        results = _post(client, items)
+    assert [r["status"] for r in results] == ["created", "created", "error", "error"]
+    assert results[0]["risk_level"] == "RED" and "health_pallor" in results[0]["red_flags"]
+    assert Student.objects.filter(organization=org).count() == 2
+    assert Guardian.objects.filter(organization=org).count() == 2
+    assert ScreeningFlag.objects.filter(screening_id=results[0]["screening_id"], code="health_pallor").exists()
+    assert LatestScreening.objects.get(student_id=results[0]["student_id"]).screening_id == results[0]["screening_id"]
+
+    # Replaying is safe; a re-screen of an existing student by id reuses the row.
+    again = _post(client, [_item("k1"), _item("k5", student_id=results[1]["student_id"], unique_student_id="R2",
+                                               sex="M", parent_phone_e164="9876500000")])
+    assert again[0] == {"idempotency_key": "k1", "status": "duplicate", "screening_id": results[0]["screening_id"]}
+    assert again[1]["status"] == "created" and again[1]["student_id"] == results[1]["student_id"]
+    assert Screening.objects.filter(organization=org).count() == 3
+    assert LatestScreening.objects.get(student_id=results[1]["student_id"]).screening_count == 2
@@ -0,0 +1,81 @@
+import asyncio
+import time
+import pytest
+from messaging.async_sender import run_sends, send_concurrently
+from messaging.providers.meta_cloud import AsyncMetaCloudProvider
+from messaging.ratelimit import RateLimitExceeded
+from messaging.stub_server import StubProviderServer
+
+
+@pytest.fixture
+def meta_env(monkeypatch):
+    server = StubProviderServer(latency=0.05).start()
+    monkeypatch.setenv("WA_GRAPH_BASE_URL", server.url)
+    monkeypatch.setenv("WA_PHONE_NUMBER_ID", "123")
+    monkeypatch.setenv("WA_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("WA_HTTP_BACKOFF", "0")
+    yield server
+    server.stop()
+
+
+def _jobs(n, phones=None):
+    return [(f"+9190000{(i if phones is None else i % phones):05d}", "t", "en", {"body": ["x"]}) for i in range(n)]
+
+
+def _send(jobs, **kw):
+    kw.setdefault("reserve_global", None)
+    kw.setdefault("check_phone", None)
+
+    async def main():
+        async with AsyncMetaCloudProvider() as prov:
+            return await send_concurrently(prov, jobs, **kw)
+
+    return asyncio.run(main())
+
+
+def test_fan_out_overlaps_latency_within_the_semaphore(meta_env):
+    started = time.monotonic()
+    results = _send(_jobs(100), concurrency=25)
+    elapsed = time.monotonic() - started
+
+    assert all(exc is None and sent[0].startswith("wamid.") for sent, exc in results)
+    assert meta_env.requests == 100
+    assert meta_env.max_in_flight <= 25
+    assert elapsed < 100 * 0.05 / 5   # serial would take 5 s
+    assert meta_env.connections <= 25
+
+
+def test_one_send_per_phone_in_flight_and_limits(meta_env):
+    _send(_jobs(20, phones=1), concurrency=10)
+    assert meta_env.max_in_flight == 1
+
+    capped = []
+
+    def check_phone(phone, template):
+        if phone.endswith("1"):
+            capped.append(phone)
+            raise RateLimitExceeded(phone)
+
+    meta_env.requests = 0
+    results = _send(_jobs(6), concurrency=10, reserve_global=lambda n: 4, check_phone=check_phone)
+    sent = [exc is None for _, exc in results]
+    assert sent == [True, False, True, True, False, False]
+    assert all(isinstance(exc, RateLimitExceeded) for _, exc in results[4:]) and capped
+    assert meta_env.requests == 3
+
+
+def test_retries_429_and_reports_final_errors(meta_env):
+    meta_env.script = [429, 503]
+    (sent, exc), = _send(_jobs(1), concurrency=1)
+    assert exc is None and meta_env.requests == 3
+
+    meta_env.requests = 0
+    meta_env.script = [502]
+    (sent, exc), = _send(_jobs(1), concurrency=1)
+    assert sent is None and exc.status == 502 and meta_env.requests == 1
+
+
+def test_run_sends_uses_async_mock_provider(monkeypatch):
+    monkeypatch.setenv("WHATSAPP_PROVIDER", "mock")
+    results = run_sends(_jobs(50), concurrency=50, reserve_global=None, check_phone=None)
+    assert len(results) == 50 and all(sent[0].startswith("mock-") for sent, _ in results)
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from unittest import mock
+import pytest
+import redis
+from django.db import connection
+from django.utils import timezone
+from accounts.models import Organization
+from messaging import dispatch
+from messaging.models import MessageLog
+from messaging.providers.registry import reset_providers
+
+
+@pytest.fixture
+def outbox(settings, monkeypatch):
+    settings.WA_OUTBOX_REDIS_URL = ""   # envelopes in the Django cache
+    settings.WA_DISPATCH_MAX_ATTEMPTS = 2
+    monkeypatch.setenv("WHATSAPP_PROVIDER", "mock")
+    monkeypatch.setattr(dispatch, "take_global_per_min", lambda n: n)
+    reset_providers()
+    org = Organization.objects.create(name="S", screening_link_token="s")
+
+    def queue(n, **kw):
+        logs = []
+        for i in range(n):
+            log = MessageLog.objects.create(organization=org, template_code="RED_EDU_V1", scheduled_at=timezone.now(), **kw)
+            with mock.patch.object(dispatch, "_schedule_dispatch"):
+                logs.append(dispatch.enqueue(log, f"+91900000{i:04d}", {"body": ["x"]}))
+        return logs
+
+    yield queue
+    reset_providers()
+
+
+@pytest.mark.django_db
+def test_batch_sends_once_and_writes_statuses_back(outbox):
+    logs = outbox(5)
+    click_to_chat = MessageLog.objects.create(organization=logs[0].organization, template_code="RED_EDU_V1")
+
+    with mock.patch.object(MessageLog.objects, "bulk_update", wraps=MessageLog.objects.bulk_update) as bulk:
+        counts = dispatch.dispatch_batch(limit=10)
+    assert counts["sent"] == 5 and not counts["failed"]
+    bulk.assert_called_once()
+    for log in MessageLog.objects.filter(id__in=[l.id for l in logs]):
+        assert log.status == MessageLog.Status.SENT
+        assert log.provider_msg_id.startswith("mock-") and log.send_attempts == 1
+        assert log.to_phone_e164 == "" and log.payload == {}
+    assert dispatch.get_envelopes(l.idempotency_key for l in logs) == {}
+
+    assert sum(dispatch.dispatch_batch().values()) == 0   # nothing due: no second send
+    click_to_chat.refresh_from_db()
+    assert click_to_chat.status == MessageLog.Status.QUEUED and click_to_chat.send_attempts == 0
+
+
+@pytest.mark.django_db
+def test_rate_limit_defers_and_failures_retry_then_fail(outbox, monkeypatch):
+    outbox(3)
+    monkeypatch.setattr(dispatch, "take_global_per_min", lambda n: min(n, 1))
+    counts = dispatch.dispatch_batch()
+    assert counts["sent"] == 1 and counts["deferred"] == 2
+    assert MessageLog.objects.filter(status=MessageLog.Status.QUEUED).count() == 2
+
+    monkeypatch.setattr(dispatch, "take_global_per_min", lambda n: n)
+    with mock.patch("messaging.providers.mock.MockProvider.send_template", side_effect=RuntimeError("boom")):
+        assert dispatch.dispatch_batch()["retry"] == 2
+        retried = MessageLog.objects.filter(status=MessageLog.Status.QUEUED)
+        assert all(m.scheduled_at > timezone.now() and m.error_code == "RuntimeError" for m in retried)
+        retried.update(scheduled_at=timezone.now() - timedelta(seconds=1))
+        assert dispatch.dispatch_batch()["failed"] == 2
+    assert MessageLog.objects.filter(status=MessageLog.Status.FAILED).count() == 2
+
+
+@pytest.mark.django_db
+def test_missing_envelope_fails_without_sending(outbox):
+    log = MessageLog.objects.create(organization=Organization.objects.create(name="T", screening_link_token="t"),
+                                    template_code="RED_EDU_V1", scheduled_at=timezone.now())
+    with mock.patch("messaging.providers.mock.MockProvider.send_template") as send:
+        assert dispatch.dispatch_batch()["failed"] == 1
+    send.assert_not_called()
+    log.refresh_from_db()
+    assert log.status == MessageLog.Status.FAILED and log.error_code == "NO_RECIPIENT"
+
+
+@pytest.mark.django_db
+def test_asyncio_sender_path(outbox, settings):
+    settings.WA_DISPATCH_SENDER = "asyncio"
+    logs = outbox(20)
+    assert dispatch.dispatch_batch()["sent"] == 20
+    assert set(MessageLog.objects.filter(id__in=[l.id for l in logs]).values_list("status", flat=True)) == {"SENT"}
+
+
+@pytest.mark.django_db
+def test_envelope_store_errors_leave_rows_queued(outbox, settings):
+    logs = outbox(3)
+    settings.WA_OUTBOX_REDIS_URL = "redis://outbox.invalid:6379/0"
+    broken = mock.Mock(**{"mget.side_effect": redis.ConnectionError("down"),
+                          "pipeline.return_value.execute.side_effect": redis.ConnectionError("down")})
+    with mock.patch.object(dispatch, "_redis", return_value=broken), \
+         mock.patch("messaging.providers.mock.MockProvider.send_template") as send:
+        assert dispatch.dispatch_batch()["deferred"] == 3
+        with pytest.raises(dispatch.OutboxUnavailable):
+            dispatch.put_envelopes({"k": {"to": "+1"}})
+    send.assert_not_called()
+    for log in MessageLog.objects.filter(id__in=[l.id for l in logs]):
+        assert log.status == MessageLog.Status.QUEUED and log.send_attempts == 0
+        assert log.scheduled_at > timezone.now()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sends_run_outside_the_claim_transaction(outbox):
+    log, = outbox(1)
+    seen = []
+
+    def send(*args):
+        seen.append((connection.in_atomic_block, MessageLog.objects.get(pk=log.pk).status))
+        return ("wamid.1", "sent")
+
+    with mock.patch("messaging.providers.mock.MockProvider.send_template", side_effect=send):
+        assert dispatch.dispatch_batch()["sent"] == 1
+    assert seen == [(False, MessageLog.Status.SENDING)]
+
+
+@pytest.mark.django_db
+def test_expired_leases_are_reclaimed_then_failed(outbox, settings):
+    log, = outbox(1)
+    with mock.patch.object(dispatch, "_send", side_effect=KeyboardInterrupt):   # worker dies mid-send
+        with pytest.raises(KeyboardInterrupt):
+            dispatch.dispatch_batch()
+    log.refresh_from_db()
+    assert log.status == MessageLog.Status.SENDING and log.send_attempts == 1
+    assert sum(dispatch.dispatch_batch().values()) == 0          # still leased
+
+    expire = lambda: MessageLog.objects.filter(pk=log.pk).update(scheduled_at=timezone.now() - timedelta(seconds=1))
+    expire()
+    with mock.patch.object(dispatch, "_send", side_effect=KeyboardInterrupt), pytest.raises(KeyboardInterrupt):
+        dispatch.dispatch_batch()
+    expire()
+    assert dispatch.dispatch_batch()["failed"] == 1             # attempts spent: not sent a third time
+    log.refresh_from_db()
+    assert log.status == MessageLog.Status.FAILED and log.error_code == "LEASE_EXPIRED"
@@ -0,0 +1,56 @@
+import pytest
+import requests
+
+from messaging.providers.http import build_session
+from messaging.providers.meta_cloud import MetaCloudProvider
+from messaging.providers.registry import get_provider, reset_providers
+from messaging.stub_server import StubProviderServer
+
+
+@pytest.fixture
+def meta_env(monkeypatch):
+    server = StubProviderServer().start()
+    monkeypatch.setenv("WHATSAPP_PROVIDER", "meta")
+    monkeypatch.setenv("WA_GRAPH_BASE_URL", server.url)
+    monkeypatch.setenv("WA_PHONE_NUMBER_ID", "123")
+    monkeypatch.setenv("WA_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("WA_HTTP_BACKOFF", "0")
+    reset_providers()
+    yield server
+    reset_providers()
+    server.stop()
+
+
+def test_registry_reuses_provider_and_connection(meta_env):
+    prov = get_provider()
+    assert get_provider() is prov
+    assert isinstance(prov, MetaCloudProvider)
+    for i in range(5):
+        msg_id, status = prov.send_template(f"+91900000000{i}", "t", "en", {"body": ["x"]})
+        assert msg_id.startswith("wamid.")
+    assert meta_env.requests == 5
+    assert meta_env.connections == 1
+
+
+def test_retries_429_and_503_then_gives_up(meta_env):
+    prov = get_provider()
+    meta_env.script = [429, 503]
+    msg_id, _ = prov.send_template("+919000000000", "t", "en", {"body": ["x"]})
+    assert msg_id and meta_env.requests == 3
+
+    meta_env.requests = 0
+    prov = MetaCloudProvider(session=build_session(retries=1, backoff=0))
+    meta_env.script = [503, 503, 503]
+    with pytest.raises(requests.HTTPError):
+        prov.send_template("+919000000000", "t", "en", {"body": ["x"]})
+    assert meta_env.requests == 2
+    prov.close()
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_does_not_retry_statuses_that_may_have_sent(meta_env, status):
+    prov = get_provider()
+    meta_env.script = [status]
+    with pytest.raises(requests.HTTPError):
+        prov.send_template("+919000000000", "t", "en", {"body": ["x"]})
+    assert meta_env.requests == 1